@@ -16,17 +16,37 @@ DATABASE_URL = os.getenv(
     "postgresql+psycopg2://postgres:postgres@db:5432/marketdb"
 )
 
+# Pool de conexiones (no aplica a SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))  # segundos esperando una conexión libre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # segundos antes de reciclar una conexión
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Réplicas de lectura (URLs separadas por comas; vacío = todo va al primario)
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 5))  # réplicas más atrasadas no reciben lecturas
+DB_REPLICA_CHECK_SECONDS = int(os.getenv("DB_REPLICA_CHECK_SECONDS", 10))  # intervalo del chequeo de salud y retraso
+
 # ================================
 # JWT CONFIGURATION
 # ================================
 SECRET_KEY = os.getenv("SECRET_KEY", "tu_clave_secreta_muy_segura_aqui")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+# Modo sin estado: el usuario autenticado se reconstruye desde el token, sin consultar la BD
+JWT_STATELESS_PRINCIPAL = os.getenv("JWT_STATELESS_PRINCIPAL", "false").lower() == "true"
+# Cada cuánto aplica cada worker las revocaciones de tokens registradas por los demás
+TOKEN_REVOCATION_POLL_SECONDS = float(os.getenv("TOKEN_REVOCATION_POLL_SECONDS", 2))
 
 # ================================
 # PASSWORD RESET CONFIGURATION
 # ================================
 PASSWORD_RESET_TOKEN_EXPIRE_MINUTES = int(os.getenv("PASSWORD_RESET_TOKEN_EXPIRE_MINUTES", 30))
+# Cada cuánto se borran los tokens de reset caducados o usados
+PASSWORD_RESET_SWEEP_SECONDS = int(os.getenv("PASSWORD_RESET_SWEEP_SECONDS", 3600))
 
 # ================================
 # CORS CONFIGURATION
@@ -65,6 +85,17 @@ FROM_EMAIL = os.getenv("FROM_EMAIL", SMTP_USERNAME)
 # Configuración para desarrollo/testing
 SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
 SMTP_USE_SSL = os.getenv("SMTP_USE_SSL", "false").lower() == "true"
+# Límite de cada conexión y comando SMTP: muy por debajo del lease de 5 minutos de un lote del outbox
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", 10))
+
+# Outbox de emails: los mensajes se guardan en BD y se envían en segundo plano
+EMAIL_OUTBOX_ENABLED = os.getenv("EMAIL_OUTBOX_ENABLED", "true").lower() == "true"
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", 5))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 50))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 8))
+EMAIL_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_RETRY_BASE_SECONDS", 30))
+# Horas que se conservan los mensajes enviados o fallidos (ya sin cuerpo) antes de borrarlos
+EMAIL_OUTBOX_RETENTION_HOURS = int(os.getenv("EMAIL_OUTBOX_RETENTION_HOURS", 72))
 
 # ================================
 # FRONTEND URL CONFIGURATION
@@ -85,7 +116,83 @@ MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 10 * 1024 * 1024))  # 10MB por de
 DEBUG = os.getenv("DEBUG", "true").lower() == "true"
 
 # Configuración de rate limiting
-RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", 60))
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", 60))  # intentos de login por IP
+LOGIN_RATE_LIMIT_PER_MINUTE = int(os.getenv("LOGIN_RATE_LIMIT_PER_MINUTE", 10))  # intentos de login por email
+# Tras N fallos seguidos se bloquea el par (email, IP) y la IP 1s, 2s, 4s... hasta el máximo
+LOGIN_BACKOFF_AFTER_FAILURES = int(os.getenv("LOGIN_BACKOFF_AFTER_FAILURES", 5))
+LOGIN_BACKOFF_MAX_SECONDS = int(os.getenv("LOGIN_BACKOFF_MAX_SECONDS", 900))
+# Los fallos se cuentan en una ventana fija que empieza con el primero: cada fallo no la alarga
+LOGIN_FAILURE_WINDOW_SECONDS = int(os.getenv("LOGIN_FAILURE_WINDOW_SECONDS", 900))
+# Backend compartido entre workers (p. ej. redis://redis:6379/0); vacío = memoria del proceso
+RATE_LIMIT_BACKEND_URL = os.getenv("RATE_LIMIT_BACKEND_URL")
+# Proxies de confianza (IPs o redes CIDR separadas por comas) delante de la app, p. ej. el
+# balanceador de App Service; su X-Forwarded-For da la IP real del cliente. Vacío = la IP de la conexión
+TRUSTED_PROXIES = [p.strip() for p in os.getenv("TRUSTED_PROXIES", "").split(",") if p.strip()]
+
+# ================================
+# PASSWORD HASHING CONFIGURATION
+# ================================
+# Procesos dedicados a bcrypt (0 = usar el threadpool de Starlette)
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", os.cpu_count() or 1))
+# Operaciones de hashing en espera antes de rechazar nuevas peticiones con 503
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", 64))
+# Coste de bcrypt: BCRYPT_ROUNDS fijo, o 0 para calibrarlo al arrancar según BCRYPT_TARGET_MS
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 0))
+BCRYPT_TARGET_MS = int(os.getenv("BCRYPT_TARGET_MS", 250))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", 10))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", 16))
+
+# ================================
+# CACHE CONFIGURATION
+# ================================
+# Caché en memoria (por proceso) de usuarios autenticados, indexada por el "sub" del token
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+# Tokens JWT ya verificados (indexados por su hash, hasta su "exp")
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+# Respuestas del catálogo de productos ya serializadas (por proceso)
+CATALOG_CACHE_TTL_SECONDS = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", 60))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", 5000))
+# Cada cuánto consulta cada worker si otro ha modificado el catálogo
+CATALOG_CACHE_POLL_SECONDS = float(os.getenv("CATALOG_CACHE_POLL_SECONDS", 2))
+
+# ================================
+# OBSERVABILITY CONFIGURATION
+# ================================
+# Añade la cabecera Server-Timing (sentencias SQL y tiempo en BD de cada petición)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+# Una misma sentencia repetida este número de veces en una petición se reporta como posible N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 5))
+
+# ================================
+# SERIALIZATION CONFIGURATION
+# ================================
+# Listados (productos, usuarios, facturas, chat) serializados desde filas de columnas
+# con orjson, sin validar cada fila con Pydantic. Misma salida, menos CPU por fila
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+# ================================
+# HTTP COMPRESSION & CACHE CONFIGURATION
+# ================================
+# Respuestas comprimidas con brotli (si está instalado) o gzip según Accept-Encoding
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))  # bytes; por debajo no compensa
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))  # 0-11; 4-5 es lo razonable para respuestas dinámicas
+# Cache-Control de las rutas públicas del catálogo: max-age para navegadores,
+# s-maxage para CDN/proxies (revalidan con el ETag al caducar)
+CATALOG_HTTP_MAX_AGE = int(os.getenv("CATALOG_HTTP_MAX_AGE", 30))
+CATALOG_HTTP_S_MAXAGE = int(os.getenv("CATALOG_HTTP_S_MAXAGE", 60))
+CATALOG_HTTP_STALE_WHILE_REVALIDATE = int(os.getenv("CATALOG_HTTP_STALE_WHILE_REVALIDATE", 30))
+
+# ================================
+# INVENTORY CONFIGURATION
+# ================================
+# Añadir al carrito aparta las unidades durante este tiempo (se renueva al volver a añadir)
+RESERVATION_TTL_SECONDS = int(os.getenv("RESERVATION_TTL_SECONDS", 900))
+# Cada cuánto se borran las reservas caducadas, y cuántas por transacción
+RESERVATION_SWEEP_SECONDS = int(os.getenv("RESERVATION_SWEEP_SECONDS", 60))
+RESERVATION_SWEEP_BATCH_SIZE = int(os.getenv("RESERVATION_SWEEP_BATCH_SIZE", 1000))
 
 # ================================
 # API CONFIGURATION
@@ -95,4 +202,14 @@ API_PREFIX = f"/api/{API_VERSION}"
 
 # Configuración de paginación
 DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 20))
-MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 100))
\ No newline at end of file
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 100))
+# Sugerencias de /products/suggest (autocompletado)
+SUGGEST_DEFAULT_LIMIT = int(os.getenv("SUGGEST_DEFAULT_LIMIT", 8))
+SUGGEST_MAX_LIMIT = int(os.getenv("SUGGEST_MAX_LIMIT", 20))
+# Máximo de ids por consulta de /products/batch
+PRODUCT_BATCH_MAX_IDS = int(os.getenv("PRODUCT_BATCH_MAX_IDS", 500))
+# Importación masiva de productos: filas por lote (una transacción cada uno)
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", 100))
+# Exportaciones en streaming: filas por viaje del cursor de servidor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
\ No newline at end of file
@@ -1,7 +1,205 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import time
+from typing import List, Optional
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.config import DATABASE_URL
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from app.config import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DATABASE_REPLICA_URLS,
+    DB_REPLICA_MAX_LAG_SECONDS
+)
+from app.utils.metrics import (
+    DB_POOL_CHECKOUT_WAIT_SECONDS,
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_OVERFLOW,
+    DB_REPLICA_HEALTHY,
+    DB_REPLICA_LAG_SECONDS,
+    DB_READ_SESSIONS
+)
+from app.utils.query_stats import instrument_engine
 
-engine = create_engine(DATABASE_URL)
+logger = logging.getLogger("market-backend.database")
+
+class _InstrumentedPoolMixin:
+    """Mide cuánto se espera para obtener una conexión del pool"""
+    engine_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(engine=self.engine_label).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT_SECONDS.labels(engine=self.engine_label).observe(time.perf_counter() - start)
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    engine_label = "sync"
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+class InstrumentedReplicaPool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    engine_label = "replica"
+
+def _engine_options(url: URL, poolclass) -> dict:
+    if url.get_backend_name() == "sqlite":
+        # SQLite usa su propio pool por defecto
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def async_url(url: str) -> URL:
+    """Misma base de datos con el driver asíncrono equivalente"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+asyncpg")
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+def _bind_pool_metrics(engine, label: str) -> None:
+    if isinstance(engine.pool, QueuePool):
+        DB_POOL_CHECKED_OUT.labels(engine=label).set_function(engine.pool.checkedout)
+        DB_POOL_OVERFLOW.labels(engine=label).set_function(engine.pool.overflow)
+
+# Motor síncrono: scripts (init_db, migraciones, importaciones) y herramientas de línea de comandos
+engine = create_engine(DATABASE_URL, **_engine_options(make_url(DATABASE_URL), InstrumentedQueuePool))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+# Motor asíncrono: rutas, repositorios y tareas en segundo plano
+ASYNC_DATABASE_URL = async_url(DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool)
+)
+# expire_on_commit=False: tras un commit los atributos siguen accesibles sin volver a la BD
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
+
+_bind_pool_metrics(engine, "sync")
+_bind_pool_metrics(async_engine.sync_engine, "async")
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+# Retraso de una réplica de Postgres; 0 si ya ha aplicado todo lo recibido o si es un primario
+_PG_REPLICATION_LAG = text(
+    "SELECT COALESCE(CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END, 0)"
+)
+
+class Replica:
+    """Réplica de lectura con su propio motor y el estado de su último chequeo"""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        replica_url = async_url(url)
+        self.engine = create_async_engine(
+            replica_url, **_engine_options(replica_url, InstrumentedReplicaPool)
+        )
+        self.sessionmaker = async_sessionmaker(bind=self.engine, autoflush=False, expire_on_commit=False)
+        instrument_engine(self.engine.sync_engine)
+        # Sin chequeo previo no se le envía tráfico
+        self.healthy = False
+        self.lag = 0.0
+        event.listen(self.engine.sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context) -> None:
+        # Una desconexión en plena petición la saca de la rotación hasta el próximo chequeo
+        if context.is_disconnect:
+            self._set_state(False, self.lag)
+
+    def _set_state(self, healthy: bool, lag: float) -> None:
+        self.healthy = healthy
+        self.lag = lag
+        DB_REPLICA_HEALTHY.labels(replica=self.name).set(1 if healthy else 0)
+        DB_REPLICA_LAG_SECONDS.labels(replica=self.name).set(lag)
+
+    async def check(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                if self.engine.dialect.name == "postgresql":
+                    lag = float((await conn.execute(_PG_REPLICATION_LAG)).scalar())
+                else:
+                    await conn.execute(text("SELECT 1"))
+                    lag = 0.0
+        except Exception as e:
+            if self.healthy:
+                logger.warning("Réplica %s fuera de servicio: %s", self.name, e)
+            self._set_state(False, self.lag)
+            return
+        if not self.healthy:
+            logger.info("Réplica %s disponible (retraso %.1fs)", self.name, lag)
+        self._set_state(True, lag)
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and self.lag <= DB_REPLICA_MAX_LAG_SECONDS
+
+class ReplicaSet:
+    """Reparte las lecturas en round-robin entre las réplicas sanas y al día"""
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self._counter = itertools.count()
+
+    def pick(self) -> Optional[Replica]:
+        available = [r for r in self.replicas if r.available]
+        if not available:
+            return None
+        return available[next(self._counter) % len(available)]
+
+    async def check(self) -> None:
+        for replica in self.replicas:
+            await replica.check()
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+replicas = ReplicaSet(DATABASE_REPLICA_URLS)
+
+async def warm_up_async_engine() -> None:
+    """Abre la primera conexión de cada motor antes de atender tráfico"""
+    # La inicialización del dialecto no admite varias corrutinas conectando a la vez a un motor nuevo
+    async with async_engine.connect():
+        pass
+    await replicas.check()
+
+async def dispose_async_engines() -> None:
+    await async_engine.dispose()
+    await replicas.dispose()
+
+async def get_db():
+    """Sesión por petición: FastAPI la reutiliza entre la ruta y sus dependencias (p. ej. auth)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def read_sessionmaker() -> async_sessionmaker:
+    """Fábrica de sesiones de una réplica disponible o, si no hay ninguna, del primario"""
+    replica = replicas.pick()
+    DB_READ_SESSIONS.labels(target=replica.name if replica else "primary").inc()
+    return replica.sessionmaker if replica else AsyncSessionLocal
+
+async def get_read_db():
+    """Sesión de una réplica disponible (o del primario) para lecturas que toleran unos segundos de retraso"""
+    async with read_sessionmaker()() as db:
+        yield db
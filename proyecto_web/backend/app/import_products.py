@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import sys
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+
+from app.config import IMPORT_CHUNK_SIZE
+from app.database import async_engine, AsyncSessionLocal
+from app.schemas.product import ProductImportResult
+from app.services.product_service import ProductService
+from app.utils.record_stream import FORMATS, detect_format
+
+
+async def read_chunks(path: str, size: int = 1 << 16) -> AsyncIterator[bytes]:
+    source = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while chunk := source.read(size):
+            yield chunk
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+
+
+def print_progress(result: ProductImportResult) -> None:
+    print(f"  lote {result.chunks}: {result.rows} filas leídas, {result.inserted} altas, "
+          f"{result.updated} actualizadas, {result.rejected} rechazadas", flush=True)
+
+
+async def import_file(path: str, fmt: str, chunk_size: int) -> ProductImportResult:
+    try:
+        async with AsyncSessionLocal() as db:
+            return await ProductService(db).import_products(read_chunks(path), fmt, chunk_size, on_chunk=print_progress)
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importación masiva de productos desde CSV o NDJSON")
+    parser.add_argument("path", help="Fichero a importar ('-' para la entrada estándar)")
+    parser.add_argument("--format", choices=FORMATS, help="Por defecto, según la extensión del fichero")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(filename=args.path)
+    if fmt is None:
+        parser.error("no se reconoce el formato por la extensión: usa --format csv|ndjson")
+
+    print(f"📦 Importando {args.path} ({fmt}, lotes de {args.chunk_size} filas)")
+    try:
+        result = asyncio.run(import_file(args.path, fmt, args.chunk_size))
+    except HTTPException as exc:
+        sys.exit(f"❌ {exc.detail}")
+
+    for error in result.errors:
+        print(f"  ⚠️  línea {error.line}: {error.error}")
+    if result.rejected > len(result.errors):
+        print(f"  ... y {result.rejected - len(result.errors)} filas rechazadas más")
+    print(f"✅ {result.inserted} altas, {result.updated} actualizadas, {result.rejected} rechazadas "
+          f"de {result.rows} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
-from sqlalchemy.orm import Session
-from app.database import engine, SessionLocal
-from app.models import user, product as product_model, cart, chat, invoice
+import asyncio
+from app.database import async_engine, AsyncSessionLocal
+from app.models import user, product as product_model, cart, chat, invoice, password_reset, email_outbox, stock_reservation, token_revocation, product_change
 from app.repositories.user_repository import UserRepository
 from app.repositories.product_repository import ProductRepository
 from app.schemas.product import ProductCreate
+from app.utils.password_pool import shutdown_hash_pool
+from app.migrations.runner import run_migrations
 
 # Import all models to ensure they are registered
 from app.models.user import User
@@ -11,24 +13,25 @@ from app.models.product import Product
 from app.models.cart import Cart
 from app.models.chat import ChatMessage
 from app.models.invoice import Invoice, InvoiceItem
+from app.models.password_reset import PasswordResetToken
+from app.models.email_outbox import EmailOutbox
+from app.models.stock_reservation import StockReservation
+from app.models.token_revocation import TokenRevocation
+from app.models.product_change import ProductChange
 
-def init_db():
-    # Create all tables
-    user.Base.metadata.create_all(bind=engine)
-    product_model.Base.metadata.create_all(bind=engine)
-    cart.Base.metadata.create_all(bind=engine)
-    chat.Base.metadata.create_all(bind=engine)
-    invoice.Base.metadata.create_all(bind=engine)
+async def init_db():
+    # Crear o actualizar el esquema con las migraciones versionadas
+    run_migrations()
     
-    db = SessionLocal()
+    db = AsyncSessionLocal()
     try:
         # Check if admin user already exists
         user_repo = UserRepository(db)
-        admin_user = user_repo.get_by_email("admin@example.com")
+        admin_user = await user_repo.get_by_email("admin@example.com")
         
         if not admin_user:
             # Create admin user
-            admin_user = user_repo.create_user(
+            admin_user = await user_repo.create_user(
                 email="admin@example.com",
                 name="Administrador",
                 password="admin123",
@@ -40,7 +43,7 @@ def init_db():
         
         # Check if products already exist
         product_repo = ProductRepository(db)
-        existing_products = product_repo.get_all()
+        existing_products = await product_repo.get_all()
         
         if len(existing_products) == 0:
             # Create sample products
@@ -60,18 +63,21 @@ def init_db():
             ]
             
             for product_data in sample_products:
-                created_product = product_repo.create(product_data)
+                created_product = await product_repo.create(product_data)
                 print(f"✅ Producto creado: {created_product.name} - ${created_product.price}")
         else:
             print(f"ℹ️  Ya existen {len(existing_products)} productos en la base de datos")
             
     except Exception as e:
         print(f"❌ Error al inicializar la base de datos: {e}")
-        db.rollback()
+        await db.rollback()
     finally:
-        db.close()
+        await db.close()
+        # Las conexiones quedan ligadas a este event loop: no reutilizarlas fuera
+        await async_engine.dispose()
+        shutdown_hash_pool()
 
 if __name__ == "__main__":
     print("🚀 Inicializando base de datos...")
-    init_db()
+    asyncio.run(init_db())
     print("✅ Base de datos inicializada correctamente")
@@ -1,9 +1,18 @@
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.routes import auth_routes, user_routes, product_routes, cart_routes, chat_routes, invoice_routes, dashboard_routes
 from app.websocket.chat import websocket_endpoint
-from app.config import CORS_ORIGINS
+from app.config import CORS_ORIGINS, COMPRESSION_ENABLED
+from app.database import warm_up_async_engine, dispose_async_engines
+from app.utils.query_stats import QueryStatsMiddleware
+from app.utils.http_cache import CacheControlMiddleware
+from app.utils.compression import CompressionMiddleware
+from app.utils.password_pool import HashPoolBusy, setup_password_hashing, shutdown_hash_pool
+from app.tasks.maintenance import (
+    start_background_tasks, stop_background_tasks, refresh_catalog_version, refresh_token_revocations
+)
 from prometheus_fastapi_instrumentator import Instrumentator
 import logging
 
@@ -30,8 +39,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cabeceras de paginación legibles desde el frontend
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Link"],
 )
 
+# Sentencias SQL y tiempo de BD por petición (métricas, aviso de N+1 y Server-Timing)
+app.add_middleware(QueryStatsMiddleware)
+
+# Cache-Control por ruta: catálogo público cacheable por CDN, el resto privado
+app.add_middleware(CacheControlMiddleware)
+
+# Compresión brotli/gzip de las respuestas grandes (catálogo, listados, exportaciones)
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# El pool de bcrypt está saturado: rechazar en lugar de encolar sin límite
+@app.exception_handler(HashPoolBusy)
+async def hash_pool_busy_handler(request: Request, exc: HashPoolBusy):
+    logger.warning("Pool de hashing saturado, rechazando %s", request.url.path)
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servicio de autenticación ocupado, inténtalo de nuevo"},
+        headers={"Retry-After": "1"},
+    )
+
 # Incluir rutas
 app.include_router(auth_routes.router, prefix="/auth", tags=["Autenticación"])
 app.include_router(user_routes.router, prefix="/users", tags=["Usuarios"])
@@ -62,6 +93,24 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.on_event("startup")
+async def on_startup():
+    rounds = setup_password_hashing()
+    logger.info("Coste de bcrypt: %s rondas", rounds)
+    await warm_up_async_engine()
+    # Índice de sugerencias cargado antes de aceptar peticiones
+    await refresh_catalog_version()
+    # Revocaciones aún vigentes registradas por otros workers antes de arrancar este
+    await refresh_token_revocations()
+    start_background_tasks()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await stop_background_tasks()
+    shutdown_hash_pool()
+    await dispose_async_engines()
+
 
 # Instrumentación Prometheus
 Instrumentator().instrument(app).expose(app)
@@ -0,0 +1,25 @@
+import argparse
+import logging
+
+from app.migrations.runner import migration_status, run_migrations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migraciones de esquema de la base de datos")
+    parser.add_argument("command", nargs="?", choices=["upgrade", "status"], default="upgrade")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    if args.command == "status":
+        for migration, applied_at in migration_status():
+            state = applied_at.isoformat(sep=" ", timespec="seconds") if applied_at else "pendiente"
+            print(f"{migration.name:<40} {state}")
+        return
+
+    applied = run_migrations()
+    print(f"Migraciones aplicadas: {len(applied)}" + (f" ({', '.join(map(str, applied))})" if applied else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from typing import List, Optional
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+# Operaciones reutilizables por las migraciones. Todas son idempotentes: una
+# migración interrumpida se puede volver a lanzar sin tocar lo ya aplicado.
+
+def is_postgres(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+def has_table(conn: Connection, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+def create_index(conn: Connection, name: str, table: str, columns: List[str], unique: bool = False,
+                 using: Optional[str] = None, where: Optional[str] = None) -> None:
+    """Crea el índice si no existe; en Postgres con CONCURRENTLY (requiere TRANSACTIONAL = False)"""
+    unique_sql = "UNIQUE " if unique else ""
+    columns_sql = ", ".join(columns)
+    using_sql = f"USING {using} " if using else ""
+    where_sql = f" WHERE {where}" if where else ""
+    if is_postgres(conn):
+        # Un CREATE INDEX CONCURRENTLY interrumpido deja el índice creado pero inválido
+        invalid = conn.execute(
+            text(
+                "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ),
+            {"name": name}
+        ).first()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(
+            f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {using_sql}({columns_sql}){where_sql}"
+        ))
+    else:
+        conn.execute(text(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({columns_sql}){where_sql}"))
+
+def drop_index(conn: Connection, name: str) -> None:
+    if is_postgres(conn):
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    else:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
@@ -0,0 +1,118 @@
+import importlib
+import logging
+import pkgutil
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.migrations import versions
+
+logger = logging.getLogger("market-backend.migrations")
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Clave del advisory lock de Postgres: dos despliegues a la vez no migran en paralelo
+_ADVISORY_LOCK_KEY = 48151623
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    description: str
+    # False para operaciones que no admiten transacción (CREATE INDEX CONCURRENTLY)
+    transactional: bool
+    upgrade: Callable[[Connection], None]
+
+
+def load_migrations() -> List[Migration]:
+    """Migraciones de app/migrations/versions ordenadas por versión (vNNNN_nombre.py)"""
+    migrations = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        if not info.name.startswith("v"):
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{info.name}")
+        migrations.append(Migration(
+            version=int(info.name[1:].split("_", 1)[0]),
+            name=info.name,
+            description=(module.__doc__ or info.name).strip().splitlines()[0],
+            transactional=getattr(module, "TRANSACTIONAL", True),
+            upgrade=module.upgrade,
+        ))
+    migrations.sort(key=lambda m: m.version)
+
+    numbers = [m.version for m in migrations]
+    if len(numbers) != len(set(numbers)):
+        raise RuntimeError(f"Versiones de migración duplicadas: {numbers}")
+    return migrations
+
+
+def _applied_versions(engine: Engine) -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(select(schema_migrations.c.version, schema_migrations.c.applied_at))
+        return {version: applied_at for version, applied_at in rows}
+
+
+def _apply(engine: Engine, migration: Migration) -> None:
+    record = insert(schema_migrations).values(
+        version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+    )
+    if migration.transactional:
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(record)
+        return
+
+    # Cada sentencia se confirma sola; si falla a medias, las operaciones
+    # idempotentes permiten relanzar la migración completa
+    with engine.connect() as conn:
+        migration.upgrade(conn.execution_options(isolation_level="AUTOCOMMIT"))
+    with engine.begin() as conn:
+        conn.execute(record)
+
+
+def run_migrations(engine: Optional[Engine] = None) -> List[int]:
+    """Aplica en orden las migraciones pendientes y devuelve sus versiones"""
+    if engine is None:
+        from app.database import engine
+    _metadata.create_all(engine)
+
+    # AUTOCOMMIT: el lock es de sesión y no debe dejar una transacción abierta
+    # que haga esperar a los CREATE INDEX CONCURRENTLY
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        postgres = engine.dialect.name == "postgresql"
+        if postgres:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        try:
+            applied = _applied_versions(engine)
+            done = []
+            for migration in load_migrations():
+                if migration.version in applied:
+                    continue
+                logger.info("Aplicando migración %s: %s", migration.name, migration.description)
+                _apply(engine, migration)
+                done.append(migration.version)
+            return done
+        finally:
+            if postgres:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+
+def migration_status(engine: Optional[Engine] = None) -> List[Tuple[Migration, Optional[datetime]]]:
+    """Cada migración conocida con su fecha de aplicación (None si está pendiente)"""
+    if engine is None:
+        from app.database import engine
+    _metadata.create_all(engine)
+    applied = _applied_versions(engine)
+    return [(m, applied.get(m.version)) for m in load_migrations()]
@@ -0,0 +1,99 @@
+"""Esquema inicial: las tablas que creaba init_db con create_all
+
+Definición congelada de ese esquema, independiente de los modelos actuales: los
+cambios posteriores llegan en sus propias migraciones. En bases existentes no hace
+nada (create_all comprueba antes de crear).
+"""
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text, func
+)
+from sqlalchemy.engine import Connection
+
+_metadata = MetaData()
+
+Table(
+    "users", _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("name", String, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("is_admin", Boolean),
+)
+
+Table(
+    "products", _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("description", Text, nullable=True),
+    Column("price", Float, nullable=False),
+    Column("stock", Integer),
+)
+
+Table(
+    "cart", _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("product_id", Integer, ForeignKey("products.id"), nullable=False),
+    Column("quantity", Integer),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True)),
+)
+
+Table(
+    "chat_messages", _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("message", Text, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "invoices", _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("invoice_number", String, unique=True, nullable=False),
+    Column("total_amount", Float, nullable=False),
+    Column("status", String),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "invoice_items", _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("invoice_id", Integer, ForeignKey("invoices.id"), nullable=False),
+    Column("product_id", Integer, ForeignKey("products.id"), nullable=False),
+    Column("product_name", String, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("unit_price", Float, nullable=False),
+    Column("total_price", Float, nullable=False),
+)
+
+Table(
+    "password_reset_tokens", _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("token_hash", String(64), unique=True, index=True, nullable=False),
+    Column("expires_at", DateTime, nullable=False, index=True),
+    Column("used_at", DateTime, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+Table(
+    "email_outbox", _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("recipient", String, nullable=False),
+    Column("subject", String, nullable=False),
+    Column("text_body", Text, nullable=False),
+    Column("html_body", Text, nullable=True),
+    Column("status", String, nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("last_error", Text, nullable=True),
+    Column("next_attempt_at", DateTime, nullable=False, server_default=func.now()),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("sent_at", DateTime, nullable=True),
+    Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    _metadata.create_all(conn)
@@ -0,0 +1,26 @@
+"""Índices para los filtros que usan los repositorios
+
+Sin transacción: en Postgres se crean con CONCURRENTLY y no bloquean escrituras.
+"""
+from sqlalchemy.engine import Connection
+
+from app.migrations.operations import create_index
+
+TRANSACTIONAL = False
+
+INDEXES = [
+    # Carrito del usuario y búsqueda de una línea concreta
+    ("ix_cart_user_id_product_id", "cart", ["user_id", "product_id"]),
+    # Facturas del usuario ordenadas por fecha
+    ("ix_invoices_user_id_created_at", "invoices", ["user_id", "created_at"]),
+    ("ix_invoices_status", "invoices", ["status"]),
+    # Carga de las líneas de cada factura
+    ("ix_invoice_items_invoice_id", "invoice_items", ["invoice_id"]),
+    # Últimos mensajes del chat
+    ("ix_chat_messages_created_at", "chat_messages", ["created_at"]),
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
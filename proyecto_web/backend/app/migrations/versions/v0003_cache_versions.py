@@ -0,0 +1,19 @@
+"""Tabla cache_versions para invalidar la caché del catálogo entre workers"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select
+from sqlalchemy.engine import Connection
+
+_metadata = MetaData()
+
+cache_versions = Table(
+    "cache_versions", _metadata,
+    Column("name", String, primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    cache_versions.create(conn, checkfirst=True)
+    exists = conn.execute(select(cache_versions.c.name).where(cache_versions.c.name == "catalog")).first()
+    if not exists:
+        conn.execute(insert(cache_versions).values(name="catalog", version=0))
@@ -0,0 +1,43 @@
+"""Búsqueda de texto completo en productos
+
+Postgres: índice GIN (CONCURRENTLY) sobre la expresión tsvector de nombre y descripción.
+SQLite: tabla FTS5 externa sincronizada con triggers, para ejecuciones locales.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migrations.operations import create_index, is_postgres
+
+TRANSACTIONAL = False
+
+# Copia fija de app.models.product.PRODUCT_SEARCH_DOCUMENT en esta versión: si el modelo
+# cambia la expresión, una migración nueva recrea el índice
+_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('spanish', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(description, '')), 'B')"
+)
+
+_SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, content='products', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    # Indexa las filas que ya existían
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    if is_postgres(conn):
+        create_index(conn, "ix_products_search", "products", [f"({_SEARCH_DOCUMENT})"], using="gin")
+    elif conn.dialect.name == "sqlite":
+        for statement in _SQLITE_FTS:
+            conn.execute(text(statement))
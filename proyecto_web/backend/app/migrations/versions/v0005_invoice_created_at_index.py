@@ -0,0 +1,13 @@
+"""Índice por fecha de factura para las exportaciones por rango de fechas
+
+Sin transacción: en Postgres se crea con CONCURRENTLY y no bloquea escrituras.
+"""
+from sqlalchemy.engine import Connection
+
+from app.migrations.operations import create_index
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn: Connection) -> None:
+    create_index(conn, "ix_invoices_created_at", "invoices", ["created_at"])
@@ -0,0 +1,24 @@
+"""Índices del catálogo filtrado y ordenado (precio, nombre, stock, prefijo de nombre)
+
+Sin transacción: en Postgres se crean con CONCURRENTLY y no bloquean escrituras.
+"""
+from sqlalchemy.engine import Connection
+
+from app.migrations.operations import create_index, is_postgres
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn: Connection) -> None:
+    # Orden por precio o nombre con keyset (clave, id), y rangos de precio
+    create_index(conn, "ix_products_price_id", "products", ["price", "id"])
+    create_index(conn, "ix_products_name_id", "products", ["name", "id"])
+    # "Con stock, ordenado por precio": índice parcial, solo las filas con stock
+    create_index(conn, "ix_products_in_stock_price_id", "products", ["price", "id"], where="stock > 0")
+    # Prefijo de nombre sin distinguir mayúsculas. En Postgres, LIKE 'abc%' solo usa
+    # un btree con text_pattern_ops (la collation por defecto no ordena byte a byte);
+    # SQLite lo resuelve como rango sobre lower(name)
+    if is_postgres(conn):
+        create_index(conn, "ix_products_name_prefix", "products", ["lower(name) text_pattern_ops"])
+    else:
+        create_index(conn, "ix_products_name_prefix", "products", ["lower(name)"])
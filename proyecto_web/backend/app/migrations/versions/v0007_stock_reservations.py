@@ -0,0 +1,27 @@
+"""Tabla stock_reservations: unidades apartadas por los carritos con caducidad"""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, Table, func
+from sqlalchemy.engine import Connection
+
+_metadata = MetaData()
+
+# Solo para resolver las claves foráneas; ya existen desde v0001
+Table("users", _metadata, Column("id", Integer, primary_key=True))
+Table("products", _metadata, Column("id", Integer, primary_key=True))
+
+stock_reservations = Table(
+    "stock_reservations", _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("product_id", Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_stock_reservations_user_id_product_id", "user_id", "product_id", unique=True),
+    Index("ix_stock_reservations_product_active", "product_id", "expires_at", "user_id", "quantity"),
+    Index("ix_stock_reservations_expires_at", "expires_at"),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    # Tabla nueva: sus índices se crean con ella, sin necesidad de CONCURRENTLY
+    stock_reservations.create(conn, checkfirst=True)
@@ -0,0 +1,17 @@
+"""Tabla token_revocations: revocaciones de tokens compartidas entre workers"""
+from sqlalchemy import Column, Integer, MetaData, String, Table
+from sqlalchemy.engine import Connection
+
+_metadata = MetaData()
+
+token_revocations = Table(
+    "token_revocations", _metadata,
+    Column("user_id", Integer, primary_key=True),
+    Column("email", String, nullable=False),
+    Column("version", String(12), nullable=True),
+    Column("not_before", Integer, nullable=False, index=True),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    token_revocations.create(conn, checkfirst=True)
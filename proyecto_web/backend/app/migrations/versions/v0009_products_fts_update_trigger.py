@@ -0,0 +1,20 @@
+"""Trigger FTS de SQLite solo ante cambios de nombre o descripción
+
+Las actualizaciones de stock o precio (cada factura y cada reserva) ya no reindexan el producto.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+_SQLITE_TRIGGER = [
+    "DROP TRIGGER IF EXISTS products_fts_au",
+    "CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    if conn.dialect.name == "sqlite":
+        for statement in _SQLITE_TRIGGER:
+            conn.execute(text(statement))
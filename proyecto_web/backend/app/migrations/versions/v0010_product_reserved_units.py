@@ -0,0 +1,16 @@
+"""Columna products.reserved: unidades reservadas por carritos, para el UPDATE condicional de la compra"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migrations.operations import has_column
+
+
+def upgrade(conn: Connection) -> None:
+    if not has_column(conn, "products", "reserved"):
+        conn.execute(text("ALTER TABLE products ADD COLUMN reserved INTEGER NOT NULL DEFAULT 0"))
+    # Las reservas que ya existían, vigentes o no (el barrido las descuenta al borrarlas)
+    conn.execute(text(
+        "UPDATE products SET reserved = ("
+        "SELECT coalesce(sum(quantity), 0) FROM stock_reservations r WHERE r.product_id = products.id"
+        ") WHERE id IN (SELECT product_id FROM stock_reservations)"
+    ))
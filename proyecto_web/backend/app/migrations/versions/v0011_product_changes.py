@@ -0,0 +1,15 @@
+"""Tabla product_changes: productos con el stock cambiado por una compra, por worker de la caché"""
+from sqlalchemy import Column, Integer, MetaData, Table
+from sqlalchemy.engine import Connection
+
+_metadata = MetaData()
+
+product_changes = Table(
+    "product_changes", _metadata,
+    Column("product_id", Integer, primary_key=True),
+    Column("changed_at", Integer, nullable=False, index=True),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    product_changes.create(conn, checkfirst=True)
@@ -0,0 +1,18 @@
+"""Versión product_names en cache_versions: el índice de sugerencias solo se reconstruye si cambian nombres"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select
+from sqlalchemy.engine import Connection
+
+_metadata = MetaData()
+
+cache_versions = Table(
+    "cache_versions", _metadata,
+    Column("name", String, primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    exists = conn.execute(select(cache_versions.c.name).where(cache_versions.c.name == "product_names")).first()
+    if not exists:
+        conn.execute(insert(cache_versions).values(name="product_names", version=0))
@@ -0,0 +1,13 @@
+"""Columna users.token_version: la versión de los tokens deja de cambiar al recalcular el hash
+
+Los usuarios existentes la dejan a NULL y siguen usando la derivada de su hash actual.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migrations.operations import has_column
+
+
+def upgrade(conn: Connection) -> None:
+    if not has_column(conn, "users", "token_version"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN token_version VARCHAR(12)"))
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    # Una fila por caché compartida (p. ej. "catalog"); cada escritura incrementa su versión
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
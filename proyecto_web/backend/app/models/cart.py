@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -15,4 +15,8 @@ class Cart(Base):
 
     # Relationships
     user = relationship("User", back_populates="cart_items")
-    product = relationship("Product") 
\ No newline at end of file
+    product = relationship("Product")
+
+    __table_args__ = (
+        Index("ix_cart_user_id_product_id", "user_id", "product_id"),
+    ) 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -10,18 +10,22 @@ class Invoice(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     invoice_number = Column(String, unique=True, nullable=False)
     total_amount = Column(Float, nullable=False)
-    status = Column(String, default="pending")  # pending, paid, cancelled
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    status = Column(String, default="pending", index=True)  # pending, paid, cancelled
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     # Relationships
     user = relationship("User", back_populates="invoices")
     items = relationship("InvoiceItem", back_populates="invoice")
 
+    __table_args__ = (
+        Index("ix_invoices_user_id_created_at", "user_id", "created_at"),
+    )
+
 class InvoiceItem(Base):
     __tablename__ = "invoice_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     product_name = Column(String, nullable=False)
     quantity = Column(Integer, nullable=False)
@@ -1,6 +1,18 @@
-from sqlalchemy import Column, Integer, String, Float, Text
+from sqlalchemy import Column, Integer, String, Float, Text, Index, text
 from app.database import Base
 
+# Documento de búsqueda de texto completo en Postgres. El índice GIN ix_products_search
+# se crea sobre esta misma expresión: las consultas deben usarla tal cual para aprovecharlo
+SEARCH_LANGUAGE = "spanish"
+PRODUCT_SEARCH_DOCUMENT = (
+    f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(description, '')), 'B')"
+)
+
+# Condición de los índices parciales de productos con stock: las consultas deben
+# escribirla literalmente (no como parámetro) para que el planificador los use
+IN_STOCK = "stock > 0"
+
 class Product(Base):
     __tablename__ = "products"
 
@@ -8,4 +20,17 @@ class Product(Base):
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     price = Column(Float, nullable=False)
-    stock = Column(Integer, default=0) 
\ No newline at end of file
+    stock = Column(Integer, default=0)
+    # Suma de las reservas de carrito del producto (vigentes o aún sin barrer). La
+    # mantiene ReservationRepository en la misma transacción que cada reserva: así un
+    # único UPDATE condicional sobre la fila ve también las reservas de otros carritos
+    reserved = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+    # Orden y keyset del catálogo filtrado (ver ProductRepository.page_query). El
+    # índice de prefijo de nombre es de expresión y solo se crea en la migración v0006
+    __table_args__ = (
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_in_stock_price_id", "price", "id",
+              postgresql_where=text(IN_STOCK), sqlite_where=text(IN_STOCK)),
+    ) 
\ No newline at end of file
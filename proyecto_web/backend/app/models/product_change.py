@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer
+from app.database import Base
+
+class ProductChange(Base):
+    __tablename__ = "product_changes"
+
+    # Último cambio de stock de cada producto por una compra, para que cada worker
+    # quite de su caché solo las respuestas con ese producto. Sin clave foránea: un
+    # producto borrado ya invalida el catálogo entero
+    product_id = Column(Integer, primary_key=True)
+    # Instante (epoch) del cambio
+    changed_at = Column(Integer, nullable=False, index=True)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+
+    # Unidades apartadas por una línea del carrito hasta expires_at. Una reserva
+    # caducada ya no cuenta aunque el barrido aún no la haya borrado
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Una reserva por línea de carrito (destino del upsert al añadir)
+        Index("ix_stock_reservations_user_id_product_id", "user_id", "product_id", unique=True),
+        # Unidades reservadas y vigentes por producto leyendo solo el índice
+        Index("ix_stock_reservations_product_active", "product_id", "expires_at", "user_id", "quantity"),
+        # Barrido de reservas caducadas
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+class TokenRevocation(Base):
+    __tablename__ = "token_revocations"
+
+    # Última revocación de los tokens de cada usuario, compartida por todos los workers.
+    # Sin clave foránea: el borrado de un usuario también se registra aquí
+    user_id = Column(Integer, primary_key=True)
+    email = Column(String, nullable=False)
+    # Versión ("ver") que siguen aceptando los tokens nuevos; None = ninguna
+    version = Column(String(12), nullable=True)
+    # Instante (epoch) desde el que vuelven a valer los tokens ("iat")
+    not_before = Column(Integer, nullable=False, index=True)
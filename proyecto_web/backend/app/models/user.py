@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -9,9 +9,10 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # Versión ("ver") de los tokens válidos: cambia con la contraseña, no con un rehash del
+    # mismo password. None = la derivada del hash (usuarios anteriores a la columna)
+    token_version = Column(String(12), nullable=True)
     is_admin = Column(Boolean, default=False)
-    reset_token = Column(String, nullable=True)
-    reset_token_expires = Column(DateTime, nullable=True)
     
     # Relationships
     cart_items = relationship("Cart", back_populates="user")
@@ -0,0 +1,26 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from app.models.cache_version import CacheVersion
+
+class CacheVersionRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, name: str) -> int:
+        version = await self.db.scalar(select(CacheVersion.version).filter(CacheVersion.name == name))
+        return version or 0
+
+    async def bump(self, name: str) -> int:
+        """Incrementa la versión de forma atómica y devuelve la nueva"""
+        result = await self.db.execute(
+            update(CacheVersion)
+            .where(CacheVersion.name == name)
+            .values(version=CacheVersion.version + 1)
+            .returning(CacheVersion.version)
+        )
+        version = result.scalar_one_or_none()
+        if version is None:
+            version = 1
+            self.db.add(CacheVersion(name=name, version=version))
+        await self.db.commit()
+        return version
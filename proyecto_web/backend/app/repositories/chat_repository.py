@@ -1,24 +1,53 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select
 from app.models.chat import ChatMessage
+from app.models.user import User
+from app.utils.fast_json import rows_as_dicts
 from app.schemas.chat import ChatMessageCreate
-from typing import List
+from typing import List, Optional
 
 class ChatRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_messages(self, limit: int = 50) -> List[ChatMessage]:
-        return self.db.query(ChatMessage).order_by(ChatMessage.created_at.desc()).limit(limit).all()
+    async def get_messages(self, limit: int = 50) -> List[ChatMessage]:
+        result = await self.db.execute(
+            select(ChatMessage)
+            .options(joinedload(ChatMessage.user))
+            .order_by(ChatMessage.created_at.desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def get_message_rows(self, limit: int = 50) -> List[dict]:
+        """Últimos mensajes como diccionarios, en el orden de campos del esquema ChatMessage"""
+        result = await self.db.execute(
+            select(
+                ChatMessage.message, ChatMessage.id, ChatMessage.user_id,
+                User.name.label("user_name"), ChatMessage.created_at
+            )
+            .join(User, User.id == ChatMessage.user_id)
+            .order_by(ChatMessage.created_at.desc())
+            .limit(limit)
+        )
+        return rows_as_dicts(result.mappings())
 
-    def create_message(self, user_id: int, message: ChatMessageCreate) -> ChatMessage:
+    async def create_message(self, user_id: int, message: ChatMessageCreate) -> ChatMessage:
         db_message = ChatMessage(
             user_id=user_id,
             message=message.message
         )
         self.db.add(db_message)
-        self.db.commit()
-        self.db.refresh(db_message)
-        return db_message
+        await self.db.commit()
+        # Recargar con el usuario (y created_at, generado por la BD) en una sola consulta
+        return await self.get_message_with_user(db_message.id)
 
-    def get_message_with_user(self, message_id: int):
-        return self.db.query(ChatMessage).filter(ChatMessage.id == message_id).first() 
\ No newline at end of file
+    async def get_message_with_user(self, message_id: int) -> Optional[ChatMessage]:
+        result = await self.db.execute(
+            select(ChatMessage)
+            .options(joinedload(ChatMessage.user))
+            .filter(ChatMessage.id == message_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
@@ -0,0 +1,108 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, and_, or_
+from app.models.email_outbox import EmailOutbox
+from typing import List, Optional
+from datetime import datetime, timedelta
+
+# Los cuerpos llevan enlaces con tokens de un solo uso: se vacían en cuanto el
+# mensaje deja de necesitarlos (enviado o fallido definitivamente)
+_CLEARED_BODIES = {"text_body": "", "html_body": None}
+
+class EmailOutboxRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def enqueue(self, recipient: str, subject: str, text_body: str, html_body: Optional[str] = None) -> EmailOutbox:
+        """Añade el mensaje a la transacción en curso, junto a lo que lo origina. No hace commit"""
+        message = EmailOutbox(
+            recipient=recipient,
+            subject=subject,
+            text_body=text_body,
+            html_body=html_body,
+            next_attempt_at=datetime.utcnow()
+        )
+        self.db.add(message)
+        await self.db.flush()
+        return message
+
+    async def claim_batch(self, limit: int, lease: timedelta, max_attempts: int) -> List[EmailOutbox]:
+        """Reserva hasta `limit` mensajes durante `lease`; un lease vencido cuenta como intento"""
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            select(EmailOutbox)
+            .filter(
+                EmailOutbox.status.in_(("pending", "sending")),
+                EmailOutbox.next_attempt_at <= now
+            )
+            .order_by(EmailOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = []
+        for message in result.scalars():
+            if message.status == "sending":
+                message.attempts += 1
+                if message.attempts >= max_attempts:
+                    message.status = "failed"
+                    message.last_error = "Lease vencido sin confirmar el envío"
+                    for field, value in _CLEARED_BODIES.items():
+                        setattr(message, field, value)
+                    continue
+            message.status = "sending"
+            message.next_attempt_at = now + lease
+            claimed.append(message)
+        await self.db.commit()
+        return claimed
+
+    async def mark_sent(self, message_ids: List[int]) -> None:
+        if not message_ids:
+            return
+        await self.db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(message_ids))
+            .values(status="sent", sent_at=datetime.utcnow(), last_error=None, **_CLEARED_BODIES)
+        )
+        await self.db.commit()
+
+    async def release(self, message_ids: List[int], retry_in: timedelta) -> None:
+        """Devuelve a la cola mensajes reservados que no se llegaron a intentar (no cuenta como intento)"""
+        if not message_ids:
+            return
+        await self.db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(message_ids), EmailOutbox.status == "sending")
+            .values(status="pending", next_attempt_at=datetime.utcnow() + retry_in)
+        )
+        await self.db.commit()
+
+    async def mark_failed(self, message_id: int, error: str, retry_in: Optional[timedelta]) -> None:
+        """Programa un reintento, o marca el mensaje como fallido si retry_in es None"""
+        values = {
+            "attempts": EmailOutbox.attempts + 1,
+            "last_error": error[:1000],
+        }
+        if retry_in is None:
+            values["status"] = "failed"
+            values.update(_CLEARED_BODIES)
+        else:
+            values["status"] = "pending"
+            values["next_attempt_at"] = datetime.utcnow() + retry_in
+        await self.db.execute(update(EmailOutbox).where(EmailOutbox.id == message_id).values(**values))
+        await self.db.commit()
+
+    async def delete_finished(self, older_than: timedelta) -> int:
+        """Borra los mensajes enviados o fallidos hace más de `older_than`"""
+        cutoff = datetime.utcnow() - older_than
+        result = await self.db.execute(
+            delete(EmailOutbox).where(or_(
+                and_(EmailOutbox.status == "sent", EmailOutbox.sent_at < cutoff),
+                and_(EmailOutbox.status == "failed", EmailOutbox.next_attempt_at < cutoff)
+            ))
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def count_pending(self) -> int:
+        return await self.db.scalar(
+            select(func.count()).select_from(EmailOutbox).filter(EmailOutbox.status.in_(("pending", "sending")))
+        )
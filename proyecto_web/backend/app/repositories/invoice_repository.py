@@ -1,24 +1,46 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, insert
+from sqlalchemy.engine import RowMapping
 from app.models.invoice import Invoice, InvoiceItem
 from app.models.product import Product
-from app.schemas.invoice import InvoiceCreate
-from typing import List, Optional
+from app.schemas.invoice import InvoiceCreate, Invoice as InvoiceSchema, InvoiceItem as InvoiceItemSchema
+from app.utils.fast_json import schema_columns, rows_as_dicts
+from typing import AsyncIterator, List, Optional
+from datetime import datetime
 import uuid
 
 class InvoiceRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_user_invoices(self, user_id: int) -> List[Invoice]:
-        return self.db.query(Invoice).filter(Invoice.user_id == user_id).order_by(Invoice.created_at.desc()).all()
+    async def get_user_invoices(self, user_id: int) -> List[Invoice]:
+        result = await self.db.execute(
+            select(Invoice)
+            .options(selectinload(Invoice.items))
+            .filter(Invoice.user_id == user_id)
+            .order_by(Invoice.created_at.desc())
+        )
+        return list(result.scalars().all())
 
-    def get_invoice_by_id(self, invoice_id: int) -> Optional[Invoice]:
-        return self.db.query(Invoice).filter(Invoice.id == invoice_id).first()
+    async def get_invoice_by_id(self, invoice_id: int) -> Optional[Invoice]:
+        result = await self.db.execute(
+            select(Invoice)
+            .options(selectinload(Invoice.items))
+            .filter(Invoice.id == invoice_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
 
-    def create_invoice(self, user_id: int, invoice_data: InvoiceCreate) -> Invoice:
+    async def create_invoice(self, user_id: int, invoice_data: InvoiceCreate) -> Invoice:
         # Generate unique invoice number
         invoice_number = f"INV-{uuid.uuid4().hex[:8].upper()}"
-        
+
+        # Todos los productos de la factura en una sola consulta
+        product_ids = {item.product_id for item in invoice_data.items}
+        result = await self.db.execute(select(Product).filter(Product.id.in_(product_ids)))
+        products = {product.id: product for product in result.scalars()}
+
         # Create invoice
         db_invoice = Invoice(
             user_id=user_id,
@@ -26,31 +48,75 @@ class InvoiceRepository:
             total_amount=invoice_data.total_amount
         )
         self.db.add(db_invoice)
-        self.db.flush()  # Get the invoice ID
+        await self.db.flush()  # Get the invoice ID
 
         # Create invoice items
+        rows = []
         for item_data in invoice_data.items:
-            product = self.db.query(Product).filter(Product.id == item_data.product_id).first()
+            product = products.get(item_data.product_id)
             if not product:
                 raise ValueError(f"Producto con ID {item_data.product_id} no encontrado")
-            
-            db_invoice_item = InvoiceItem(
+
+            rows.append(dict(
                 invoice_id=db_invoice.id,
                 product_id=item_data.product_id,
                 product_name=product.name,
                 quantity=item_data.quantity,
                 unit_price=item_data.unit_price,
                 total_price=item_data.quantity * item_data.unit_price
+            ))
+
+        # Un único INSERT executemany: sin RETURNING por línea (los ids se leen al recargar)
+        await self.db.execute(insert(InvoiceItem), rows)
+        await self.db.commit()
+        return await self.get_invoice_by_id(db_invoice.id)
+
+    async def get_all_invoices(self) -> List[Invoice]:
+        result = await self.db.execute(
+            select(Invoice).options(selectinload(Invoice.items)).order_by(Invoice.created_at.desc())
+        )
+        return list(result.scalars().all())
+
+    async def stream_with_items(self, start: datetime, end: datetime, batch_size: int) -> AsyncIterator[RowMapping]:
+        """Una fila por línea de factura creada en [start, end), seguidas por factura (sin líneas: campos a None)"""
+        result = await self.db.stream(
+            select(
+                Invoice.id.label("invoice_id"), Invoice.invoice_number, Invoice.user_id,
+                Invoice.status, Invoice.total_amount, Invoice.created_at,
+                InvoiceItem.id.label("item_id"), InvoiceItem.product_id, InvoiceItem.product_name,
+                InvoiceItem.quantity, InvoiceItem.unit_price, InvoiceItem.total_price
             )
-            self.db.add(db_invoice_item)
+            .outerjoin(InvoiceItem, InvoiceItem.invoice_id == Invoice.id)
+            .filter(Invoice.created_at >= start, Invoice.created_at < end)
+            .order_by(Invoice.created_at, Invoice.id, InvoiceItem.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for row in result.mappings():
+            yield row
 
-        self.db.commit()
-        self.db.refresh(db_invoice)
-        return db_invoice
+    async def get_all_invoice_rows(self) -> List[dict]:
+        """Todas las facturas con sus líneas como diccionarios (sin ORM), en dos consultas"""
+        result = await self.db.execute(
+            select(*schema_columns(InvoiceSchema, Invoice, exclude=("items",)))
+            .order_by(Invoice.created_at.desc())
+        )
+        invoices = rows_as_dicts(result.mappings())
+        by_id = {}
+        for invoice in invoices:
+            invoice["items"] = []
+            by_id[invoice["id"]] = invoice
+        if invoices:
+            items = await self.db.execute(
+                select(InvoiceItem.invoice_id, *schema_columns(InvoiceItemSchema, InvoiceItem))
+                .order_by(InvoiceItem.invoice_id, InvoiceItem.id)
+            )
+            for item in rows_as_dicts(items.mappings()):
+                by_id[item.pop("invoice_id")]["items"].append(item)
+        return invoices
 
-    def get_all_invoices(self) -> List[Invoice]:
-        return self.db.query(Invoice).order_by(Invoice.created_at.desc()).all()
+    async def get_total_invoices(self) -> int:
+        return await self.db.scalar(select(func.count()).select_from(Invoice))
 
-    def get_total_sales(self) -> float:
-        result = self.db.query(Invoice.total_amount).filter(Invoice.status == "paid").all()
-        return sum(row[0] for row in result) if result else 0.0 
\ No newline at end of file
+    async def get_total_sales(self) -> float:
+        total = await self.db.scalar(select(func.sum(Invoice.total_amount)).filter(Invoice.status == "paid"))
+        return float(total or 0.0)
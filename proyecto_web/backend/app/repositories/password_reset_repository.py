@@ -0,0 +1,55 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update, delete, or_
+from app.models.password_reset import PasswordResetToken
+from typing import Optional
+from datetime import datetime, timedelta
+import hashlib
+
+def hash_reset_token(reset_token: str) -> str:
+    return hashlib.sha256(reset_token.encode()).hexdigest()
+
+class PasswordResetRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_token(self, user_id: int, reset_token: str, expires_in: timedelta) -> None:
+        """Guarda el hash del token; los tokens anteriores sin usar del usuario dejan de valer. No hace commit"""
+        await self.db.execute(
+            delete(PasswordResetToken).where(
+                PasswordResetToken.user_id == user_id,
+                PasswordResetToken.used_at.is_(None)
+            )
+        )
+        self.db.add(PasswordResetToken(
+            user_id=user_id,
+            token_hash=hash_reset_token(reset_token),
+            expires_at=datetime.utcnow() + expires_in
+        ))
+
+    async def redeem(self, reset_token: str) -> Optional[int]:
+        """Consume el token con un único UPDATE condicional y devuelve el id del usuario. No hace commit"""
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            update(PasswordResetToken)
+            .where(
+                PasswordResetToken.token_hash == hash_reset_token(reset_token),
+                PasswordResetToken.used_at.is_(None),
+                PasswordResetToken.expires_at > now
+            )
+            .values(used_at=now)
+            .returning(PasswordResetToken.user_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def delete_expired(self) -> int:
+        """Elimina los tokens caducados o ya usados"""
+        result = await self.db.execute(
+            delete(PasswordResetToken).where(
+                or_(
+                    PasswordResetToken.expires_at <= datetime.utcnow(),
+                    PasswordResetToken.used_at.isnot(None)
+                )
+            )
+        )
+        await self.db.commit()
+        return result.rowcount
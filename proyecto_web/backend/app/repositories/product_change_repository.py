@@ -0,0 +1,33 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.product_change import ProductChange
+from typing import Iterable, List
+
+class ProductChangeRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record(self, product_ids: Iterable[int], changed_at: int) -> None:
+        """Registra el cambio de stock de los productos. No hace commit"""
+        # La compra ya tiene bloqueadas las filas de esos productos: la fila de cada
+        # uno aquí no añade esperas entre compras
+        dialect = postgresql if self.db.bind.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(ProductChange)
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ProductChange.product_id],
+                set_={"changed_at": stmt.excluded.changed_at}
+            ),
+            [{"product_id": product_id, "changed_at": changed_at} for product_id in sorted(product_ids)]
+        )
+
+    async def changed_since(self, since: int) -> List[int]:
+        result = await self.db.execute(select(ProductChange.product_id).filter(ProductChange.changed_at >= since))
+        return list(result.scalars().all())
+
+    async def delete_before(self, horizon: int) -> int:
+        """Elimina los cambios que ya no afectan a ninguna entrada de caché vigente"""
+        result = await self.db.execute(delete(ProductChange).where(ProductChange.changed_at < horizon))
+        await self.db.commit()
+        return result.rowcount
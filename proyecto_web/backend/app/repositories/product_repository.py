@@ -1,42 +1,285 @@
-from sqlalchemy.orm import Session
-from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, text, insert, update, case, tuple_, bindparam, literal, literal_column, null, or_
+from sqlalchemy.sql import Select
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.product import Product, PRODUCT_SEARCH_DOCUMENT, SEARCH_LANGUAGE, IN_STOCK
+from app.schemas.product import ProductCreate, ProductUpdate, ProductFilters, Product as ProductSchema
+from app.utils.fast_json import schema_columns, rows_as_dicts
+from app.utils.suggest_index import product_names
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import re
+
+# Marcadores de coincidencia en los fragmentos; el servicio los convierte en <mark>
+# después de escapar el texto
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+# Postgres: se ordenan y paginan solo las coincidencias del índice GIN, y los
+# fragmentos (ts_headline, costoso) se calculan únicamente para la página devuelta
+_PG_SEARCH = """
+SELECT p.id, p.name, p.description, p.price, p.stock, page.rank,
+       ts_headline('{lang}', p.name, page.query, :name_options) AS name_highlight,
+       ts_headline('{lang}', coalesce(p.description, ''), page.query, :snippet_options) AS snippet
+FROM (
+    SELECT id, rank, query FROM (
+        SELECT id, ts_rank_cd({document}, query)::float8 AS rank, query
+        FROM products, websearch_to_tsquery('{lang}', :q) AS query
+        WHERE {document} @@ query
+    ) ranked
+    {after}
+    ORDER BY rank DESC, id
+    LIMIT :limit
+) page
+JOIN products p ON p.id = page.id
+ORDER BY page.rank DESC, page.id
+"""
+
+# SQLite (FTS5): bm25 es menor cuanto más relevante, se invierte para ordenar igual que en Postgres
+_SQLITE_SEARCH = """
+SELECT p.id, p.name, p.description, p.price, p.stock, m.rank, m.name_highlight, m.snippet
+FROM (
+    SELECT rowid AS id, -bm25(products_fts, 10.0, 1.0) AS rank,
+           highlight(products_fts, 0, :start, :stop) AS name_highlight,
+           snippet(products_fts, 1, :start, :stop, '…', 16) AS snippet
+    FROM products_fts WHERE products_fts MATCH :q
+) m
+JOIN products p ON p.id = m.id
+{after}
+ORDER BY m.rank DESC, m.id
+LIMIT :limit
+"""
+
+_AFTER = "WHERE {rank} < :after_rank OR ({rank} = :after_rank AND {id} > :after_id)"
+
+def _fts5_query(q: str) -> str:
+    # Cada palabra como término literal con prefijo: la entrada del usuario nunca
+    # se interpreta como sintaxis de FTS5
+    return " ".join(f'"{token}"*' for token in re.findall(r"\w+", q))
+
+# Ordenaciones del catálogo: columna y, salvo para id, desempate por id. Un "-"
+# delante invierte el orden
+SORT_COLUMNS = {"id": Product.id, "price": Product.price, "name": Product.name}
+
+def sort_keys(sort: str) -> tuple:
+    column = SORT_COLUMNS[sort.lstrip("-")]
+    return (column,) if column is Product.id else (column, Product.id)
+
+def _name_prefix_clause(dialect: str, prefix: str):
+    prefix = prefix.lower()
+    if dialect == "postgresql":
+        # Patrón en línea (literal_execute): con un parámetro, un plan genérico no
+        # podría usar el índice text_pattern_ops
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return func.lower(Product.name).like(bindparam("name_pattern", pattern, literal_execute=True), escape="\\")
+    # SQLite compara byte a byte: el prefijo es un rango sobre el índice de lower(name)
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (func.lower(Product.name) >= prefix) & (func.lower(Product.name) < upper)
+
+def page_query(dialect: str, limit: Optional[int], after: Optional[Sequence[Any]] = None,
+               filters: Optional[ProductFilters] = None, sort: str = "id") -> Select:
+    """Página del catálogo filtrada y ordenada por `sort`, con keyset `after` (valores de sort_keys)"""
+    keys = sort_keys(sort)
+    descending = sort.startswith("-")
+    query = select(Product).order_by(*(key.desc() if descending else key for key in keys)).limit(limit)
+    if after is not None:
+        position = tuple_(*keys) if len(keys) > 1 else keys[0]
+        values = tuple(after) if len(keys) > 1 else after[0]
+        query = query.filter(position < values if descending else position > values)
+    if filters is not None:
+        if filters.min_price is not None:
+            query = query.filter(Product.price >= filters.min_price)
+        if filters.max_price is not None:
+            query = query.filter(Product.price <= filters.max_price)
+        if filters.in_stock:
+            query = query.filter(literal_column(IN_STOCK))
+        if filters.name_prefix:
+            query = query.filter(_name_prefix_clause(dialect, filters.name_prefix))
+    return query
 
 class ProductRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_all(self) -> List[Product]:
-        return self.db.query(Product).all()
+    async def get_all(self) -> List[Product]:
+        result = await self.db.execute(select(Product))
+        return list(result.scalars().all())
+
+    async def get_names(self) -> List[Tuple[int, str]]:
+        result = await self.db.execute(select(Product.id, Product.name))
+        return [tuple(row) for row in result.all()]
+
+    async def stream_rows(self, batch_size: int) -> AsyncIterator[RowMapping]:
+        """Todos los productos por id con un cursor de servidor: memoria constante"""
+        result = await self.db.stream(
+            select(Product.id, Product.name, Product.description, Product.price, Product.stock)
+            .order_by(Product.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for row in result.mappings():
+            yield row
+
+    async def get_page(self, limit: Optional[int], after: Optional[Sequence[Any]] = None,
+                       filters: Optional[ProductFilters] = None, sort: str = "id") -> List[Product]:
+        """Hasta `limit` productos (todos si es None) que cumplen `filters`, en orden `sort`, tras el keyset `after`"""
+        result = await self.db.execute(page_query(self.db.bind.dialect.name, limit, after, filters, sort))
+        return list(result.scalars().all())
 
-    def get_by_id(self, product_id: int) -> Optional[Product]:
-        return self.db.query(Product).filter(Product.id == product_id).first()
+    async def get_page_rows(self, limit: Optional[int], after: Optional[Sequence[Any]] = None,
+                            filters: Optional[ProductFilters] = None, sort: str = "id") -> List[dict]:
+        """Como get_page, pero como diccionarios de columnas listos para serializar (sin ORM)"""
+        query = page_query(self.db.bind.dialect.name, limit, after, filters, sort)
+        result = await self.db.execute(query.with_only_columns(*schema_columns(ProductSchema, Product)))
+        return rows_as_dicts(result.mappings())
 
-    def create(self, product: ProductCreate) -> Product:
-        db_product = Product(**product.dict())
+    async def count(self, filters: Optional[ProductFilters] = None) -> int:
+        query = page_query(self.db.bind.dialect.name, None, filters=filters).order_by(None)
+        return await self.db.scalar(select(func.count()).select_from(query.subquery()))
+
+    async def search(self, q: str, limit: int, after: Optional[Tuple[float, int]] = None) -> list:
+        """Coincidencias de texto completo por relevancia (rank desc, id) con keyset `after`"""
+        params = {"limit": limit}
+        if after is not None:
+            params["after_rank"], params["after_id"] = after
+
+        dialect = self.db.bind.dialect.name
+        if dialect == "postgresql":
+            sql = _PG_SEARCH.format(
+                lang=SEARCH_LANGUAGE,
+                document=PRODUCT_SEARCH_DOCUMENT,
+                after=_AFTER.format(rank="rank", id="id") if after is not None else ""
+            )
+            params.update(
+                q=q,
+                name_options=f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, HighlightAll=true",
+                snippet_options=f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=24, MinWords=8, MaxFragments=2",
+            )
+        elif dialect == "sqlite":
+            match = _fts5_query(q)
+            if not match:
+                return []
+            sql = _SQLITE_SEARCH.format(after=_AFTER.format(rank="m.rank", id="m.id") if after is not None else "")
+            params.update(q=match, start=HIGHLIGHT_START, stop=HIGHLIGHT_STOP)
+        else:
+            return await self.search_like(q, limit, after)
+
+        result = await self.db.execute(text(sql), params)
+        return list(result.mappings().all())
+
+    async def search_like(self, q: str, limit: int, after: Optional[Tuple[float, int]] = None) -> list:
+        """Búsqueda sin índice de texto (otros motores): cada palabra en nombre o descripción, por id y sin resaltar"""
+        words = re.findall(r"\w+", q)
+        if not words:
+            return []
+        conditions = []
+        for word in words:
+            pattern = "%" + word.replace("_", "\\_") + "%"
+            conditions.append(or_(
+                Product.name.ilike(pattern, escape="\\"),
+                Product.description.ilike(pattern, escape="\\")
+            ))
+        if after is not None:
+            # Todas las filas tienen rank 0: el cursor avanza solo por id
+            conditions.append(Product.id > after[1])
+        query = (
+            select(
+                Product.id, Product.name, Product.description, Product.price, Product.stock,
+                literal(0.0).label("rank"), null().label("name_highlight"), null().label("snippet")
+            )
+            .filter(*conditions)
+            .order_by(Product.id)
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+        return list(result.mappings().all())
+
+    async def get_by_id(self, product_id: int) -> Optional[Product]:
+        return await self.db.get(Product, product_id)
+
+    async def get_by_ids(self, product_ids: Sequence[int]) -> List[Product]:
+        """Productos existentes entre `product_ids`, en una sola consulta (sin orden definido)"""
+        result = await self.db.execute(select(Product).filter(Product.id.in_(product_ids)))
+        return list(result.scalars().all())
+
+    async def create(self, product: ProductCreate) -> Product:
+        db_product = Product(**product.model_dump())
         self.db.add(db_product)
-        self.db.commit()
-        self.db.refresh(db_product)
+        await self.db.commit()
+        await self.db.refresh(db_product)
+        product_names.add(db_product.id, db_product.name)
         return db_product
 
-    def update(self, product_id: int, product: ProductUpdate) -> Optional[Product]:
-        db_product = self.get_by_id(product_id)
+    async def update(self, product_id: int, product: ProductUpdate) -> Optional[Product]:
+        db_product = await self.get_by_id(product_id)
         if db_product:
-            update_data = product.dict(exclude_unset=True)
+            update_data = product.model_dump(exclude_unset=True)
             for field, value in update_data.items():
                 setattr(db_product, field, value)
-            self.db.commit()
-            self.db.refresh(db_product)
+            await self.db.commit()
+            await self.db.refresh(db_product)
+            product_names.add(db_product.id, db_product.name)
         return db_product
 
-    def delete(self, product_id: int) -> bool:
-        db_product = self.get_by_id(product_id)
+    async def delete(self, product_id: int) -> bool:
+        db_product = await self.get_by_id(product_id)
         if db_product:
-            self.db.delete(db_product)
-            self.db.commit()
+            await self.db.delete(db_product)
+            await self.db.commit()
+            product_names.remove(product_id)
             return True
         return False
 
-    def get_total_products(self) -> int:
-        return self.db.query(Product).count() 
\ No newline at end of file
+    async def upsert_many(self, rows: List[dict]) -> Tuple[int, int, List[Tuple[int, str]]]:
+        """Inserta o actualiza (filas con `id`) un lote; devuelve (insertados, actualizados, [(id, nombre)]). No hace commit"""
+        # Una fila con id solo actualiza las columnas que trae; las demás conservan su valor
+        with_id = [row for row in rows if row.get("id") is not None]
+        new = [{k: v for k, v in row.items() if k != "id"} for row in rows if row.get("id") is None]
+
+        updated = 0
+        names = [(row["id"], row["name"]) for row in with_id]
+        if with_id:
+            ids = [row["id"] for row in with_id]
+            updated = await self.db.scalar(select(func.count()).select_from(Product).filter(Product.id.in_(ids)))
+            dialect = postgresql if self.db.bind.dialect.name == "postgresql" else sqlite
+            # executemany necesita las mismas columnas en cada fila: una sentencia por combinación
+            by_columns: Dict[Tuple[str, ...], List[dict]] = {}
+            for row in with_id:
+                by_columns.setdefault(tuple(sorted(column for column in row if column != "id")), []).append(row)
+            for columns, group in by_columns.items():
+                stmt = dialect.insert(Product)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Product.id],
+                    set_={column: stmt.excluded[column] for column in columns}
+                )
+                await self.db.execute(stmt, group)
+            await self.sync_id_sequence()
+        if new:
+            result = await self.db.execute(insert(Product).returning(Product.id, Product.name), new)
+            names.extend(result.tuples())
+        return len(rows) - updated, updated, names
+
+    async def sync_id_sequence(self) -> None:
+        """Tras insertar ids explícitos, la secuencia de Postgres debe continuar por encima"""
+        if self.db.bind.dialect.name == "postgresql":
+            await self.db.execute(text(
+                "SELECT setval(pg_get_serial_sequence('products', 'id'), coalesce(max(id), 1)) FROM products"
+            ))
+
+    async def decrement_stock(self, quantities: Dict[int, int]) -> List[Tuple[int, int]]:
+        """Descuenta `quantities` (id -> unidades) si no invaden reservas; devuelve (id, stock restante). No hace commit"""
+        # Sin SELECT ... FOR UPDATE previo: el propio UPDATE bloquea cada fila. Si otra
+        # compra o reserva la tenía, Postgres espera y revalúa el WHERE con la fila ya
+        # confirmada, y `reserved` está en esa fila, así que cuenta las reservas nuevas.
+        # Las del comprador se liberan antes en la misma transacción (release_all)
+        units = case(quantities, value=Product.id)
+        result = await self.db.execute(
+            update(Product)
+            .where(Product.id.in_(quantities), Product.stock - Product.reserved >= units)
+            .values(stock=Product.stock - units)
+            .returning(Product.id, Product.stock)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.tuples())
+
+    async def get_total_products(self) -> int:
+        return await self.db.scalar(select(func.count()).select_from(Product))
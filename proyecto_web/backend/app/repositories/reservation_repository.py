@@ -0,0 +1,124 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, insert, func, case, and_, or_
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+from typing import Dict, Optional, Sequence
+from datetime import datetime, timedelta
+
+
+def reserved_units(product_id, now: datetime, exclude_user_id: Optional[int] = None):
+    """Unidades reservadas y vigentes de `product_id` sin contar las de `exclude_user_id` (subconsulta escalar)"""
+    # Solo para mostrar disponibilidad: se resuelve con ix_stock_reservations_product_active
+    # sin leer la tabla ni los carritos, pero usa la instantánea de la sentencia que la
+    # contiene. En Postgres (READ COMMITTED), un UPDATE que espera por la fila del producto
+    # y revalúa su WHERE no vuelve a ejecutarla con las reservas confirmadas mientras
+    # esperaba: las comprobaciones de reservar y comprar usan products.reserved, que está
+    # en la propia fila bloqueada
+    query = select(func.coalesce(func.sum(StockReservation.quantity), 0)).where(
+        StockReservation.product_id == product_id,
+        StockReservation.expires_at > now
+    )
+    if exclude_user_id is not None:
+        query = query.where(StockReservation.user_id != exclude_user_id)
+    return query.scalar_subquery()
+
+
+class ReservationRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_availability(self, product_ids: Sequence[int], user_id: Optional[int] = None) -> Dict[int, dict]:
+        """Stock, unidades reservadas (sin contar las de `user_id`) y disponibles para vender, por producto"""
+        reserved = reserved_units(Product.id, datetime.utcnow(), user_id).label("reserved")
+        result = await self.db.execute(
+            select(Product.id, Product.stock, reserved).filter(Product.id.in_(product_ids))
+        )
+        return {
+            row.id: {"product_id": row.id, "stock": row.stock, "reserved": row.reserved,
+                     "available": max(row.stock - row.reserved, 0)}
+            for row in result
+        }
+
+    async def reserve(self, user_id: int, product_id: int, quantity: int, ttl: timedelta) -> Optional[int]:
+        """Aparta `quantity` unidades si quedan libres; devuelve las disponibles (None si no existe). No hace commit"""
+        now = datetime.utcnow()
+        # Primero la fila del producto: el UPDATE la bloquea hasta el commit (en SQLite toma
+        # el bloqueo de escritura) y suma ya las unidades pedidas. Desde aquí ninguna otra
+        # reserva o compra del producto cambia `reserved`, y cada sentencia siguiente lee con
+        # una instantánea nueva que incluye todo lo confirmado mientras esperaba el bloqueo;
+        # así dos carritos no apartan las mismas unidades, ni dos pestañas del mismo usuario
+        # descuentan dos veces su reserva anterior
+        locked = await self.db.scalar(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(reserved=Product.reserved + quantity)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+        if locked is None:
+            return None
+        # La reserva anterior del usuario se sustituye, y las caducadas del producto dejan de contar
+        await self._release(
+            StockReservation.product_id == product_id,
+            or_(StockReservation.user_id == user_id, StockReservation.expires_at <= now)
+        )
+        # `reserved` ya incluye lo pedido: lo libre para este usuario es lo que queda más eso.
+        # Si no alcanza, quien llama hace rollback y deshace también la suma y la liberación
+        free = await self.db.scalar(select(Product.stock - Product.reserved).filter(Product.id == product_id))
+        available = free + quantity
+        if available >= quantity:
+            await self.db.execute(insert(StockReservation).values(
+                user_id=user_id, product_id=product_id, quantity=quantity, expires_at=now + ttl
+            ))
+        return available
+
+    async def release(self, user_id: int, product_id: int) -> None:
+        """Libera la reserva de una línea del carrito. No hace commit"""
+        await self._release(StockReservation.user_id == user_id, StockReservation.product_id == product_id)
+
+    async def release_all(self, user_id: int, expired_of: Sequence[int] = ()) -> None:
+        """Libera todas las reservas del usuario y las caducadas de `expired_of`. No hace commit"""
+        criteria = StockReservation.user_id == user_id
+        if expired_of:
+            criteria = or_(criteria, and_(
+                StockReservation.product_id.in_(expired_of),
+                StockReservation.expires_at <= datetime.utcnow()
+            ))
+        await self._release(criteria)
+
+    async def delete_expired(self, batch_size: int) -> int:
+        """Borra las reservas caducadas en lotes de `batch_size`, una transacción por lote"""
+        total = 0
+        while True:
+            expired = (
+                select(StockReservation.id)
+                .where(StockReservation.expires_at <= datetime.utcnow())
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            deleted = await self._release(StockReservation.id.in_(expired))
+            await self.db.commit()
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    async def _release(self, *criteria) -> int:
+        """Borra las reservas que cumplen `criteria` y las descuenta de `reserved`; devuelve cuántas"""
+        # DELETE ... RETURNING: si el barrido y una reserva borran a la vez la misma reserva
+        # caducada, solo uno la recibe y la descuenta
+        result = await self.db.execute(
+            delete(StockReservation).where(*criteria)
+            .returning(StockReservation.product_id, StockReservation.quantity)
+        )
+        released: Dict[int, int] = {}
+        rows = result.all()
+        for product_id, quantity in rows:
+            released[product_id] = released.get(product_id, 0) + quantity
+        if released:
+            await self.db.execute(
+                update(Product)
+                .where(Product.id.in_(released))
+                .values(reserved=Product.reserved - case(released, value=Product.id))
+                .execution_options(synchronize_session=False)
+            )
+        return len(rows)
@@ -0,0 +1,31 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.token_revocation import TokenRevocation
+from typing import List, Optional
+
+class TokenRevocationRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def revoke(self, user_id: int, email: str, version: Optional[str], not_before: int) -> None:
+        """Registra (o sustituye) la revocación de los tokens del usuario. No hace commit"""
+        dialect = postgresql if self.db.bind.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(TokenRevocation).values(
+            user_id=user_id, email=email, version=version, not_before=not_before
+        )
+        await self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[TokenRevocation.user_id],
+            set_={"email": stmt.excluded.email, "version": stmt.excluded.version,
+                  "not_before": stmt.excluded.not_before}
+        ))
+
+    async def changed_since(self, since: int) -> List[TokenRevocation]:
+        result = await self.db.execute(select(TokenRevocation).filter(TokenRevocation.not_before >= since))
+        return list(result.scalars().all())
+
+    async def delete_before(self, horizon: int) -> int:
+        """Elimina las revocaciones que ya no afectan a ningún token vigente"""
+        result = await self.db.execute(delete(TokenRevocation).where(TokenRevocation.not_before < horizon))
+        await self.db.commit()
+        return result.rowcount
@@ -1,84 +1,76 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 from app.models.user import User
-from app.utils.auth import get_password_hash, verify_password
-from typing import Optional
-from datetime import datetime, timedelta
+from app.schemas.user import UserResponse
+from app.utils.fast_json import schema_columns, rows_as_dicts
+from app.utils.auth import needs_rehash, revoke_user_tokens, token_version, current_token_version
+from app.utils.password_pool import hash_password_async, verify_password_async
+from typing import List, Optional
 
 class UserRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(User).filter(User.email == email).first()
+    async def get_by_email(self, email: str) -> Optional[User]:
+        result = await self.db.execute(select(User).filter(User.email == email))
+        return result.scalars().first()
 
-    def get_by_id(self, user_id: int) -> Optional[User]:
-        return self.db.query(User).filter(User.id == user_id).first()
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        return await self.db.get(User, user_id)
 
-    def create_user(self, email: str, name: str, password: str, is_admin: bool = False) -> User:
-        """Crea un nuevo usuario con el campo is_admin"""
-        hashed_password = get_password_hash(password)
+    async def create_user(self, email: str, name: str, password: str, is_admin: bool = False) -> User:
+        """Crea un nuevo usuario con el campo is_admin (el hash se calcula en el pool de hashing)"""
         db_user = User(
             email=email,
             name=name,
-            hashed_password=hashed_password,
+            hashed_password=await hash_password_async(password),
             is_admin=is_admin
         )
         self.db.add(db_user)
-        self.db.commit()
-        self.db.refresh(db_user)
+        await self.db.commit()
+        await self.db.refresh(db_user)
         return db_user
 
-    def authenticate_user(self, email: str, password: str) -> Optional[User]:
+    async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Autentica a un usuario por email y contraseña"""
-        user = self.get_by_email(email)
-        if not user or not verify_password(password, user.hashed_password):
+        user = await self.get_by_email(email)
+        if not user or not await verify_password_async(password, user.hashed_password):
             return None
+        # Hash con un coste inferior al configurado: se recalcula aprovechando la contraseña en claro
+        if needs_rehash(user.hashed_password):
+            await self.rehash_password(user, await hash_password_async(password))
         return user
 
-    def get_all_users(self):
-        return self.db.query(User).all()
+    async def get_all_users(self) -> List[User]:
+        result = await self.db.execute(select(User))
+        return list(result.scalars().all())
 
-    def get_total_users(self) -> int:
-        return self.db.query(User).count()
+    async def get_all_user_rows(self) -> List[dict]:
+        """Usuarios como diccionarios con las columnas de UserResponse (sin ORM ni hash)"""
+        result = await self.db.execute(select(*schema_columns(UserResponse, User)))
+        return rows_as_dicts(result.mappings())
 
-    def save_reset_token(self, user_id: int, reset_token: str, expires_in: timedelta) -> None:
-        """Guarda el token de recuperación y su expiración"""
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if user:
-            user.reset_token = reset_token
-            user.reset_token_expires = datetime.utcnow() + expires_in
-            self.db.commit()
-
-    def get_by_reset_token(self, reset_token: str) -> Optional[User]:
-        """Obtiene usuario por token de recuperación"""
-        return self.db.query(User).filter(
-            User.reset_token == reset_token
-        ).first()
-
-    def is_reset_token_valid(self, user_id: int, token: str) -> bool:
-        """Verifica si el token de recuperación es válido y no ha expirado"""
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if not user or user.reset_token != token:
-            return False
-        if user.reset_token_expires < datetime.utcnow():
-            return False
-        return True
+    async def get_total_users(self) -> int:
+        return await self.db.scalar(select(func.count()).select_from(User))
 
-    def update_password(self, user_id: int, new_password: str) -> None:
+    async def update_password(self, user_id: int, new_password: str) -> None:
         """Actualiza la contraseña del usuario"""
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if user:
-            user.hashed_password = get_password_hash(new_password)
-            self.db.commit()
+        await self.set_password_hash(user_id, await hash_password_async(new_password))
 
-    def invalidate_reset_token(self, user_id: int) -> None:
-        """Invalida el token de recuperación después de su uso"""
-        user = self.db.query(User).filter(User.id == user_id).first()
+    async def set_password_hash(self, user_id: int, hashed_password: str) -> None:
+        """Contraseña nueva: cambia la versión de los tokens y revoca los emitidos antes"""
+        user = await self.get_by_id(user_id)
         if user:
-            user.reset_token = None
-            user.reset_token_expires = None
-            self.db.commit()
+            user.hashed_password = hashed_password
+            user.token_version = token_version(hashed_password)
+            await revoke_user_tokens(self.db, user.id, user.email, user.token_version)
+
+    async def rehash_password(self, user: User, hashed_password: str) -> None:
+        """Misma contraseña con el coste actual: los tokens y sesiones del usuario siguen valiendo"""
+        user.token_version = current_token_version(user)
+        user.hashed_password = hashed_password
+        await self.db.commit()
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verifica si una contraseña coincide con el hash"""
-        return verify_password(plain_password, hashed_password)
+        return await verify_password_async(plain_password, hashed_password)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_read_db
 from app.schemas.dashboard import DashboardStats
 from app.services.dashboard_service import DashboardService
 from app.utils.auth import get_current_active_user
@@ -8,16 +8,9 @@ from app.models.user import User
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/stats", response_model=DashboardStats)
-def get_dashboard_stats(
-    db: Session = Depends(get_db),
+async def get_dashboard_stats(
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener estadísticas del dashboard (solo admin)"""
@@ -27,4 +20,4 @@ def get_dashboard_stats(
             detail="Solo los administradores pueden ver las estadísticas"
         )
     dashboard_service = DashboardService(db)
-    return dashboard_service.get_stats() 
\ No newline at end of file
+    return await dashboard_service.get_stats() 
\ No newline at end of file
@@ -1,47 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db, read_sessionmaker
 from app.schemas.invoice import Invoice, InvoiceList
 from app.services.invoice_service import InvoiceService
+from app.services.export_service import ExportService
+from app.utils.export_stream import MEDIA_TYPES
+from app.utils.fast_json import FastJSONResponse
+from app.config import FAST_JSON_RESPONSES
 from app.utils.auth import get_current_active_user
 from app.models.user import User
+from datetime import date
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/create", response_model=Invoice)
-def create_invoice(
-    db: Session = Depends(get_db),
+async def create_invoice(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Crear factura desde el carrito del usuario"""
     invoice_service = InvoiceService(db)
-    return invoice_service.create_invoice_from_cart(current_user.id)
+    return await invoice_service.create_invoice_from_cart(current_user.id)
 
 @router.get("/me", response_model=InvoiceList)
-def get_user_invoices(
-    db: Session = Depends(get_db),
+async def get_user_invoices(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener facturas del usuario autenticado"""
     invoice_service = InvoiceService(db)
-    return invoice_service.get_user_invoices(current_user.id)
+    return await invoice_service.get_user_invoices(current_user.id)
 
 @router.get("/{invoice_id}", response_model=Invoice)
-def get_invoice(
+async def get_invoice(
     invoice_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener una factura específica"""
     invoice_service = InvoiceService(db)
-    invoice = invoice_service.get_invoice_by_id(invoice_id)
+    invoice = await invoice_service.get_invoice_by_id(invoice_id)
     
     # Check if user owns the invoice or is admin
     if invoice.user_id != current_user.id and not current_user.is_admin:
@@ -53,8 +52,8 @@ def get_invoice(
     return invoice
 
 @router.get("/admin/all", response_model=InvoiceList)
-def get_all_invoices(
-    db: Session = Depends(get_db),
+async def get_all_invoices(
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener todas las facturas (solo admin)"""
@@ -64,4 +63,29 @@ def get_all_invoices(
             detail="Solo los administradores pueden ver todas las facturas"
         )
     invoice_service = InvoiceService(db)
-    return invoice_service.get_all_invoices() 
\ No newline at end of file
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(await invoice_service.get_all_invoice_rows())
+    return await invoice_service.get_all_invoices()
+
+@router.get("/admin/export")
+async def export_invoices(
+    date_from: date = Query(..., description="Primer día incluido (UTC)"),
+    date_to: date = Query(..., description="Último día incluido (UTC)"),
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Exportar en streaming las facturas de un rango de fechas con sus líneas (solo admin)"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden exportar facturas"
+        )
+    # La exportación usa su propia sesión: se libera ya la conexión de la autenticación
+    await db.close()
+    export_service = ExportService(read_sessionmaker())
+    return StreamingResponse(
+        export_service.export_invoices(format, date_from, date_to),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="invoices_{date_from}_{date_to}.{format}"'}
+    )
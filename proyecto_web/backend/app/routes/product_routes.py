@@ -1,37 +1,139 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.schemas.product import Product, ProductCreate, ProductUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, read_sessionmaker
+from app.schemas.product import (
+    Product, ProductFilters, ProductCreate, ProductUpdate, ProductSearchHit, ProductSuggestion, ProductImportResult,
+    ProductBatch, ProductBatchRequest, ProductAvailability
+)
 from app.services.product_service import ProductService
+from app.services.export_service import ExportService
 from app.utils.auth import get_current_active_user
+from app.utils.catalog_cache import cached_json_response
+from app.utils.record_stream import detect_format
+from app.utils.export_stream import MEDIA_TYPES
 from app.models.user import User
-from typing import List
+from app.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SUGGEST_DEFAULT_LIMIT, SUGGEST_MAX_LIMIT
+from typing import List, Optional
+import logging
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+logger = logging.getLogger("market-backend.import")
+
+# Las rutas cacheadas del catálogo leen del primario (un acierto de caché no abre conexión):
+# con una réplica atrasada, la caché guardaría datos anteriores a su versión bajo su ETag
 
 @router.get("/", response_model=List[Product])
-def get_products(db: Session = Depends(get_db)):
-    """Obtener todos los productos"""
+async def get_products(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamaño de página (DEFAULT_PAGE_SIZE con cursor)"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    include_total: bool = Query(False, description="Añadir X-Total-Count (cuenta los productos filtrados)"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: bool = Query(False, description="Solo productos con stock"),
+    name_prefix: Optional[str] = Query(None, min_length=1, max_length=100, description="Comienzo del nombre (sin distinguir mayúsculas)"),
+    sort: str = Query("id", pattern="^-?(id|price|name)$", description="id, price o name; con '-' delante, descendente"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtener productos (todos, o paginados con limit/cursor y X-Next-Cursor), con filtros y orden; 304 con If-None-Match"""
+    filters = ProductFilters(min_price=min_price, max_price=max_price, in_stock=in_stock, name_prefix=name_prefix)
+    if limit is None and cursor is not None:
+        limit = DEFAULT_PAGE_SIZE
+    product_service = ProductService(db)
+    cached = await product_service.get_products_page_cached(limit, cursor, include_total, filters, sort)
+    extra_headers = {}
+    next_cursor = cached.headers.get("X-Next-Cursor")
+    if next_cursor:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        extra_headers["Link"] = f'<{next_url}>; rel="next"'
+    return cached_json_response(request, cached, extra_headers)
+
+@router.get("/search", response_model=List[ProductSearchHit])
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar en nombre y descripción"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Buscar productos por texto, por relevancia y con las coincidencias resaltadas (<mark>)"""
+    product_service = ProductService(db)
+    cached = await product_service.search_products_cached(q, limit, cursor)
+    extra_headers = {}
+    next_cursor = cached.headers.get("X-Next-Cursor")
+    if next_cursor:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        extra_headers["Link"] = f'<{next_url}>; rel="next"'
+    return cached_json_response(request, cached, extra_headers)
+
+@router.get("/suggest", response_model=List[ProductSuggestion])
+async def suggest_products(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Comienzo del nombre o de una de sus palabras"),
+    limit: int = Query(SUGGEST_DEFAULT_LIMIT, ge=1, le=SUGGEST_MAX_LIMIT)
+):
+    """Autocompletar nombres de producto (sin tildes ni mayúsculas) desde un índice en memoria"""
+    return ProductService.suggest_products(prefix, limit)
+
+@router.get("/export")
+async def export_products(
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Exportar todo el catálogo en streaming, NDJSON o CSV (solo admin)"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden exportar productos"
+        )
+    # La exportación usa su propia sesión: se libera ya la conexión de la autenticación
+    await db.close()
+    export_service = ExportService(read_sessionmaker())
+    return StreamingResponse(
+        export_service.export_products(format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'}
+    )
+
+@router.get("/batch", response_model=ProductBatch)
+async def get_products_batch(
+    request: Request,
+    ids: str = Query(..., pattern=r"^\d+(,\d+)*$", description="IDs separados por comas, p. ej. 1,2,3"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtener varios productos por ID en el orden pedido; los inexistentes van en `missing`"""
+    product_service = ProductService(db)
+    product_ids = [int(product_id) for product_id in ids.split(",")]
+    return cached_json_response(request, await product_service.get_products_batch(product_ids))
+
+@router.post("/batch", response_model=ProductBatch)
+async def post_products_batch(
+    batch: ProductBatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Igual que GET /products/batch, con los IDs en el cuerpo"""
     product_service = ProductService(db)
-    return product_service.get_all_products()
+    return cached_json_response(request, await product_service.get_products_batch(batch.ids))
 
 @router.get("/{product_id}", response_model=Product)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Obtener un producto por ID"""
+async def get_product(product_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """Obtener un producto por ID (304 si If-None-Match coincide con su ETag)"""
     product_service = ProductService(db)
-    return product_service.get_product_by_id(product_id)
+    return cached_json_response(request, await product_service.get_product_cached(product_id))
+
+@router.get("/{product_id}/availability", response_model=ProductAvailability)
+async def get_product_availability(product_id: int, db: AsyncSession = Depends(get_db)):
+    """Unidades disponibles para vender: stock menos las reservas vigentes de los carritos"""
+    product_service = ProductService(db)
+    return await product_service.get_availability(product_id)
 
 @router.post("/", response_model=Product)
-def create_product(
+async def create_product(
     product: ProductCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Crear un nuevo producto (solo admin)"""
@@ -41,13 +143,35 @@ def create_product(
             detail="Solo los administradores pueden crear productos"
         )
     product_service = ProductService(db)
-    return product_service.create_product(product)
+    return await product_service.create_product(product)
+
+@router.post("/import", response_model=ProductImportResult)
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Por defecto, según Content-Type"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Importar productos desde un CSV o NDJSON en el cuerpo, por lotes (solo admin)"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden importar productos"
+        )
+
+    def log_progress(result: ProductImportResult) -> None:
+        logger.info("Importación de %s, lote %s: %s filas, %s altas, %s actualizadas, %s rechazadas",
+                    current_user.email, result.chunks, result.rows, result.inserted, result.updated, result.rejected)
+
+    product_service = ProductService(db)
+    fmt = format or detect_format(request.headers.get("content-type"))
+    return await product_service.import_products(request.stream(), fmt, on_chunk=log_progress)
 
 @router.put("/{product_id}", response_model=Product)
-def update_product(
+async def update_product(
     product_id: int,
     product: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Actualizar un producto (solo admin)"""
@@ -57,12 +181,12 @@ def update_product(
             detail="Solo los administradores pueden actualizar productos"
         )
     product_service = ProductService(db)
-    return product_service.update_product(product_id, product)
+    return await product_service.update_product(product_id, product)
 
 @router.delete("/{product_id}")
-def delete_product(
+async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Eliminar un producto (solo admin)"""
@@ -72,4 +196,4 @@ def delete_product(
             detail="Solo los administradores pueden eliminar productos"
         )
     product_service = ProductService(db)
-    return product_service.delete_product(product_id) 
\ No newline at end of file
+    return await product_service.delete_product(product_id) 
\ No newline at end of file
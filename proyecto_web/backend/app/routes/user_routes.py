@@ -1,11 +1,13 @@
 # user_routes.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import SessionLocal
+from app.database import get_db
 from app.models.user import User
 from app.utils.auth import get_current_active_user
 from app.repositories.user_repository import UserRepository
+from app.utils.fast_json import FastJSONResponse
+from app.config import FAST_JSON_RESPONSES
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -20,15 +22,8 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/me", response_model=UserResponse)
-def get_current_user_profile(current_user: User = Depends(get_current_active_user)):
+async def get_current_user_profile(current_user: User = Depends(get_current_active_user)):
     """Obtener perfil del usuario autenticado"""
     return UserResponse(
         id=current_user.id,
@@ -38,9 +33,9 @@ def get_current_user_profile(current_user: User = Depends(get_current_active_use
     )
 
 @router.get("/", response_model=List[UserResponse])
-def get_all_users(
+async def get_all_users(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Obtener todos los usuarios (solo admins)"""
     if not current_user.is_admin:
@@ -50,14 +45,16 @@ def get_all_users(
         )
     
     user_repo = UserRepository(db)
-    users = user_repo.get_all_users()
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(await user_repo.get_all_user_rows())
+    users = await user_repo.get_all_users()
     return [UserResponse.from_orm(user) for user in users]
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user_by_id(
+async def get_user_by_id(
     user_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Obtener usuario por ID"""
     # Los usuarios solo pueden ver su propio perfil, los admins pueden ver cualquiera
@@ -68,7 +65,7 @@ def get_user_by_id(
         )
     
     user_repo = UserRepository(db)
-    user = user_repo.get_by_id(user_id)
+    user = await user_repo.get_by_id(user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -78,9 +75,9 @@ def get_user_by_id(
     return UserResponse.from_orm(user)
 
 @router.get("/stats/total")
-def get_user_stats(
+async def get_user_stats(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Obtener estadísticas de usuarios (solo admins)"""
     if not current_user.is_admin:
@@ -90,7 +87,7 @@ def get_user_stats(
         )
     
     user_repo = UserRepository(db)
-    total_users = user_repo.get_total_users()
+    total_users = await user_repo.get_total_users()
     
     return {
         "total_users": total_users,
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class CartItemBase(BaseModel):
@@ -6,7 +6,8 @@ class CartItemBase(BaseModel):
     quantity: int = 1
 
 class CartItemCreate(CartItemBase):
-    pass
+    # Unidades a añadir: una cantidad negativa sumaría stock al facturar
+    quantity: int = Field(1, gt=0)
 
 class CartItem(CartItemBase):
     id: int
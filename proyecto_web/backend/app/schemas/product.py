@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class ProductBase(BaseModel):
     name: str
@@ -20,4 +20,58 @@ class Product(ProductBase):
     id: int
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class ProductFilters(BaseModel):
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    in_stock: bool = False
+    name_prefix: Optional[str] = None
+
+    class Config:
+        # Forma parte de la clave de la caché del catálogo
+        frozen = True
+
+class ProductBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+class ProductBatch(BaseModel):
+    # En el orden pedido (sin repetidos); los ids inexistentes van en `missing`
+    products: List[Product]
+    missing: List[int]
+
+class ProductSearchHit(Product):
+    rank: float
+    # Texto escapado para HTML con las coincidencias entre <mark></mark>
+    name_highlight: str
+    snippet: Optional[str] = None 
+
+class ProductSuggestion(BaseModel):
+    id: int
+    name: str
+
+class ProductAvailability(BaseModel):
+    product_id: int
+    stock: int
+    # Unidades apartadas por carritos con reserva vigente
+    reserved: int
+    available: int
+
+class ProductImportRow(ProductCreate):
+    # Con id se actualizan las columnas informadas del producto existente (o se crea con ese id)
+    id: Optional[int] = Field(None, ge=1, le=2 ** 31 - 1)
+    price: float = Field(..., ge=0)
+    stock: int = Field(0, ge=0)
+
+class ProductImportError(BaseModel):
+    line: int
+    error: str
+
+class ProductImportResult(BaseModel):
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    chunks: int = 0
+    # Solo las primeras IMPORT_MAX_REPORTED_ERRORS filas rechazadas
+    errors: List[ProductImportError] = []
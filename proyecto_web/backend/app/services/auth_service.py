@@ -1,28 +1,33 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.repositories.user_repository import UserRepository
+from app.repositories.password_reset_repository import PasswordResetRepository
 from app.schemas.auth import UserRegister, UserLogin, Token, PasswordResetRequest, PasswordReset
-from app.utils.auth import create_access_token
+from app.utils.auth import create_user_access_token
 from app.utils.email import send_password_reset_email
 from datetime import timedelta
 from app.config import ACCESS_TOKEN_EXPIRE_MINUTES, PASSWORD_RESET_TOKEN_EXPIRE_MINUTES
+from app.utils.rate_limit import login_limiter, LoginThrottled
+from app.utils.password_pool import hash_password_async
+from typing import Optional
 import secrets
 
 class AuthService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.user_repo = UserRepository(db)
+        self.reset_repo = PasswordResetRepository(db)
 
-    def register(self, user_data: UserRegister) -> Token:
+    async def register(self, user_data: UserRegister) -> Token:
         """Registra un nuevo usuario y devuelve un token de acceso"""
-        existing_user = self.user_repo.get_by_email(user_data.email)
+        existing_user = await self.user_repo.get_by_email(user_data.email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="El email ya está registrado"
             )
 
-        user = self.user_repo.create_user(
+        user = await self.user_repo.create_user(
             email=user_data.email,
             name=user_data.name,
             password=user_data.password,
@@ -31,20 +36,32 @@ class AuthService:
 
         # Crear token de acceso para el usuario recién registrado
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={
-                "sub": user.email,
-                "is_admin": user.is_admin
-            },
-            expires_delta=access_token_expires
-        )
+        access_token = create_user_access_token(user, expires_delta=access_token_expires)
 
         return Token(access_token=access_token, token_type="bearer")
 
-    def login(self, user_data: UserLogin) -> Token:
+    async def _authenticate(self, email: str, password: str, client_ip: Optional[str]):
+        """Verifica credenciales aplicando el límite de intentos antes de calcular bcrypt"""
+        try:
+            await login_limiter.check(email, client_ip)
+        except LoginThrottled as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Demasiados intentos de inicio de sesión, inténtalo más tarde",
+                headers={"Retry-After": str(e.retry_after)},
+            )
+
+        user = await self.user_repo.authenticate_user(email, password)
+        if user:
+            await login_limiter.record_success(email, client_ip)
+        else:
+            await login_limiter.record_failure(email, client_ip)
+        return user
+
+    async def login(self, user_data: UserLogin, client_ip: Optional[str] = None) -> Token:
         """Autentica un usuario con validación de rol admin"""
         # 1. Verificar credenciales básicas
-        user = self.user_repo.authenticate_user(user_data.email, user_data.password)
+        user = await self._authenticate(user_data.email, user_data.password, client_ip)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,19 +86,13 @@ class AuthService:
 
         # 3. Crear token con la información del usuario de la BD
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={
-                "sub": user.email,
-                "is_admin": user.is_admin
-            },
-            expires_delta=access_token_expires
-        )
+        access_token = create_user_access_token(user, expires_delta=access_token_expires)
 
         return Token(access_token=access_token, token_type="bearer")
 
-    def login_admin(self, user_data: UserLogin) -> Token:
+    async def login_admin(self, user_data: UserLogin, client_ip: Optional[str] = None) -> Token:
         """Login específico para administradores"""
-        user = self.user_repo.authenticate_user(user_data.email, user_data.password)
+        user = await self._authenticate(user_data.email, user_data.password, client_ip)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -97,19 +108,13 @@ class AuthService:
             )
 
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={
-                "sub": user.email,
-                "is_admin": user.is_admin
-            },
-            expires_delta=access_token_expires
-        )
+        access_token = create_user_access_token(user, expires_delta=access_token_expires)
 
         return Token(access_token=access_token, token_type="bearer")
 
-    def login_user(self, user_data: UserLogin) -> Token:
+    async def login_user(self, user_data: UserLogin, client_ip: Optional[str] = None) -> Token:
         """Login específico para usuarios regulares"""
-        user = self.user_repo.authenticate_user(user_data.email, user_data.password)
+        user = await self._authenticate(user_data.email, user_data.password, client_ip)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -125,18 +130,12 @@ class AuthService:
             )
 
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={
-                "sub": user.email,
-                "is_admin": user.is_admin
-            },
-            expires_delta=access_token_expires
-        )
+        access_token = create_user_access_token(user, expires_delta=access_token_expires)
 
         return Token(access_token=access_token, token_type="bearer")
 
-    def request_password_reset(self, reset_request: PasswordResetRequest) -> dict:
-        user = self.user_repo.get_by_email(reset_request.email)
+    async def request_password_reset(self, reset_request: PasswordResetRequest) -> dict:
+        user = await self.user_repo.get_by_email(reset_request.email)
         if not user:
             return {
                 "message": "Si el email está registrado, recibirás un enlace para restablecer tu contraseña"
@@ -145,59 +144,59 @@ class AuthService:
         reset_token = secrets.token_urlsafe(32)
         reset_token_expires = timedelta(minutes=PASSWORD_RESET_TOKEN_EXPIRE_MINUTES)
 
-        self.user_repo.save_reset_token(
+        await self.reset_repo.create_token(
             user_id=user.id,
             reset_token=reset_token,
-            expires_at=reset_token_expires
+            expires_in=reset_token_expires
         )
 
-        try:
-            send_password_reset_email(
-                email=user.email,
-                name=user.name,
-                reset_token=reset_token
-            )
-        except Exception as e:
-            print(f"Error enviando email de reset: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Error enviando el email de recuperación"
-            )
+        # Se encola en el outbox: la respuesta no espera al servidor SMTP. Token y
+        # mensaje se confirman juntos: ni un token sin email ni un email con un token inexistente
+        await send_password_reset_email(
+            self.db,
+            email=user.email,
+            name=user.name,
+            reset_token=reset_token
+        )
+        await self.db.commit()
 
         return {
             "message": "Si el email está registrado, recibirás un enlace para restablecer tu contraseña"
         }
 
-    def reset_password(self, reset_data: PasswordReset) -> dict:
-        user = self.user_repo.get_by_reset_token(reset_data.token)
-        if not user or not self.user_repo.is_reset_token_valid(user.id, reset_data.token):
+    async def reset_password(self, reset_data: PasswordReset) -> dict:
+        # El token se consume antes de calcular bcrypt: un token inválido no gasta CPU
+        user_id = await self.reset_repo.redeem(reset_data.token)
+        if user_id is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Token de reset inválido o expirado"
             )
 
-        self.user_repo.update_password(user.id, reset_data.new_password)
-        self.user_repo.invalidate_reset_token(user.id)
+        # El canje y la nueva contraseña se confirman en el mismo commit
+        hashed_password = await hash_password_async(reset_data.new_password)
+        await self.user_repo.set_password_hash(user_id, hashed_password)
 
         return {
             "message": "Contraseña actualizada exitosamente"
         }
 
-    def change_password(self, user_email: str, current_password: str, new_password: str) -> dict:
-        user = self.user_repo.authenticate_user(user_email, current_password)
+    async def change_password(self, user_email: str, current_password: str, new_password: str,
+                              client_ip: Optional[str] = None) -> dict:
+        user = await self._authenticate(user_email, current_password, client_ip)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Contraseña actual incorrecta"
             )
 
-        if self.user_repo.verify_password(new_password, user.hashed_password):
+        if await self.user_repo.verify_password(new_password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="La nueva contraseña debe ser diferente a la actual"
             )
 
-        self.user_repo.update_password(user.id, new_password)
+        await self.user_repo.update_password(user.id, new_password)
 
         return {
             "message": "Contraseña cambiada exitosamente"
@@ -1,16 +1,20 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.repositories.cart_repository import CartRepository
+from app.repositories.reservation_repository import ReservationRepository
+from app.config import RESERVATION_TTL_SECONDS
 from app.schemas.cart import CartItemCreate, CartResponse, CartItem
 from typing import List
+from datetime import timedelta
 
 class CartService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.cart_repo = CartRepository(db)
+        self.reservation_repo = ReservationRepository(db)
 
-    def get_user_cart(self, user_id: int) -> CartResponse:
-        cart_items = self.cart_repo.get_user_cart(user_id)
+    async def get_user_cart(self, user_id: int) -> CartResponse:
+        cart_items = await self.cart_repo.get_user_cart(user_id)
         
         # Convert to CartItem schema with product details
         items = []
@@ -25,13 +29,31 @@ class CartService:
                 total_price=product.price * cart_item.quantity
             ))
         
-        total = self.cart_repo.get_cart_total(user_id)
+        total = await self.cart_repo.get_cart_total(user_id)
         
         return CartResponse(items=items, total=total)
 
-    def add_to_cart(self, user_id: int, cart_item: CartItemCreate) -> dict:
+    async def add_to_cart(self, user_id: int, cart_item: CartItemCreate) -> dict:
+        # La reserva cubre la línea entera (lo que ya había más lo añadido) y renueva su caducidad
+        existing = await self.cart_repo.get_cart_item(user_id, cart_item.product_id)
+        quantity = cart_item.quantity + (existing.quantity if existing else 0)
+        available = await self.reservation_repo.reserve(
+            user_id, cart_item.product_id, quantity, timedelta(seconds=RESERVATION_TTL_SECONDS)
+        )
+        if available is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Producto no encontrado"
+            )
+        if available < quantity:
+            await self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Stock insuficiente: disponibles {max(available, 0)}"
+            )
         try:
-            self.cart_repo.add_to_cart(user_id, cart_item)
+            # Confirma la línea del carrito junto con su reserva
+            await self.cart_repo.add_to_cart(user_id, cart_item)
             return {"message": "Producto agregado al carrito exitosamente"}
         except ValueError as e:
             raise HTTPException(
@@ -39,8 +61,9 @@ class CartService:
                 detail=str(e)
             )
 
-    def remove_from_cart(self, user_id: int, product_id: int) -> dict:
-        success = self.cart_repo.remove_from_cart(user_id, product_id)
+    async def remove_from_cart(self, user_id: int, product_id: int) -> dict:
+        await self.reservation_repo.release(user_id, product_id)
+        success = await self.cart_repo.remove_from_cart(user_id, product_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -48,10 +71,11 @@ class CartService:
             )
         return {"message": "Producto removido del carrito exitosamente"}
 
-    def get_cart_total(self, user_id: int) -> dict:
-        total = self.cart_repo.get_cart_total(user_id)
+    async def get_cart_total(self, user_id: int) -> dict:
+        total = await self.cart_repo.get_cart_total(user_id)
         return {"total": total}
 
-    def clear_cart(self, user_id: int) -> dict:
-        self.cart_repo.clear_cart(user_id)
+    async def clear_cart(self, user_id: int) -> dict:
+        await self.reservation_repo.release_all(user_id)
+        await self.cart_repo.clear_cart(user_id)
         return {"message": "Carrito vaciado exitosamente"} 
\ No newline at end of file
@@ -1,16 +1,16 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.repositories.chat_repository import ChatRepository
 from app.schemas.chat import ChatMessageCreate, ChatMessage, ChatMessageList
 from typing import List
 
 class ChatService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.chat_repo = ChatRepository(db)
 
-    def get_messages(self, limit: int = 50) -> ChatMessageList:
-        messages = self.chat_repo.get_messages(limit)
+    async def get_messages(self, limit: int = 50) -> ChatMessageList:
+        messages = await self.chat_repo.get_messages(limit)
         
         # Convert to ChatMessage schema with user details
         chat_messages = []
@@ -25,8 +25,12 @@ class ChatService:
         
         return ChatMessageList(messages=chat_messages)
 
-    def create_message(self, user_id: int, message_data: ChatMessageCreate) -> ChatMessage:
-        message = self.chat_repo.create_message(user_id, message_data)
+    async def get_message_rows(self, limit: int = 50) -> dict:
+        """Mismo contenido que get_messages, sin modelos Pydantic (FAST_JSON_RESPONSES)"""
+        return {"messages": await self.chat_repo.get_message_rows(limit)}
+
+    async def create_message(self, user_id: int, message_data: ChatMessageCreate) -> ChatMessage:
+        message = await self.chat_repo.create_message(user_id, message_data)
         
         # Get user details for response
         user = message.user
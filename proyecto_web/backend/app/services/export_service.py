@@ -0,0 +1,64 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import EXPORT_BATCH_SIZE
+from app.repositories.product_repository import ProductRepository
+from app.repositories.invoice_repository import InvoiceRepository
+from app.utils.export_stream import ndjson_stream, csv_stream
+
+PRODUCT_COLUMNS = ["id", "name", "description", "price", "stock"]
+INVOICE_COLUMNS = ["invoice_id", "invoice_number", "user_id", "status", "total_amount", "created_at"]
+ITEM_COLUMNS = ["item_id", "product_id", "product_name", "quantity", "unit_price", "total_price"]
+
+
+class ExportService:
+    """Exportaciones completas en streaming; cada una abre y cierra su propia sesión"""
+
+    def __init__(self, session_factory: async_sessionmaker, batch_size: int = EXPORT_BATCH_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+
+    async def _product_rows(self) -> AsyncIterator[Dict[str, Any]]:
+        async with self.session_factory() as db:
+            async for row in ProductRepository(db).stream_rows(self.batch_size):
+                yield dict(row)
+
+    def export_products(self, fmt: str) -> AsyncIterator[bytes]:
+        if fmt == "csv":
+            return csv_stream(self._product_rows(), PRODUCT_COLUMNS)
+        return ndjson_stream(self._product_rows())
+
+    async def _invoice_item_rows(self, start: datetime, end: datetime) -> AsyncIterator[Dict[str, Any]]:
+        async with self.session_factory() as db:
+            async for row in InvoiceRepository(db).stream_with_items(start, end, self.batch_size):
+                yield dict(row)
+
+    async def _invoices_with_items(self, start: datetime, end: datetime) -> AsyncIterator[Dict[str, Any]]:
+        # Las líneas llegan agrupadas por factura: basta con la factura en curso
+        current: Optional[Dict[str, Any]] = None
+        async for row in self._invoice_item_rows(start, end):
+            if current is None or current["invoice_id"] != row["invoice_id"]:
+                if current is not None:
+                    yield current
+                current = {column: row[column] for column in INVOICE_COLUMNS}
+                current["items"] = []
+            if row["item_id"] is not None:
+                current["items"].append({column: row[column] for column in ITEM_COLUMNS})
+        if current is not None:
+            yield current
+
+    def export_invoices(self, fmt: str, date_from: date, date_to: date) -> AsyncIterator[bytes]:
+        """Facturas creadas entre date_from y date_to (incluidos, UTC); en CSV, una fila por línea de factura"""
+        if date_to < date_from:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="date_to no puede ser anterior a date_from"
+            )
+        start = datetime.combine(date_from, time.min, tzinfo=timezone.utc)
+        end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        if fmt == "csv":
+            return csv_stream(self._invoice_item_rows(start, end), INVOICE_COLUMNS + ITEM_COLUMNS)
+        return ndjson_stream(self._invoices_with_items(start, end))
@@ -1,31 +1,52 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.repositories.invoice_repository import InvoiceRepository
 from app.repositories.cart_repository import CartRepository
+from app.repositories.product_repository import ProductRepository
+from app.repositories.reservation_repository import ReservationRepository
+from app.repositories.product_change_repository import ProductChangeRepository
+from app.utils.catalog_cache import catalog_cache
 from app.schemas.invoice import InvoiceCreate, Invoice, InvoiceList
-from typing import List
+from typing import Dict, List
+import time
 
 class InvoiceService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.invoice_repo = InvoiceRepository(db)
         self.cart_repo = CartRepository(db)
+        self.product_repo = ProductRepository(db)
+        self.reservation_repo = ReservationRepository(db)
+        self.product_change_repo = ProductChangeRepository(db)
 
-    def get_user_invoices(self, user_id: int) -> InvoiceList:
-        invoices = self.invoice_repo.get_user_invoices(user_id)
+    async def get_user_invoices(self, user_id: int) -> InvoiceList:
+        invoices = await self.invoice_repo.get_user_invoices(user_id)
         return InvoiceList(invoices=invoices)
 
-    def create_invoice_from_cart(self, user_id: int) -> Invoice:
+    async def create_invoice_from_cart(self, user_id: int) -> Invoice:
         # Get user cart
-        cart_items = self.cart_repo.get_user_cart(user_id)
+        cart_items = await self.cart_repo.get_user_cart(user_id)
         if not cart_items:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="El carrito está vacío"
             )
 
+        # Las reservas del usuario se consumen con la compra (y las caducadas de otros dejan
+        # de contar); después se descuenta el stock de todas las líneas a la vez: o hay
+        # para todas o no se factura, y el rollback devuelve también las reservas
+        quantities = {item.product_id: item.quantity for item in cart_items}
+        names = {item.product_id: item.product.name for item in cart_items}
+        await self.reservation_repo.release_all(user_id, expired_of=list(quantities))
+        remaining = await self.product_repo.decrement_stock(quantities)
+        if len(remaining) < len(quantities):
+            await self.db.rollback()
+            await self._raise_out_of_stock(user_id, quantities, names)
+        # Los demás workers quitan de su caché las respuestas con estos productos
+        await self.product_change_repo.record(quantities, int(time.time()))
+
         # Calculate total
-        total_amount = self.cart_repo.get_cart_total(user_id)
+        total_amount = await self.cart_repo.get_cart_total(user_id)
 
         # Create invoice items from cart
         invoice_items = []
@@ -43,15 +64,31 @@ class InvoiceService:
             items=invoice_items
         )
 
-        invoice = self.invoice_repo.create_invoice(user_id, invoice_data)
+        # Confirma en la misma transacción el descuento de stock y la factura
+        invoice = await self.invoice_repo.create_invoice(user_id, invoice_data)
+        # Solo las respuestas cacheadas con el stock de estos productos (y su ETag) cambian
+        catalog_cache.evict_products(quantities)
 
         # Clear cart after creating invoice
-        self.cart_repo.clear_cart(user_id)
+        await self.cart_repo.clear_cart(user_id)
 
         return invoice
 
-    def get_invoice_by_id(self, invoice_id: int) -> Invoice:
-        invoice = self.invoice_repo.get_invoice_by_id(invoice_id)
+    async def _raise_out_of_stock(self, user_id: int, quantities: Dict[int, int], names: Dict[int, str]) -> None:
+        availability = await self.reservation_repo.get_availability(list(quantities), user_id)
+        available = {product_id: item["available"] for product_id, item in availability.items()}
+        short = [
+            f"{names[product_id]} (pedidas {quantity}, disponibles {available.get(product_id, 0)})"
+            for product_id, quantity in quantities.items()
+            if available.get(product_id, 0) < quantity
+        ]
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Stock insuficiente: {', '.join(short) or 'el stock cambió durante la compra'}"
+        )
+
+    async def get_invoice_by_id(self, invoice_id: int) -> Invoice:
+        invoice = await self.invoice_repo.get_invoice_by_id(invoice_id)
         if not invoice:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -59,9 +96,13 @@ class InvoiceService:
             )
         return invoice
 
-    def get_all_invoices(self) -> InvoiceList:
-        invoices = self.invoice_repo.get_all_invoices()
+    async def get_all_invoices(self) -> InvoiceList:
+        invoices = await self.invoice_repo.get_all_invoices()
         return InvoiceList(invoices=invoices)
 
-    def get_total_sales(self) -> float:
-        return self.invoice_repo.get_total_sales() 
\ No newline at end of file
+    async def get_all_invoice_rows(self) -> dict:
+        """Mismo contenido que get_all_invoices, sin modelos Pydantic (FAST_JSON_RESPONSES)"""
+        return {"invoices": await self.invoice_repo.get_all_invoice_rows()}
+
+    async def get_total_sales(self) -> float:
+        return await self.invoice_repo.get_total_sales() 
\ No newline at end of file
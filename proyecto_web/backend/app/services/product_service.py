@@ -1,19 +1,308 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
-from app.repositories.product_repository import ProductRepository
-from app.schemas.product import ProductCreate, ProductUpdate, Product
-from typing import List
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter, ValidationError
+from app.repositories.product_repository import ProductRepository, HIGHLIGHT_START, HIGHLIGHT_STOP, sort_keys
+from app.repositories.cache_version_repository import CacheVersionRepository
+from app.repositories.reservation_repository import ReservationRepository
+from app.schemas.product import (
+    ProductCreate, ProductUpdate, Product, ProductFilters, ProductSearchHit, ProductSuggestion,
+    ProductImportRow, ProductImportError, ProductImportResult, ProductAvailability
+)
+from app.utils.pagination import Page, encode_cursor, decode_cursor, InvalidCursor
+from app.utils.catalog_cache import catalog_cache, CachedBody, NOT_FOUND, CATALOG_VERSION_KEY
+from app.utils.suggest_index import product_names, PRODUCT_NAMES_VERSION_KEY
+from app.utils.record_stream import FORMATS, RecordStreamError, iter_records
+from app.config import IMPORT_CHUNK_SIZE, IMPORT_MAX_REPORTED_ERRORS, PRODUCT_BATCH_MAX_IDS, FAST_JSON_RESPONSES
+from app.utils import fast_json
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import html
+import json
+
+_product_list = TypeAdapter(List[Product])
+# Tipo esperado de cada valor de un cursor del catálogo, por columna de orden
+_CURSOR_TYPES = {"id": int, "price": (int, float), "name": str}
+_MAX_ID = 2 ** 31 - 1
+_search_hits = TypeAdapter(List[ProductSearchHit])
+
+def _mark(fragment: Optional[str]) -> Optional[str]:
+    """Escapa el fragmento y convierte los marcadores de coincidencia en <mark>"""
+    if fragment is None:
+        return None
+    escaped = html.escape(fragment, quote=False)
+    return escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
+def _clean_import_row(data: dict) -> dict:
+    # Celdas vacías del CSV = campo no informado (en altas se aplica el valor por
+    # defecto; en productos existentes se conserva el actual)
+    cleaned = {}
+    for key, value in data.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in ("", None):
+            cleaned[key] = value
+    return cleaned
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+
+def _field(item, name: str):
+    # Fila de columnas (FAST_JSON_RESPONSES) u objeto ORM
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+def _product_body(product) -> CachedBody:
+    return CachedBody.build(Product.model_validate(product).model_dump_json().encode(), product_ids=[product.id])
+
+def _not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Producto no encontrado"
+    )
 
 class ProductService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.product_repo = ProductRepository(db)
 
-    def get_all_products(self) -> List[Product]:
-        return self.product_repo.get_all()
+    async def get_all_products(self) -> List[Product]:
+        return await self.product_repo.get_all()
+
+    async def get_products_page(self, limit: Optional[int], cursor: Optional[str] = None,
+                                include_total: bool = False, filters: Optional[ProductFilters] = None,
+                                sort: str = "id") -> Page[Product]:
+        """Página de `limit` productos tras `cursor`; sin `limit`, todos los que cumplen los filtros"""
+        keys = sort_keys(sort)
+        after = None
+        if cursor:
+            # El cursor lleva la ordenación: no sirve para continuar otra distinta
+            try:
+                after = decode_cursor(cursor, sort)
+                types = [_CURSOR_TYPES[key.key] for key in keys]
+                if len(after) != len(keys) or any(
+                    isinstance(value, bool) or not isinstance(value, t) for value, t in zip(after, types)
+                ):
+                    raise InvalidCursor(cursor)
+            except InvalidCursor:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cursor de paginación inválido"
+                )
+
+        # Una fila de más indica si hay página siguiente sin contar la tabla
+        fetch = None if limit is None else limit + 1
+        if FAST_JSON_RESPONSES:
+            products = await self.product_repo.get_page_rows(fetch, after, filters, sort)
+        else:
+            products = await self.product_repo.get_page(fetch, after, filters, sort)
+        page = Page(items=products[:limit])
+        if limit is not None and len(products) > limit:
+            last = page.items[-1]
+            page.next_cursor = encode_cursor(sort, [_field(last, key.key) for key in keys])
+        if include_total:
+            page.total = await self.product_repo.count(filters)
+        return page
+
+    async def get_products_page_cached(self, limit: Optional[int], cursor: Optional[str] = None,
+                                       include_total: bool = False, filters: Optional[ProductFilters] = None,
+                                       sort: str = "id") -> CachedBody:
+        """Página del catálogo ya serializada, desde la caché si está disponible"""
+        key = ("page", limit, cursor, include_total, filters, sort)
+        cached = catalog_cache.get(key)
+        if cached is None:
+            stamp = catalog_cache.stamp()
+            page = await self.get_products_page(limit, cursor, include_total, filters, sort)
+            headers = {}
+            if page.next_cursor:
+                headers["X-Next-Cursor"] = page.next_cursor
+            if page.total is not None:
+                headers["X-Total-Count"] = str(page.total)
+            if FAST_JSON_RESPONSES:
+                body = fast_json.dumps(page.items)
+            else:
+                body = _product_list.dump_json(_product_list.validate_python(page.items, from_attributes=True))
+            # Con "solo con stock", cualquier compra puede cambiar qué productos entran
+            depends_on_all = limit is None or (filters is not None and filters.in_stock)
+            product_ids = None if depends_on_all else [_field(item, "id") for item in page.items]
+            cached = CachedBody.build(body, headers, product_ids)
+            catalog_cache.set(key, cached, stamp)
+        return cached
+
+    async def get_product_cached(self, product_id: int) -> CachedBody:
+        """Producto ya serializado; los ids inexistentes también se cachean (404 sin BD)"""
+        key = ("product", product_id)
+        cached = catalog_cache.get(key)
+        if cached is NOT_FOUND:
+            raise _not_found()
+        if cached is None:
+            stamp = catalog_cache.stamp()
+            product = await self.product_repo.get_by_id(product_id)
+            if not product:
+                catalog_cache.set(key, NOT_FOUND, stamp)
+                raise _not_found()
+            cached = _product_body(product)
+            catalog_cache.set(key, cached, stamp)
+        return cached
+
+    async def get_products_batch(self, product_ids: List[int]) -> CachedBody:
+        """Varios productos en el orden pedido, con las mismas entradas de caché que GET /products/{id}"""
+        ids = list(dict.fromkeys(product_ids))
+        if len(ids) > PRODUCT_BATCH_MAX_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Como máximo {PRODUCT_BATCH_MAX_IDS} ids por consulta"
+            )
+
+        found = {product_id: catalog_cache.get(("product", product_id)) for product_id in ids}
+        pending = [product_id for product_id, cached in found.items() if cached is None]
+        if pending:
+            stamp = catalog_cache.stamp()
+            # Un id fuera de rango de INTEGER no existe (y Postgres rechazaría el parámetro)
+            queryable = [product_id for product_id in pending if 0 < product_id <= _MAX_ID]
+            loaded = {product.id: product for product in await self.product_repo.get_by_ids(queryable)} if queryable else {}
+            for product_id in pending:
+                product = loaded.get(product_id)
+                found[product_id] = _product_body(product) if product else NOT_FOUND
+                catalog_cache.set(("product", product_id), found[product_id], stamp)
+
+        bodies = [found[product_id].body for product_id in ids if found[product_id] is not NOT_FOUND]
+        missing = [product_id for product_id in ids if found[product_id] is NOT_FOUND]
+        body = b'{"products":[' + b",".join(bodies) + b'],"missing":' + json.dumps(missing).encode() + b"}"
+        return CachedBody.build(body)
+
+    async def invalidate_catalog(self, names_changed: bool = True) -> None:
+        # La versión compartida avisa al resto de workers; este se invalida ya
+        versions = CacheVersionRepository(self.db)
+        catalog_cache.observe_version(await versions.bump(CATALOG_VERSION_KEY), source="local")
+        if names_changed:
+            # El repositorio ya aplicó el cambio al índice de sugerencias
+            product_names.advance(await versions.bump(PRODUCT_NAMES_VERSION_KEY))
+
+    @staticmethod
+    def suggest_products(prefix: str, limit: int) -> List[ProductSuggestion]:
+        """Autocompletado desde el índice en memoria, sin consultar la BD"""
+        return [ProductSuggestion(id=product_id, name=name)
+                for product_id, name in product_names.suggest(prefix, limit)]
 
-    def get_product_by_id(self, product_id: int) -> Product:
-        product = self.product_repo.get_by_id(product_id)
+    async def search_products(self, q: str, limit: int, cursor: Optional[str] = None) -> Page[ProductSearchHit]:
+        after = None
+        if cursor:
+            try:
+                rank, after_id = decode_cursor(cursor, "search")
+                after = (float(rank), int(after_id))
+            except (InvalidCursor, ValueError, TypeError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cursor de paginación inválido"
+                )
+
+        rows = await self.product_repo.search(q, limit + 1, after)
+        hits = [
+            ProductSearchHit(
+                id=row["id"],
+                name=row["name"],
+                description=row["description"],
+                price=row["price"],
+                stock=row["stock"],
+                rank=row["rank"],
+                name_highlight=_mark(row["name_highlight"]) or html.escape(row["name"], quote=False),
+                snippet=_mark(row["snippet"]) or None,
+            )
+            for row in rows[:limit]
+        ]
+        page = Page(items=hits)
+        if len(rows) > limit:
+            page.next_cursor = encode_cursor("search", [hits[-1].rank, hits[-1].id])
+        return page
+
+    async def search_products_cached(self, q: str, limit: int, cursor: Optional[str] = None) -> CachedBody:
+        key = ("search", q.strip().lower(), limit, cursor)
+        cached = catalog_cache.get(key)
+        if cached is None:
+            stamp = catalog_cache.stamp()
+            page = await self.search_products(q, limit, cursor)
+            headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else {}
+            cached = CachedBody.build(_search_hits.dump_json(page.items), headers, [hit.id for hit in page.items])
+            catalog_cache.set(key, cached, stamp)
+        return cached
+
+    def _reject(self, result: ProductImportResult, line: int, error: str, rows: int = 1) -> None:
+        result.rejected += rows
+        if len(result.errors) < IMPORT_MAX_REPORTED_ERRORS:
+            result.errors.append(ProductImportError(line=line, error=error))
+
+    async def _upsert(self, rows: List[dict], result: ProductImportResult) -> None:
+        inserted, updated, names = await self.product_repo.upsert_many(rows)
+        await self.db.commit()
+        result.inserted += inserted
+        result.updated += updated
+        # Como create/update, el índice de sugerencias se actualiza al confirmar, sin esperar al sondeo
+        await asyncio.to_thread(product_names.add_many, names)
+
+    async def _import_chunk(self, chunk: Dict[int, Tuple[int, dict]], result: ProductImportResult) -> None:
+        try:
+            await self._upsert([row for _, row in chunk.values()], result)
+        except DBAPIError:
+            await self.db.rollback()
+            # Se repite fila a fila para rechazar solo las que la base de datos no acepta
+            for line, row in chunk.values():
+                try:
+                    await self._upsert([row], result)
+                except DBAPIError as exc:
+                    await self.db.rollback()
+                    self._reject(result, line, f"Rechazada por la base de datos: {exc.orig}")
+        result.chunks += 1
+
+    async def import_products(self, chunks: AsyncIterator[bytes], fmt: str,
+                              chunk_size: int = IMPORT_CHUNK_SIZE,
+                              on_chunk: Optional[Callable[[ProductImportResult], None]] = None) -> ProductImportResult:
+        """Importa productos CSV/NDJSON por lotes de `chunk_size` filas, una transacción por lote"""
+        # Las filas inválidas se cuentan sin detener la importación; un id repetido en un
+        # lote acumula sus columnas y, si coinciden, gana la última
+        if fmt not in FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Formato de importación no soportado (csv o ndjson)"
+            )
+
+        result = ProductImportResult()
+        chunk: Dict[int, Tuple[int, dict]] = {}
+        try:
+            async for line, data, error in iter_records(chunks, fmt):
+                result.rows += 1
+                if error is None:
+                    try:
+                        row = ProductImportRow.model_validate(_clean_import_row(data))
+                    except ValidationError as exc:
+                        error = _validation_message(exc)
+                if error is not None:
+                    self._reject(result, line, error)
+                    continue
+
+                if row.id is None:
+                    # Las altas sin id se indexan por -línea para no chocar con ids reales
+                    chunk[-line] = (line, row.model_dump())
+                else:
+                    previous = chunk.get(row.id, (line, {}))[1]
+                    chunk[row.id] = (line, {**previous, **row.model_dump(exclude_unset=True)})
+                if len(chunk) >= chunk_size:
+                    await self._import_chunk(chunk, result)
+                    chunk.clear()
+                    if on_chunk:
+                        on_chunk(result)
+            if chunk:
+                await self._import_chunk(chunk, result)
+                if on_chunk:
+                    on_chunk(result)
+        except RecordStreamError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        finally:
+            if result.inserted or result.updated:
+                await self.invalidate_catalog()
+        return result
+
+    async def get_product_by_id(self, product_id: int) -> Product:
+        product = await self.product_repo.get_by_id(product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -21,26 +310,40 @@ class ProductService:
             )
         return product
 
-    def create_product(self, product_data: ProductCreate) -> Product:
-        return self.product_repo.create(product_data)
+    async def get_availability(self, product_id: int) -> ProductAvailability:
+        """Stock menos las reservas vigentes de los carritos (sin caché: cambia con cada carrito)"""
+        availability = await ReservationRepository(self.db).get_availability([product_id])
+        if product_id not in availability:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Producto no encontrado"
+            )
+        return ProductAvailability(**availability[product_id])
+
+    async def create_product(self, product_data: ProductCreate) -> Product:
+        product = await self.product_repo.create(product_data)
+        await self.invalidate_catalog()
+        return product
 
-    def update_product(self, product_id: int, product_data: ProductUpdate) -> Product:
-        product = self.product_repo.update(product_id, product_data)
+    async def update_product(self, product_id: int, product_data: ProductUpdate) -> Product:
+        product = await self.product_repo.update(product_id, product_data)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Producto no encontrado"
             )
+        await self.invalidate_catalog(names_changed="name" in product_data.model_fields_set)
         return product
 
-    def delete_product(self, product_id: int) -> dict:
-        success = self.product_repo.delete(product_id)
+    async def delete_product(self, product_id: int) -> dict:
+        success = await self.product_repo.delete(product_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Producto no encontrado"
             )
+        await self.invalidate_catalog()
         return {"message": "Producto eliminado exitosamente"}
 
-    def get_total_products(self) -> int:
-        return self.product_repo.get_total_products() 
\ No newline at end of file
+    async def get_total_products(self) -> int:
+        return await self.product_repo.get_total_products() 
\ No newline at end of file
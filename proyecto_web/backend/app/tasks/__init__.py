@@ -0,0 +1 @@
+# Tasks package 
\ No newline at end of file
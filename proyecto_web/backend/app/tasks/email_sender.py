@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import List, Optional
+
+import aiosmtplib
+
+from app.config import (
+    SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_USERNAME,
+    SMTP_PASSWORD,
+    SMTP_USE_TLS,
+    SMTP_USE_SSL,
+    SMTP_TIMEOUT_SECONDS,
+    EMAIL_OUTBOX_POLL_SECONDS,
+    EMAIL_OUTBOX_BATCH_SIZE,
+    EMAIL_MAX_ATTEMPTS,
+    EMAIL_RETRY_BASE_SECONDS
+)
+from app.database import AsyncSessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.repositories.email_outbox_repository import EmailOutboxRepository
+from app.utils.email import build_message
+from app.utils.metrics import EMAIL_OUTBOX_RESULTS, EMAIL_SEND_SECONDS, EMAIL_OUTBOX_PENDING
+
+logger = logging.getLogger("market-backend.email")
+
+# Tiempo que un lote queda reservado por este proceso antes de poder reintentarse en otro
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+class OutboxSender:
+    """Envía el outbox por lotes reutilizando una única conexión SMTP"""
+
+    def __init__(self):
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.noop()
+                return self._smtp
+            except aiosmtplib.SMTPException:
+                await self.close()
+
+        smtp = aiosmtplib.SMTP(
+            hostname=SMTP_SERVER,
+            port=SMTP_PORT,
+            username=SMTP_USERNAME,
+            password=SMTP_PASSWORD,
+            use_tls=SMTP_USE_SSL,
+            start_tls=SMTP_USE_TLS and not SMTP_USE_SSL,
+            timeout=SMTP_TIMEOUT_SECONDS
+        )
+        await smtp.connect()
+        self._smtp = smtp
+        return smtp
+
+    async def close(self) -> None:
+        if self._smtp is not None:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                pass
+            self._smtp = None
+
+    async def _claim(self) -> List[EmailOutbox]:
+        # La sesión no expira al confirmar: los mensajes se siguen leyendo tras cerrarla
+        async with AsyncSessionLocal() as db:
+            repo = EmailOutboxRepository(db)
+            messages = await repo.claim_batch(EMAIL_OUTBOX_BATCH_SIZE, CLAIM_LEASE, EMAIL_MAX_ATTEMPTS)
+            EMAIL_OUTBOX_PENDING.set(await repo.count_pending())
+            return messages
+
+    async def _record(self, sent_ids: List[int], failures: List[tuple], released_ids: List[int]) -> None:
+        async with AsyncSessionLocal() as db:
+            repo = EmailOutboxRepository(db)
+            await repo.mark_sent(sent_ids)
+            for message_id, error, retry_in in failures:
+                await repo.mark_failed(message_id, error, retry_in)
+            await repo.release(released_ids, timedelta(seconds=EMAIL_RETRY_BASE_SECONDS))
+
+    @staticmethod
+    def _retry_delay(attempts: int) -> Optional[timedelta]:
+        if attempts + 1 >= EMAIL_MAX_ATTEMPTS:
+            return None
+        return timedelta(seconds=min(EMAIL_RETRY_BASE_SECONDS * 2 ** attempts, 3600))
+
+    async def send_batch(self) -> int:
+        """Envía un lote; devuelve cuántos mensajes se intentaron enviar"""
+        messages = await self._claim()
+        if not messages:
+            return 0
+
+        # Lo que no se haya intentado a mitad del lease vuelve a la cola antes de que otro proceso lo reclame
+        deadline = time.monotonic() + CLAIM_LEASE.total_seconds() / 2
+        sent_ids, failures, released_ids = [], [], []
+        for index, message in enumerate(messages):
+            if time.monotonic() >= deadline:
+                released_ids = [pending.id for pending in messages[index:]]
+                logger.warning("Lote de emails cortado por tiempo: %s mensajes vuelven a la cola", len(released_ids))
+                break
+            start = time.perf_counter()
+            connected = False
+            try:
+                smtp = await self._connection()
+                connected = True
+                await smtp.send_message(
+                    build_message(message.recipient, message.subject, message.text_body, message.html_body)
+                )
+            except (aiosmtplib.SMTPException, OSError) as e:
+                retry_in = self._retry_delay(message.attempts)
+                failures.append((message.id, str(e), retry_in))
+                EMAIL_OUTBOX_RESULTS.labels(result="retry" if retry_in else "failed").inc()
+                logger.warning("Error enviando email %s a %s: %s", message.id, message.recipient, e)
+                # La conexión puede haber quedado en mal estado
+                await self.close()
+                if not connected:
+                    # Sin servidor no tiene sentido reconectar por cada mensaje: el resto del lote vuelve a la cola
+                    released_ids = [pending.id for pending in messages[index + 1:]]
+                    break
+            else:
+                sent_ids.append(message.id)
+                EMAIL_OUTBOX_RESULTS.labels(result="sent").inc()
+            finally:
+                EMAIL_SEND_SECONDS.observe(time.perf_counter() - start)
+
+        await self._record(sent_ids, failures, released_ids)
+        return len(messages) - len(released_ids)
+
+    async def run(self) -> None:
+        try:
+            while True:
+                try:
+                    processed = await self.send_batch()
+                except Exception:
+                    logger.exception("Error procesando el outbox de emails")
+                    processed = 0
+                if processed < EMAIL_OUTBOX_BATCH_SIZE:
+                    # Sin más trabajo inmediato: no mantener la conexión abierta en reposo
+                    if processed == 0:
+                        await self.close()
+                    await asyncio.sleep(EMAIL_OUTBOX_POLL_SECONDS)
+        finally:
+            await self.close()
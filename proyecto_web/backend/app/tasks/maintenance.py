@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from app.config import (
+    PASSWORD_RESET_SWEEP_SECONDS, EMAIL_OUTBOX_ENABLED, DB_REPLICA_CHECK_SECONDS, CATALOG_CACHE_POLL_SECONDS,
+    RESERVATION_SWEEP_SECONDS, RESERVATION_SWEEP_BATCH_SIZE, EMAIL_OUTBOX_RETENTION_HOURS,
+    TOKEN_REVOCATION_POLL_SECONDS, CATALOG_CACHE_TTL_SECONDS
+)
+from app.database import AsyncSessionLocal, replicas
+from app.repositories.password_reset_repository import PasswordResetRepository
+from app.repositories.email_outbox_repository import EmailOutboxRepository
+from app.repositories.cache_version_repository import CacheVersionRepository
+from app.repositories.product_repository import ProductRepository
+from app.repositories.product_change_repository import ProductChangeRepository
+from app.repositories.reservation_repository import ReservationRepository
+from app.repositories.token_revocation_repository import TokenRevocationRepository
+from app.tasks.email_sender import OutboxSender
+from app.utils.catalog_cache import catalog_cache, CATALOG_VERSION_KEY
+from app.utils.suggest_index import product_names, PRODUCT_NAMES_VERSION_KEY
+from app.utils.auth import apply_token_revocation, revocation_horizon
+
+logger = logging.getLogger("market-backend.tasks")
+
+_tasks: List[asyncio.Task] = []
+
+# Solape entre sondeos de token_revocations: cubre revocaciones confirmadas justo después
+# de leer la tabla con un not_before anterior a la lectura
+_REVOCATION_POLL_OVERLAP_SECONDS = 5
+_revocations_polled_at: Optional[int] = None
+# Igual para product_changes (cambios de stock por compras)
+_PRODUCT_CHANGES_POLL_OVERLAP_SECONDS = 5
+_product_changes_polled_at: Optional[int] = None
+
+
+async def run_periodically(name: str, interval: float, job: Callable[[], Awaitable[None]]) -> None:
+    """Ejecuta un trabajo asíncrono cada `interval` segundos"""
+    while True:
+        try:
+            await job()
+        except Exception:
+            logger.exception("Error en la tarea periódica %s", name)
+        await asyncio.sleep(interval)
+
+
+async def purge_expired_records() -> None:
+    """Tokens de reset caducados y emails ya enviados o fallidos (con tokens en el cuerpo)"""
+    async with AsyncSessionLocal() as db:
+        deleted = await PasswordResetRepository(db).delete_expired()
+        if deleted:
+            logger.info("Tokens de reset caducados eliminados: %s", deleted)
+        purged = await EmailOutboxRepository(db).delete_finished(timedelta(hours=EMAIL_OUTBOX_RETENTION_HOURS))
+        if purged:
+            logger.info("Emails enviados o fallidos eliminados del outbox: %s", purged)
+        await TokenRevocationRepository(db).delete_before(revocation_horizon())
+        # Un cambio más antiguo que la caducidad de la caché ya no afecta a ninguna entrada
+        await ProductChangeRepository(db).delete_before(
+            int(time.time()) - CATALOG_CACHE_TTL_SECONDS - _PRODUCT_CHANGES_POLL_OVERLAP_SECONDS
+        )
+
+
+async def release_expired_reservations() -> None:
+    # Las reservas caducadas ya no cuentan como apartadas; esto solo libera las filas
+    async with AsyncSessionLocal() as db:
+        deleted = await ReservationRepository(db).delete_expired(RESERVATION_SWEEP_BATCH_SIZE)
+        if deleted:
+            logger.info("Reservas de stock caducadas liberadas: %s", deleted)
+
+
+async def refresh_catalog_version() -> None:
+    global _product_changes_polled_at
+    polled_at = int(time.time())
+    since = polled_at - CATALOG_CACHE_TTL_SECONDS
+    if _product_changes_polled_at is not None:
+        since = max(since, _product_changes_polled_at - _PRODUCT_CHANGES_POLL_OVERLAP_SECONDS)
+    # Siempre contra el primario: una réplica atrasada haría perder invalidaciones
+    async with AsyncSessionLocal() as db:
+        versions = CacheVersionRepository(db)
+        catalog_cache.observe_version(await versions.get(CATALOG_VERSION_KEY))
+        catalog_cache.evict_products(await ProductChangeRepository(db).changed_since(since), source="remote")
+        names_version = await versions.get(PRODUCT_NAMES_VERSION_KEY)
+        if product_names.version != names_version:
+            # Los nombres se leen después de la versión: si entretanto hay otra
+            # escritura, la próxima comprobación vuelve a reconstruir
+            names = await ProductRepository(db).get_names()
+            # Ordenar todo el catálogo lleva su tiempo: fuera del bucle de eventos
+            await asyncio.to_thread(product_names.rebuild, names, names_version)
+            logger.info("Índice de sugerencias reconstruido: %s productos", len(product_names))
+    _product_changes_polled_at = polled_at
+
+
+async def refresh_token_revocations() -> None:
+    """Aplica las revocaciones de tokens registradas por cualquier worker desde el último sondeo"""
+    global _revocations_polled_at
+    polled_at = int(time.time())
+    since = revocation_horizon()
+    if _revocations_polled_at is not None:
+        since = max(since, _revocations_polled_at - _REVOCATION_POLL_OVERLAP_SECONDS)
+    async with AsyncSessionLocal() as db:
+        for revocation in await TokenRevocationRepository(db).changed_since(since):
+            apply_token_revocation(revocation.user_id, revocation.email, revocation.version, revocation.not_before)
+    _revocations_polled_at = polled_at
+
+
+def start_background_tasks() -> None:
+    _tasks.append(asyncio.create_task(
+        run_periodically("purge_expired_records", PASSWORD_RESET_SWEEP_SECONDS, purge_expired_records)
+    ))
+    _tasks.append(asyncio.create_task(
+        run_periodically("release_expired_reservations", RESERVATION_SWEEP_SECONDS, release_expired_reservations)
+    ))
+    _tasks.append(asyncio.create_task(
+        run_periodically("refresh_catalog_version", CATALOG_CACHE_POLL_SECONDS, refresh_catalog_version)
+    ))
+    _tasks.append(asyncio.create_task(
+        run_periodically("refresh_token_revocations", TOKEN_REVOCATION_POLL_SECONDS, refresh_token_revocations)
+    ))
+    if replicas.replicas:
+        _tasks.append(asyncio.create_task(
+            run_periodically("check_replicas", DB_REPLICA_CHECK_SECONDS, replicas.check)
+        ))
+    if EMAIL_OUTBOX_ENABLED:
+        _tasks.append(asyncio.create_task(OutboxSender().run()))
+
+
+async def stop_background_tasks() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -1,13 +1,25 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, PASSWORD_RESET_TOKEN_EXPIRE_MINUTES
-from app.database import SessionLocal
+from app.config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
+    USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_SIZE, TOKEN_CACHE_MAX_SIZE, JWT_STATELESS_PRINCIPAL
+)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal, get_db
 from app.models.user import User
+from app.repositories.token_revocation_repository import TokenRevocationRepository
+from app.utils.cache import TTLCache
+from app.utils.metrics import USER_CACHE_LOOKUPS, TOKEN_CACHE_LOOKUPS, TOKEN_CACHE_SECONDS_SAVED
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -16,6 +28,13 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 # Password utils
+def configure_bcrypt_rounds(rounds: int) -> None:
+    """Fija el coste de bcrypt; los hashes con menos rondas pasan a necesitar rehash"""
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+def needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -29,49 +48,187 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def verify_token(token: str) -> Optional[str]:
+def create_user_access_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    """Token de acceso con los datos del usuario necesarios para el modo sin estado"""
+    return create_access_token(
+        data={
+            "sub": user.email,
+            "is_admin": user.is_admin,
+            "uid": user.id,
+            "name": user.name,
+            "ver": current_token_version(user),
+            "iat": int(time.time())
+        },
+        expires_delta=expires_delta
+    )
+
+# Verified tokens cache
+# payload y coste de decodificación, indexados por el hash del token; cada entrada expira con su "exp"
+token_cache = TTLCache(maxsize=TOKEN_CACHE_MAX_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def decode_access_token(token: str) -> Optional[dict]:
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        payload, decode_seconds = cached
+        if payload["exp"] > time.time():
+            TOKEN_CACHE_LOOKUPS.labels(result="hit").inc()
+            TOKEN_CACHE_SECONDS_SAVED.inc(decode_seconds)
+            return payload
+
+    TOKEN_CACHE_LOOKUPS.labels(result="miss").inc()
+    start = time.perf_counter()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
     except JWTError:
         return None
+    decode_seconds = time.perf_counter() - start
 
-# Reset Password Token
-def create_reset_token(email: str) -> str:
-    expire = datetime.utcnow() + timedelta(minutes=PASSWORD_RESET_TOKEN_EXPIRE_MINUTES)
-    payload = {"sub": email, "exp": expire}
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    if payload.get("sub") is None:
+        return None
+    if "exp" in payload:
+        token_cache.set(key, (payload, decode_seconds), ttl=payload["exp"] - time.time())
+    return payload
 
-def verify_reset_token(token: str) -> Optional[str]:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
-    except JWTError:
+def verify_token(token: str) -> Optional[str]:
+    payload = decode_access_token(token)
+    return payload["sub"] if payload else None
+
+# Token versions
+def token_version(hashed_password: str) -> str:
+    """Versión de token para una contraseña nueva, derivada de su hash"""
+    return hashlib.sha256(hashed_password.encode()).hexdigest()[:12]
+
+def current_token_version(user: User) -> str:
+    """Versión que deben llevar los tokens del usuario (se conserva al recalcular el hash)"""
+    return user.token_version or token_version(user.hashed_password)
+
+# Vista en memoria de la tabla token_revocations: (versión vigente o None, instante desde el
+# que son válidos los tokens) por usuario. Cada worker la refresca sondeando la tabla.
+# Solo hace falta recordar cada entrada mientras vivan los tokens emitidos antes de ella.
+_token_versions: Dict[int, Tuple[Optional[str], int]] = {}
+_token_versions_lock = threading.Lock()
+
+def revocation_horizon() -> int:
+    """Las revocaciones anteriores a este instante ya no afectan a ningún token vigente"""
+    return int(time.time()) - ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int, email: str, new_version: Optional[str] = None) -> None:
+    """Invalida los tokens ya emitidos de un usuario y confirma la transacción en curso con la revocación"""
+    not_before = int(time.time())
+    await TokenRevocationRepository(db).revoke(user_id, email, new_version, not_before)
+    await db.commit()
+    apply_token_revocation(user_id, email, new_version, not_before)
+
+def apply_token_revocation(user_id: int, email: str, version: Optional[str], not_before: int) -> None:
+    """Aplica en este proceso una revocación registrada en token_revocations"""
+    horizon = revocation_horizon()
+    with _token_versions_lock:
+        current = _token_versions.get(user_id)
+        if current is None or current[1] <= not_before:
+            _token_versions[user_id] = (version, not_before)
+        for stale_id in [uid for uid, (_, since) in _token_versions.items() if since < horizon]:
+            del _token_versions[stale_id]
+    invalidate_cached_user(email)
+
+def is_token_revoked(payload: dict) -> bool:
+    entry = _token_versions.get(payload.get("uid"))
+    if entry is None:
+        return False
+    version, not_before = entry
+    if version is not None and payload.get("ver") == version:
+        return False
+    return payload.get("iat", 0) < not_before
+
+@dataclass(frozen=True)
+class Principal:
+    """Usuario autenticado reconstruido solo a partir del token, sin acceso a la BD"""
+    id: int
+    email: str
+    name: str
+    is_admin: bool
+
+def principal_from_token(payload: dict) -> Optional[Principal]:
+    if not all(claim in payload for claim in ("uid", "name", "ver")):
+        # Tokens emitidos antes del modo sin estado: se resuelven contra la BD
+        return None
+    if payload.get("is_admin"):
+        # El rol de administrador no se toma del token: se comprueba contra la BD
         return None
+    return Principal(
+        id=payload["uid"],
+        email=payload["sub"],
+        name=payload["name"],
+        is_admin=False
+    )
+
+# Authenticated user cache
+# Usuarios (desvinculados de la sesión) indexados por email, el "sub" del token
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+def invalidate_cached_user(email: str) -> None:
+    """Elimina un usuario de la caché tras un cambio de contraseña o una revocación"""
+    user_cache.pop(email)
+
+async def get_user_by_email_cached(email: str, db: Optional[AsyncSession] = None) -> Optional[User]:
+    """Usuario por email desde la caché; si falla se consulta con `db` (o una sesión propia)"""
+    user = user_cache.get(email)
+    if user is not None:
+        USER_CACHE_LOOKUPS.labels(result="hit").inc()
+        return user
+
+    USER_CACHE_LOOKUPS.labels(result="miss").inc()
+    if db is None:
+        async with AsyncSessionLocal() as own_db:
+            user = await _load_detached_user(own_db, email)
+    else:
+        user = await _load_detached_user(db, email)
+
+    if user is not None:
+        user_cache.set(email, user)
+    return user
+
+async def _load_detached_user(db: AsyncSession, email: str) -> Optional[User]:
+    result = await db.execute(select(User).filter(User.email == email))
+    user = result.scalars().first()
+    if user is not None:
+        # La instancia cacheada no debe quedar ligada a ninguna sesión
+        db.expunge(user)
+    return user
 
 # Authenticated user
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+async def user_from_token_payload(payload: Optional[dict], db: Optional[AsyncSession] = None) -> Optional[Union[User, Principal]]:
+    """Usuario de un token ya decodificado; None si no es válido, está revocado o es de una contraseña anterior"""
+    if payload is None or is_token_revoked(payload):
+        return None
+
+    if JWT_STATELESS_PRINCIPAL:
+        principal = principal_from_token(payload)
+        if principal is not None:
+            return principal
+
+    user = await get_user_by_email_cached(payload["sub"], db)
+    if user is None:
+        return None
+    # Tokens emitidos antes del último cambio de contraseña
+    if "ver" in payload and payload["ver"] != current_token_version(user):
+        return None
+    return user
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> Union[User, Principal]:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    email = verify_token(credentials.credentials)
-    if email is None:
+    user = await user_from_token_payload(decode_access_token(credentials.credentials), db)
+    if user is None:
         raise credentials_exception
-    
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.email == email).first()
-        if user is None:
-            raise credentials_exception
-        return user
-    finally:
-        db.close()
+    return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: Union[User, Principal] = Depends(get_current_user)) -> Union[User, Principal]:
     return current_user
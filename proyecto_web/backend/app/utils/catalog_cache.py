@@ -0,0 +1,122 @@
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+from app.config import CATALOG_CACHE_TTL_SECONDS, CATALOG_CACHE_MAX_ENTRIES
+from app.utils.cache import TTLCache
+from app.utils.metrics import CATALOG_CACHE_LOOKUPS, CATALOG_CACHE_INVALIDATIONS, CATALOG_CACHE_EVICTIONS
+
+logger = logging.getLogger("market-backend.catalog")
+
+CATALOG_VERSION_KEY = "catalog"
+
+# Marca de "no existe" para la caché negativa de ids
+NOT_FOUND = object()
+
+
+def make_etag(body: bytes) -> str:
+    """ETag fuerte: depende solo de los bytes exactos de la respuesta"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    """Respuesta JSON ya serializada, lista para servirse sin tocar la BD"""
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    etag: str = ""
+    # Productos cuyo stock aparece en la respuesta; None = depende de todo el catálogo
+    product_ids: Optional[FrozenSet[int]] = None
+
+    @classmethod
+    def build(cls, body: bytes, headers: Optional[Dict[str, str]] = None,
+              product_ids: Optional[Iterable[int]] = None) -> "CachedBody":
+        return cls(body=body, headers=headers or {}, etag=make_etag(body),
+                   product_ids=None if product_ids is None else frozenset(product_ids))
+
+    def shows_any(self, product_ids: FrozenSet[int]) -> bool:
+        return self.product_ids is None or not self.product_ids.isdisjoint(product_ids)
+
+
+class CatalogCache:
+    """Caché por proceso del catálogo: vaciada al cambiar su versión en cache_versions, o por producto tras una compra"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.version: Optional[int] = None
+        # Número de expulsiones por producto y la última que afectó a cada producto
+        self._evictions = 0
+        self._evicted_at: Dict[int, int] = {}
+
+    def stamp(self) -> Tuple[Optional[int], int]:
+        """Estado de la caché antes de leer de la BD, para `set`"""
+        return self.version, self._evictions
+
+    def get(self, key: Hashable):
+        value = self._entries.get(key)
+        if value is None:
+            CATALOG_CACHE_LOOKUPS.labels(result="miss").inc()
+        elif value is NOT_FOUND:
+            CATALOG_CACHE_LOOKUPS.labels(result="negative_hit").inc()
+        else:
+            CATALOG_CACHE_LOOKUPS.labels(result="hit").inc()
+        return value
+
+    def set(self, key: Hashable, value, stamp: Tuple[Optional[int], int]) -> None:
+        # Una lectura iniciada antes de una invalidación, o de un cambio de stock de
+        # alguno de sus productos, no debe repoblar la caché
+        version, evictions = stamp
+        if version != self.version:
+            return
+        if isinstance(value, CachedBody) and evictions != self._evictions:
+            if value.product_ids is None or any(
+                self._evicted_at.get(product_id, -1) >= evictions for product_id in value.product_ids
+            ):
+                return
+        self._entries.set(key, value)
+
+    def observe_version(self, version: int, source: str = "remote") -> None:
+        if version == self.version:
+            return
+        if self.version is not None:
+            CATALOG_CACHE_INVALIDATIONS.labels(source=source).inc()
+            logger.info("Catálogo en versión %s (%s): caché vaciada", version, source)
+        self.version = version
+        self._evicted_at.clear()
+        self._entries.clear()
+
+    def evict_products(self, product_ids: Iterable[int], source: str = "local") -> None:
+        """Quita las entradas que muestran el stock de alguno de los productos"""
+        ids = frozenset(product_ids)
+        if not ids:
+            return
+        for product_id in ids:
+            self._evicted_at[product_id] = self._evictions
+        self._evictions += 1
+        evicted = self._entries.pop_where(lambda value: isinstance(value, CachedBody) and value.shows_any(ids))
+        CATALOG_CACHE_EVICTIONS.labels(source=source).inc(evicted)
+
+
+catalog_cache = CatalogCache(maxsize=CATALOG_CACHE_MAX_ENTRIES, ttl=CATALOG_CACHE_TTL_SECONDS)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): ignora el prefijo W/"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cached_json_response(request: Request, cached: CachedBody,
+                         extra_headers: Optional[Dict[str, str]] = None) -> Response:
+    """200 con el cuerpo cacheado, o 304 sin cuerpo si el cliente ya tiene esa versión"""
+    headers = {"ETag": cached.etag, **cached.headers, **(extra_headers or {})}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -0,0 +1,183 @@
+import logging
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+from app.utils.http_cache import add_vary
+from app.utils.metrics import HTTP_COMPRESSION_BYTES
+
+logger = logging.getLogger("market-backend.compression")
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+    logger.info("brotli no está instalado: las respuestas se comprimirán solo con gzip")
+
+# Tipos que merece la pena comprimir (JSON de la API y exportaciones CSV/NDJSON)
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """"br" o "gzip" según Accept-Encoding (con sus q-values); None si no acepta ninguno"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            weights[coding.strip()] = q
+    available = ("br", "gzip") if brotli is not None else ("gzip",)
+    # A igualdad de peso se prefiere brotli: comprime más a un coste parecido
+    candidates = [(weights.get(c, weights.get("*", 0.0)), -i, c) for i, c in enumerate(available)]
+    q, _, coding = max(candidates)
+    return coding if q > 0 else None
+
+
+class _Encoder:
+    """Compresor incremental: cada trozo se vacía al cliente sin esperar al siguiente"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        self.bytes_in += len(data)
+        if self.encoding == "br":
+            out = self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+        else:
+            out = self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        self.bytes_out += len(out)
+        if final:
+            HTTP_COMPRESSION_BYTES.labels(encoding=self.encoding, stage="in").inc(self.bytes_in)
+            HTTP_COMPRESSION_BYTES.labels(encoding=self.encoding, stage="out").inc(self.bytes_out)
+        return out
+
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    """ETag propio de la variante codificada: sigue siendo fuerte, pero distinto del original"""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def _decode_if_none_match(if_none_match: str, encoding: str) -> str:
+    """If-None-Match para la ruta: solo cuentan los ETags de la variante en `encoding`, sin su sufijo"""
+    suffix = f'-{encoding}"'
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return ", ".join(tag[:-len(suffix)] + '"' if tag.endswith(suffix) else tag
+                     for tag in tags if tag == "*" or tag.endswith(suffix))
+
+
+class CompressionMiddleware:
+    """Middleware ASGI: comprime con brotli o gzip las respuestas de texto/JSON (ETag por codificación)"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE,
+                 gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is not None and "if-none-match" in request_headers:
+            # El cliente revalida con el ETag de la variante comprimida que recibió; uno sin
+            # sufijo corresponde a la variante sin comprimir y no debe dar 304
+            scope = {**scope, "headers": list(scope["headers"])}
+            MutableHeaders(scope=scope)["if-none-match"] = _decode_if_none_match(
+                request_headers["if-none-match"], encoding
+            )
+        start_message = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                passthrough = True
+                if message["status"] == 304:
+                    # Mismos validadores que el 200 que revalida
+                    add_vary(headers, "Accept-Encoding")
+                    if encoding is not None and "etag" in headers:
+                        headers["etag"] = _encoded_etag(headers["etag"], encoding)
+                elif (message["status"] != 204 and "content-encoding" not in headers
+                        and is_compressible(headers.get("content-type", ""))):
+                    add_vary(headers, "Accept-Encoding")
+                    if encoding is not None:
+                        # También bajo COMPRESSION_MIN_SIZE: el 304 no sabe si el 200 se habría comprimido
+                        if "etag" in headers:
+                            headers["etag"] = _encoded_etag(headers["etag"], encoding)
+                        passthrough = False
+                if passthrough:
+                    await send(message)
+                    return
+                # Se espera al primer trozo del cuerpo para saber si compensa
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(scope=start_message)
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers["content-encoding"] = encoding
+                if more_body:
+                    del headers["content-length"]
+                else:
+                    body = encoder.compress(body, final=True)
+                    headers["content-length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+
+            await send({
+                "type": "http.response.body",
+                "body": encoder.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
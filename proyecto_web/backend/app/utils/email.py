@@ -1,17 +1,32 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import (
-    SMTP_SERVER,
-    SMTP_PORT,
-    SMTP_USERNAME,
-    SMTP_PASSWORD,
     FROM_EMAIL,
     FRONTEND_URL
 )
+from app.repositories.email_outbox_repository import EmailOutboxRepository
 
-def send_password_reset_email(email: str, name: str, reset_token: str) -> None:
-    """Envía email con enlace para resetear contraseña"""
+def build_message(recipient: str, subject: str, text_body: str, html_body: Optional[str] = None) -> MIMEMultipart:
+    """Construye el mensaje MIME (texto + HTML opcional)"""
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = FROM_EMAIL
+    msg["To"] = recipient
+
+    msg.attach(MIMEText(text_body, "plain"))
+    if html_body:
+        msg.attach(MIMEText(html_body, "html"))
+    return msg
+
+async def send_password_reset_email(db: AsyncSession, email: str, name: str, reset_token: str) -> None:
+    """Encola el email con el enlace para resetear contraseña (lo envía el outbox en segundo plano). No hace commit"""
+    subject, text_body, html_body = build_password_reset_email(name, reset_token)
+    await EmailOutboxRepository(db).enqueue(email, subject, text_body, html_body)
+
+def build_password_reset_email(name: str, reset_token: str) -> Tuple[str, str, str]:
+    """Devuelve asunto, texto plano y HTML del email de reset de contraseña"""
     
     # URL de reset (debes ajustar según tu frontend)
     reset_url = f"{FRONTEND_URL}/reset-password?token={reset_token}"
@@ -76,25 +91,4 @@ def send_password_reset_email(email: str, name: str, reset_token: str) -> None:
     El equipo de soporte
     """
     
-    # Crear mensaje
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"] = FROM_EMAIL
-    msg["To"] = email
-    
-    # Añadir partes del mensaje
-    text_part = MIMEText(text_body, "plain")
-    html_part = MIMEText(html_body, "html")
-    
-    msg.attach(text_part)
-    msg.attach(html_part)
-    
-    # Enviar email
-    try:
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
-    except Exception as e:
-        print(f"Error enviando email: {e}")
-        raise e
\ No newline at end of file
+    return subject, text_body, html_body
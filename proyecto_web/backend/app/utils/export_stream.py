@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Mapping, Sequence
+
+# Los registros se agrupan en bloques de este tamaño antes de enviarlos: un envío
+# por fila multiplicaría las llamadas al servidor ASGI
+BUFFER_BYTES = 64 * 1024
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def ndjson_stream(records: AsyncIterator[Mapping[str, Any]]) -> AsyncIterator[bytes]:
+    """Un objeto JSON por línea"""
+    buffer, size = [], 0
+    async for record in records:
+        line = json.dumps(record, ensure_ascii=False, default=_plain) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_BYTES:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+async def csv_stream(records: AsyncIterator[Mapping[str, Any]], columns: Sequence[str]) -> AsyncIterator[bytes]:
+    """CSV con cabecera y las columnas indicadas, en ese orden"""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    async for record in records:
+        writer.writerow([_plain(record[column]) for column in columns])
+        if out.tell() >= BUFFER_BYTES:
+            yield out.getvalue().encode()
+            out.seek(0)
+            out.truncate()
+    yield out.getvalue().encode()
@@ -0,0 +1,55 @@
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Mapping, Sequence, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.config import FAST_JSON_RESPONSES
+
+logger = logging.getLogger("market-backend.json")
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    if FAST_JSON_RESPONSES:
+        logger.warning("orjson no está instalado: FAST_JSON_RESPONSES usará el módulo json estándar")
+
+# Respuestas JSON de listados serializadas directamente desde filas de columnas,
+# sin pasar por los modelos Pydantic: los datos vienen de la BD y ya son válidos.
+# La salida es la misma que la de los esquemas (mismo orden de campos y formato
+# de fechas con "Z" para UTC, Decimal como cadena) siempre que las filas se
+# seleccionen en ese orden.
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} no es serializable a JSON")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+
+def schema_columns(schema: Type[BaseModel], model, exclude: Sequence[str] = ()) -> list:
+    """Columnas de `model` con los campos de `schema`, en el orden en que los serializa"""
+    return [getattr(model, field) for field in schema.model_fields if field not in exclude]
+
+
+def rows_as_dicts(rows: Iterable[Mapping[str, Any]]) -> List[dict]:
+    return [dict(row) for row in rows]
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
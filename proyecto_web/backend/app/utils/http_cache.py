@@ -0,0 +1,67 @@
+from typing import Dict, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+from app.config import CATALOG_HTTP_MAX_AGE, CATALOG_HTTP_S_MAXAGE, CATALOG_HTTP_STALE_WHILE_REVALIDATE
+
+# Contenido igual para todos los usuarios: navegadores y CDN pueden guardarlo y,
+# al caducar, revalidarlo con If-None-Match contra el ETag de la caché del catálogo
+PUBLIC_CATALOG = (
+    f"public, max-age={CATALOG_HTTP_MAX_AGE}, s-maxage={CATALOG_HTTP_S_MAXAGE}, "
+    f"stale-while-revalidate={CATALOG_HTTP_STALE_WHILE_REVALIDATE}"
+)
+# Todo lo demás depende del usuario (carrito, facturas, tokens...) o del momento
+# (health, métricas): ni CDN ni navegador lo guardan
+PRIVATE = "private, no-store"
+
+# (método, ruta tal como se declara en el router) -> Cache-Control.
+# Vary: Accept-Encoding lo añade CompressionMiddleware a toda respuesta comprimible;
+# las privadas además varían con Authorization
+CACHE_POLICIES: Dict[Tuple[str, str], str] = {
+    ("GET", "/products/"): PUBLIC_CATALOG,
+    ("GET", "/products/search"): PUBLIC_CATALOG,
+    ("GET", "/products/suggest"): PUBLIC_CATALOG,
+    ("GET", "/products/batch"): PUBLIC_CATALOG,
+    ("GET", "/products/{product_id}"): PUBLIC_CATALOG,
+}
+
+# Solo se guardan en caché las respuestas correctas; un 404 o un 500 no
+CACHEABLE_STATUS = (200, 304)
+
+
+def cache_policy(method: str, route_path: str, status: int) -> str:
+    if status in CACHEABLE_STATUS:
+        return CACHE_POLICIES.get((method, route_path), PRIVATE)
+    return PRIVATE
+
+
+def add_vary(headers: MutableHeaders, value: str) -> None:
+    """Añade `value` a la cabecera Vary sin duplicarlo"""
+    vary = [v.strip() for v in headers.get("vary", "").split(",") if v.strip()]
+    if value.lower() not in (v.lower() for v in vary) and "*" not in vary:
+        headers["vary"] = ", ".join(vary + [value])
+
+
+class CacheControlMiddleware:
+    """Middleware ASGI: Cache-Control según la plantilla de la ruta (ver CACHE_POLICIES), si no lo puso el endpoint"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if "cache-control" not in headers:
+                    route = scope.get("route")
+                    method = "GET" if scope["method"] == "HEAD" else scope["method"]
+                    headers["cache-control"] = cache_policy(method, getattr(route, "path", ""), message["status"])
+                if headers["cache-control"] == PRIVATE:
+                    add_vary(headers, "Authorization")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,167 @@
+# Métricas Prometheus propias de la aplicación.
+# Se registran en el registro por defecto de prometheus_client, el mismo que
+# expone el Instrumentator en /metrics.
+from prometheus_client import Counter, Gauge, Histogram
+
+# ================================
+# BASE DE DATOS
+# ================================
+DB_POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Espera para obtener una conexión del pool",
+    ["engine"],  # sync, async
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Peticiones de conexión que agotaron DB_POOL_TIMEOUT",
+    ["engine"]
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Conexiones del pool actualmente en uso",
+    ["engine"]
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Conexiones abiertas por encima de DB_POOL_SIZE (negativo: huecos libres en el pool base)",
+    ["engine"]
+)
+
+DB_REPLICA_HEALTHY = Gauge(
+    "db_replica_healthy",
+    "1 si la réplica respondió al último chequeo de salud",
+    ["replica"]
+)
+
+DB_REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds",
+    "Retraso de replicación medido en el último chequeo",
+    ["replica"]
+)
+
+DB_READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Sesiones de solo lectura por destino",
+    ["target"]  # primary, replica0, replica1...
+)
+
+HTTP_REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "Sentencias SQL ejecutadas por petición",
+    ["handler"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+)
+
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Tiempo de BD acumulado por petición",
+    ["handler"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+DB_REPEATED_STATEMENTS = Counter(
+    "db_repeated_statements_total",
+    "Peticiones que repiten la misma sentencia QUERY_REPEAT_THRESHOLD veces o más (posible N+1)",
+    ["handler"]
+)
+
+# ================================
+# HTTP
+# ================================
+HTTP_COMPRESSION_BYTES = Counter(
+    "http_compression_bytes_total",
+    "Bytes de cuerpos de respuesta antes y después de comprimir",
+    ["encoding", "stage"]  # encoding: br, gzip / stage: in, out
+)
+
+# ================================
+# AUTENTICACIÓN
+# ================================
+USER_CACHE_LOOKUPS = Counter(
+    "auth_user_cache_lookups_total",
+    "Búsquedas en la caché de usuarios autenticados",
+    ["result"]  # hit, miss
+)
+
+TOKEN_CACHE_LOOKUPS = Counter(
+    "auth_token_cache_lookups_total",
+    "Búsquedas en la caché de tokens JWT ya verificados",
+    ["result"]  # hit, miss
+)
+
+TOKEN_CACHE_SECONDS_SAVED = Counter(
+    "auth_token_cache_seconds_saved_total",
+    "Tiempo de jwt.decode ahorrado por aciertos en la caché de tokens"
+)
+
+LOGIN_THROTTLED = Counter(
+    "auth_login_throttled_total",
+    "Intentos de login rechazados antes de verificar la contraseña",
+    ["scope", "reason"]  # scope: email, email_ip, ip / reason: window, backoff
+)
+
+LOGIN_FAILURES = Counter(
+    "auth_login_failures_total",
+    "Intentos de login con credenciales incorrectas"
+)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Latencia de hashing/verificación bcrypt, incluida la espera en cola",
+    ["operation"],  # hash, verify
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "Operaciones bcrypt en curso o en cola en el pool de hashing"
+)
+
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Operaciones bcrypt rechazadas por cola llena"
+)
+
+# ================================
+# CATÁLOGO
+# ================================
+CATALOG_CACHE_LOOKUPS = Counter(
+    "catalog_cache_lookups_total",
+    "Búsquedas en la caché del catálogo de productos",
+    ["result"]  # hit, negative_hit, miss
+)
+
+CATALOG_CACHE_INVALIDATIONS = Counter(
+    "catalog_cache_invalidations_total",
+    "Vaciados de la caché del catálogo",
+    ["source"]  # local: escritura en este worker, remote: versión cambiada por otro
+)
+
+CATALOG_CACHE_EVICTIONS = Counter(
+    "catalog_cache_evictions_total",
+    "Entradas de la caché del catálogo quitadas por un cambio de stock de sus productos",
+    ["source"]  # local: compra en este worker, remote: compra en otro
+)
+
+# ================================
+# EMAIL
+# ================================
+EMAIL_OUTBOX_RESULTS = Counter(
+    "email_outbox_results_total",
+    "Resultado de cada intento de envío del outbox de emails",
+    ["result"]  # sent, retry, failed
+)
+
+EMAIL_SEND_SECONDS = Histogram(
+    "email_send_seconds",
+    "Latencia de envío SMTP por mensaje (incluye conexión si hay que abrirla)"
+)
+
+EMAIL_OUTBOX_PENDING = Gauge(
+    "email_outbox_pending",
+    "Mensajes pendientes de envío en el outbox"
+)
@@ -0,0 +1,36 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class InvalidCursor(ValueError):
+    """Cursor manipulado, corrupto o de otra ordenación"""
+
+
+@dataclass
+class Page(Generic[T]):
+    """Una página de resultados con el cursor de la siguiente (None si es la última)"""
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+def encode_cursor(sort: str, values: List[Any]) -> str:
+    """Cursor opaco con la clave de la última fila devuelta (clave de orden + id)"""
+    payload = json.dumps({"s": sort, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+        if payload["s"] != sort or not isinstance(values, list):
+            raise InvalidCursor(cursor)
+        return values
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor(cursor)
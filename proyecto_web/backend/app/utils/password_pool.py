@@ -0,0 +1,110 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import (
+    HASH_POOL_WORKERS, HASH_POOL_MAX_PENDING,
+    BCRYPT_ROUNDS, BCRYPT_TARGET_MS, BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS
+)
+from app.utils.auth import pwd_context, configure_bcrypt_rounds
+from app.utils.metrics import PASSWORD_HASH_SECONDS, PASSWORD_HASH_PENDING, PASSWORD_HASH_REJECTED
+
+
+class HashPoolBusy(Exception):
+    """La cola del pool de hashing está llena"""
+
+
+# Pool de procesos para bcrypt: el hashing es CPU puro, así que fuera del GIL
+# escala con los núcleos y no ocupa los hilos que atienden el resto de endpoints
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+_bcrypt_rounds: Optional[int] = None
+
+
+def measure_bcrypt_seconds(rounds: int, samples: int = 3) -> float:
+    """Mejor tiempo de varios hashes con el coste indicado"""
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    best = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash("calibration-password")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate_bcrypt_rounds(target_ms: int = BCRYPT_TARGET_MS,
+                            min_rounds: int = BCRYPT_MIN_ROUNDS,
+                            max_rounds: int = BCRYPT_MAX_ROUNDS) -> int:
+    """Mayor número de rondas cuyo hash no supera target_ms en este hardware"""
+    rounds = min_rounds
+    elapsed = measure_bcrypt_seconds(min_rounds)
+    while rounds < max_rounds and elapsed * 2 * 1000 <= target_ms:
+        rounds += 1
+        elapsed *= 2
+    return rounds
+
+
+def setup_password_hashing() -> int:
+    """Decide el coste de bcrypt para este proceso y sus workers de hashing"""
+    global _bcrypt_rounds
+    _bcrypt_rounds = BCRYPT_ROUNDS or calibrate_bcrypt_rounds()
+    configure_bcrypt_rounds(_bcrypt_rounds)
+    return _bcrypt_rounds
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        initargs = (_bcrypt_rounds,) if _bcrypt_rounds else ()
+        _executor = ProcessPoolExecutor(
+            max_workers=HASH_POOL_WORKERS,
+            initializer=configure_bcrypt_rounds if initargs else None,
+            initargs=initargs
+        )
+    return _executor
+
+
+async def _run(operation: str, fn, *args):
+    global _pending
+    if _pending >= HASH_POOL_MAX_PENDING:
+        PASSWORD_HASH_REJECTED.inc()
+        raise HashPoolBusy()
+
+    _pending += 1
+    PASSWORD_HASH_PENDING.inc()
+    start = time.perf_counter()
+    try:
+        if HASH_POOL_WORKERS > 0:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_get_executor(), fn, *args)
+        return await run_in_threadpool(fn, *args)
+    finally:
+        _pending -= 1
+        PASSWORD_HASH_PENDING.dec()
+        PASSWORD_HASH_SECONDS.labels(operation=operation).observe(time.perf_counter() - start)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run("hash", _hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run("verify", _verify, plain_password, hashed_password)
+
+
+def shutdown_hash_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import SERVER_TIMING_ENABLED, QUERY_REPEAT_THRESHOLD
+from app.utils.metrics import HTTP_REQUEST_DB_STATEMENTS, HTTP_REQUEST_DB_SECONDS, DB_REPEATED_STATEMENTS
+
+logger = logging.getLogger("market-backend.queries")
+
+
+class QueryStats:
+    """Sentencias SQL y tiempo de BD acumulados en una petición"""
+
+    __slots__ = ("statements", "seconds", "by_statement")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        self.by_statement: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.seconds += seconds
+        self.by_statement[statement] += 1
+
+    def repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        """Sentencias idénticas (salvo parámetros) ejecutadas al menos `threshold` veces"""
+        return [(sql, n) for sql, n in self.by_statement.most_common() if n >= threshold]
+
+
+# La sesión asíncrona ejecuta el driver en un greenlet que hereda el contexto de la
+# corrutina, así que los eventos del motor ven las estadísticas de su petición
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Cuenta las sentencias del motor (síncrono, o `async_engine.sync_engine`)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries():
+    """Acumula en un QueryStats las sentencias ejecutadas dentro del bloque"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Una petición ejecutó más sentencias SQL de las permitidas"""
+
+
+# Observadores activos de query_budget; la petición puede atenderse en otro hilo
+# (TestClient), así que no basta con el contextvar del código que la lanza
+_observers: List[list] = []
+_observers_lock = threading.Lock()
+
+
+@contextmanager
+def query_budget(max_statements: int):
+    """Falla con QueryBudgetExceeded si alguna petición del bloque supera `max_statements`"""
+    observed: List[Tuple[str, QueryStats]] = []
+    with _observers_lock:
+        _observers.append(observed)
+    try:
+        yield observed
+    finally:
+        with _observers_lock:
+            _observers.remove(observed)
+
+    over = [(handler, stats) for handler, stats in observed if stats.statements > max_statements]
+    if over:
+        detail = ", ".join(f"{handler}: {stats.statements}" for handler, stats in over)
+        raise QueryBudgetExceeded(f"Presupuesto de {max_statements} sentencias superado ({detail})")
+
+
+def _handler_name(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class QueryStatsMiddleware:
+    """Middleware ASGI: métricas de BD por ruta, aviso de N+1 y cabecera Server-Timing"""
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.seconds * 1000:.1f};desc="{stats.statements} queries"'.encode()
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._report(_handler_name(scope), stats)
+
+    @staticmethod
+    def _report(handler: str, stats: QueryStats) -> None:
+        HTTP_REQUEST_DB_STATEMENTS.labels(handler=handler).observe(stats.statements)
+        HTTP_REQUEST_DB_SECONDS.labels(handler=handler).observe(stats.seconds)
+
+        repeated = stats.repeated()
+        if repeated:
+            DB_REPEATED_STATEMENTS.labels(handler=handler).inc()
+            sql, count = repeated[0]
+            logger.warning("Posible N+1 en %s: sentencia repetida %s veces: %s", handler, count, " ".join(sql.split())[:200])
+
+        with _observers_lock:
+            for observed in _observers:
+                observed.append((handler, stats))
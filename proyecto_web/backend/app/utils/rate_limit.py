@@ -0,0 +1,265 @@
+import ipaddress
+import secrets
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import deque
+from typing import Optional
+
+from app.config import (
+    RATE_LIMIT_PER_MINUTE,
+    LOGIN_RATE_LIMIT_PER_MINUTE,
+    LOGIN_BACKOFF_AFTER_FAILURES,
+    LOGIN_BACKOFF_MAX_SECONDS,
+    LOGIN_FAILURE_WINDOW_SECONDS,
+    RATE_LIMIT_BACKEND_URL,
+    TRUSTED_PROXIES
+)
+from app.utils.cache import TTLCache
+from app.utils.metrics import LOGIN_THROTTLED, LOGIN_FAILURES
+
+
+class LoginThrottled(Exception):
+    """Intento de login rechazado antes de verificar la contraseña"""
+
+    def __init__(self, scope: str, retry_after: int):
+        super().__init__(scope)
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class RateLimitBackend(ABC):
+    """Almacén de intentos de login. Cada operación debe ser atómica por clave"""
+
+    @abstractmethod
+    async def hit(self, key: str, window: int, limit: int) -> bool:
+        """Registra un intento si la ventana deslizante aún admite otro; False (sin registrarlo) si está llena"""
+
+    @abstractmethod
+    async def lockout_remaining(self, key: str) -> float:
+        """Segundos de bloqueo pendientes para la clave (0 si no está bloqueada)"""
+
+    @abstractmethod
+    async def add_failure(self, key: str, after: int, max_seconds: int, window: int) -> float:
+        """Suma un fallo en la ventana fija de `window` segundos y, a partir de `after`, bloquea con espera exponencial"""
+
+    @abstractmethod
+    async def reset_failures(self, key: str) -> None:
+        """Olvida los fallos y el bloqueo de la clave"""
+
+
+class _KeyState:
+    __slots__ = ("attempts", "failures", "failures_since", "locked_until")
+
+    def __init__(self):
+        self.attempts = deque()
+        self.failures = 0
+        self.failures_since = 0.0
+        self.locked_until = 0.0
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Backend por proceso: cada worker de uvicorn lleva su propia cuenta"""
+
+    def __init__(self, max_keys: int = 100000):
+        # Una clave inactiva más allá del bloqueo máximo y de la ventana de fallos ya no aporta nada
+        self._states = TTLCache(maxsize=max_keys, ttl=max(LOGIN_BACKOFF_MAX_SECONDS, LOGIN_FAILURE_WINDOW_SECONDS))
+        self._lock = threading.Lock()
+
+    def _state(self, key: str) -> _KeyState:
+        state = self._states.get(key)
+        if state is None:
+            state = _KeyState()
+        self._states.set(key, state)
+        return state
+
+    async def hit(self, key: str, window: int, limit: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._state(key).attempts
+            while attempts and attempts[0] <= now - window:
+                attempts.popleft()
+            if len(attempts) >= limit:
+                return False
+            attempts.append(now)
+            return True
+
+    async def lockout_remaining(self, key: str) -> float:
+        state = self._states.get(key)
+        if state is None:
+            return 0.0
+        return max(0.0, state.locked_until - time.monotonic())
+
+    async def add_failure(self, key: str, after: int, max_seconds: int, window: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(key)
+            if state.failures and now - state.failures_since >= window:
+                state.failures = 0
+            if not state.failures:
+                state.failures_since = now
+            state.failures += 1
+            if state.failures < after:
+                return 0.0
+            lockout = min(2 ** (state.failures - after), max_seconds)
+            state.locked_until = now + lockout
+            return lockout
+
+    async def reset_failures(self, key: str) -> None:
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None:
+                state.failures = 0
+                state.locked_until = 0.0
+
+
+# Limpia la ventana y solo añade el intento si cabe, en una única operación atómica
+_REDIS_HIT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# El primer fallo fija la caducidad del contador; los siguientes no la renuevan
+_REDIS_ADD_FAILURE = """
+local failures = redis.call('INCR', KEYS[1])
+if failures == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return failures
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Backend compartido entre workers e instancias (requiere el paquete `redis`)"""
+
+    def __init__(self, url: str, prefix: str = "login-rl"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND_URL requiere el paquete 'redis' instalado")
+        self.client = redis.Redis.from_url(url)
+        self._hit = self.client.register_script(_REDIS_HIT)
+        self._add_failure = self.client.register_script(_REDIS_ADD_FAILURE)
+        self.prefix = prefix
+
+    async def hit(self, key: str, window: int, limit: int) -> bool:
+        now = time.time()
+        member = f"{now:.6f}:{secrets.token_hex(4)}"
+        return bool(await self._hit(keys=[f"{self.prefix}:attempts:{key}"], args=[now, window, limit, member]))
+
+    async def lockout_remaining(self, key: str) -> float:
+        ttl_ms = await self.client.pttl(f"{self.prefix}:lock:{key}")
+        return max(0.0, ttl_ms / 1000.0)
+
+    async def add_failure(self, key: str, after: int, max_seconds: int, window: int) -> float:
+        failures = int(await self._add_failure(keys=[f"{self.prefix}:failures:{key}"], args=[window]))
+        if failures < after:
+            return 0.0
+        lockout = min(2 ** (failures - after), max_seconds)
+        await self.client.set(f"{self.prefix}:lock:{key}", 1, px=int(lockout * 1000))
+        return lockout
+
+    async def reset_failures(self, key: str) -> None:
+        await self.client.delete(f"{self.prefix}:failures:{key}", f"{self.prefix}:lock:{key}")
+
+
+class LoginRateLimiter:
+    """Limita los intentos de login por IP y por email; el bloqueo por fallos es por (email, IP) y por IP"""
+
+    def __init__(self, backend: RateLimitBackend, per_email: int, per_ip: int, window: int = 60):
+        self.backend = backend
+        self.per_email = per_email
+        self.per_ip = per_ip
+        self.window = window
+
+    def _window_keys(self, email: str, client_ip: Optional[str]):
+        # La IP primero: si su ventana está llena, el intento no consume la del email
+        keys = [("ip", f"ip:{client_ip}", self.per_ip)] if client_ip else []
+        keys.append(("email", f"email:{email.strip().lower()}", self.per_email))
+        return keys
+
+    def _failure_keys(self, email: str, client_ip: Optional[str]):
+        email = email.strip().lower()
+        if not client_ip:
+            return [("email", f"email:{email}")]
+        return [("email_ip", f"email-ip:{email}|{client_ip}"), ("ip", f"ip:{client_ip}")]
+
+    async def check(self, email: str, client_ip: Optional[str]) -> None:
+        """Registra el intento y lanza LoginThrottled si alguna clave lo rechaza (sin contarlo)"""
+        for scope, key in self._failure_keys(email, client_ip):
+            remaining = await self.backend.lockout_remaining(key)
+            if remaining > 0:
+                LOGIN_THROTTLED.labels(scope=scope, reason="backoff").inc()
+                raise LoginThrottled(scope, int(remaining) + 1)
+        for scope, key, limit in self._window_keys(email, client_ip):
+            if not await self.backend.hit(key, self.window, limit):
+                LOGIN_THROTTLED.labels(scope=scope, reason="window").inc()
+                raise LoginThrottled(scope, self.window)
+
+    async def record_failure(self, email: str, client_ip: Optional[str]) -> None:
+        LOGIN_FAILURES.inc()
+        for _, key in self._failure_keys(email, client_ip):
+            await self.backend.add_failure(
+                key, LOGIN_BACKOFF_AFTER_FAILURES, LOGIN_BACKOFF_MAX_SECONDS, LOGIN_FAILURE_WINDOW_SECONDS
+            )
+
+    async def record_success(self, email: str, client_ip: Optional[str]) -> None:
+        # Solo se perdona al par (email, IP): un acierto no borra los fallos de la IP con otras cuentas,
+        # que caducan al cerrarse su ventana
+        _, key = self._failure_keys(email, client_ip)[0]
+        await self.backend.reset_failures(key)
+
+
+def _parse_networks(entries):
+    return [ipaddress.ip_network(entry, strict=False) for entry in entries]
+
+
+_trusted_proxies = _parse_networks(TRUSTED_PROXIES)
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def _strip_port(entry: str) -> str:
+    # App Service añade el puerto ("1.2.3.4:5678", "[::1]:5678")
+    if entry.startswith("["):
+        return entry[1:entry.find("]")] if "]" in entry else entry
+    if entry.count(":") == 1:
+        return entry.split(":", 1)[0]
+    return entry
+
+
+def resolve_client_ip(peer: Optional[str], forwarded_for: Optional[str]) -> Optional[str]:
+    """IP del cliente: la conexión, o la última de X-Forwarded-For que no sea un proxy de confianza"""
+    if not peer or not forwarded_for or not _is_trusted_proxy(peer):
+        return peer
+    # Se recorre de derecha a izquierda: lo que queda a la izquierda del primer salto ajeno lo escribe el cliente
+    client_ip = peer
+    for entry in reversed(forwarded_for.split(",")):
+        client_ip = _strip_port(entry.strip())
+        if not _is_trusted_proxy(client_ip):
+            break
+    return client_ip or peer
+
+
+def _build_backend() -> RateLimitBackend:
+    if RATE_LIMIT_BACKEND_URL:
+        return RedisRateLimitBackend(RATE_LIMIT_BACKEND_URL)
+    return InMemoryRateLimitBackend()
+
+
+login_limiter = LoginRateLimiter(
+    backend=_build_backend(),
+    per_email=LOGIN_RATE_LIMIT_PER_MINUTE,
+    per_ip=RATE_LIMIT_PER_MINUTE
+)
@@ -0,0 +1,102 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+# Lectura incremental de ficheros de importación: los registros se producen según
+# llegan los bytes, sin tener nunca el fichero completo en memoria
+
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]  # (línea, datos, error)
+
+FORMATS = ("csv", "ndjson")
+
+
+class RecordStreamError(ValueError):
+    """El fichero no se puede leer como el formato indicado"""
+
+
+def detect_format(content_type: Optional[str] = None, filename: Optional[str] = None) -> Optional[str]:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"):
+        return "ndjson"
+    if filename:
+        if filename.lower().endswith(".csv"):
+            return "csv"
+        if filename.lower().endswith((".ndjson", ".jsonl")):
+            return "ndjson"
+    return None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Líneas UTF-8 (con su número, desde 1) de un flujo de bytes troceado arbitrariamente"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    number = 0
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                number += 1
+                yield number, line.rstrip("\r")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise RecordStreamError(f"Línea {number + 1}: el fichero no está en UTF-8")
+    if pending.rstrip("\r"):
+        yield number + 1, pending.rstrip("\r")
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """Filas de un CSV con cabecera, como diccionarios columna -> texto"""
+    # Un campo entre comillas puede tener saltos de línea: el registro acaba con un número par de comillas
+    header = None
+    record, start = "", 0
+    async for number, line in iter_lines(chunks):
+        if not record:
+            start = number
+            if not line.strip():
+                continue
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as exc:
+            yield start, None, f"CSV mal formado: {exc}"
+            continue
+        if header is None:
+            header = [column.strip().lower() for column in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"Se esperaban {len(header)} columnas y hay {len(values)}"
+            continue
+        yield start, dict(zip(header, values)), None
+    if record:
+        yield start, None, "Comillas sin cerrar al final del fichero"
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """Un objeto JSON por línea; las líneas vacías se ignoran"""
+    async for number, line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield number, None, f"JSON inválido: {exc.msg}"
+            continue
+        if not isinstance(data, dict):
+            yield number, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield number, data, None
+
+
+def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Record]:
+    if fmt == "csv":
+        return iter_csv_records(chunks)
+    if fmt == "ndjson":
+        return iter_ndjson_records(chunks)
+    raise RecordStreamError(f"Formato no soportado: {fmt}")
@@ -0,0 +1,105 @@
+"""Servidor SMTP mínimo en memoria para tests y desarrollo local.
+
+Acepta cualquier remitente, destinatario y credencial (AUTH PLAIN) y guarda
+los mensajes recibidos en `messages`. No soporta STARTTLS: usar SMTP_USE_TLS=false.
+
+    python -m app.utils.smtp_stub --port 1025
+"""
+import argparse
+import asyncio
+from email import message_from_bytes
+from email.message import Message
+from typing import List, Optional
+
+
+class StubSMTPServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.messages: List[Message] = []
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> "StubSMTPServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Con port=0 el sistema asigna un puerto libre
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "StubSMTPServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+
+        reply("220 stub ESMTP")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+
+                if command == "EHLO":
+                    reply("250-stub")
+                    reply("250-AUTH PLAIN")
+                    reply("250 8BITMIME")
+                elif command == "HELO":
+                    reply("250 stub")
+                elif command == "AUTH":
+                    reply("235 2.7.0 Authentication successful")
+                elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    reply("250 OK")
+                elif command == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    self.messages.append(await self._read_data(reader))
+                    reply("250 OK: queued")
+                elif command == "QUIT":
+                    reply("221 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    reply("502 Command not implemented")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_data(reader: asyncio.StreamReader) -> Message:
+        lines = []
+        while True:
+            line = await reader.readline()
+            if line in (b".\r\n", b".\n", b""):
+                break
+            # Deshacer el "dot-stuffing" del cliente
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return message_from_bytes(b"".join(lines))
+
+
+async def _serve(host: str, port: int) -> None:
+    server = await StubSMTPServer(host, port).start()
+    print(f"📨 Servidor SMTP de pruebas escuchando en {server.host}:{server.port}")
+    count = 0
+    while True:
+        await asyncio.sleep(1)
+        for message in server.messages[count:]:
+            print(f"✉️  {message['To']}: {message['Subject']}")
+        count = len(server.messages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor SMTP de pruebas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    asyncio.run(_serve(args.host, args.port))
@@ -0,0 +1,117 @@
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Fila de cache_versions que cambia solo cuando se crea, renombra o borra un producto
+PRODUCT_NAMES_VERSION_KEY = "product_names"
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sin tildes y con los espacios colapsados ("Ratón  USB" -> "raton usb")"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+
+def _keys(name: str) -> List[str]:
+    # El nombre completo y cada sufijo a partir de una palabra: "raton inalambrico"
+    # también se encuentra escribiendo "inal"
+    words = normalize(name).split(" ")
+    return sorted({" ".join(words[i:]) for i in range(len(words)) if words[i]})
+
+
+class PrefixIndex:
+    """Índice en memoria (array ordenado de nombres normalizados) para autocompletar por prefijo"""
+
+    def __init__(self):
+        self._entries: List[Tuple[str, int]] = []
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        # Cambia con cada modificación de _entries: add_many detecta si otra la adelantó
+        self._generation = 0
+        # Versión PRODUCT_NAMES_VERSION_KEY con la que se construyó (None: aún sin cargar)
+        self.version: Optional[int] = None
+
+    def rebuild(self, products: Iterable[Tuple[int, str]], version: Optional[int] = None) -> None:
+        names = {product_id: name for product_id, name in products}
+        entries = sorted((key, product_id) for product_id, name in names.items() for key in _keys(name))
+        with self._lock:
+            self._entries, self._names = entries, names
+            self._generation += 1
+            self.version = version
+
+    def _remove(self, product_id: int) -> None:
+        name = self._names.pop(product_id, None)
+        if name is None:
+            return
+        for key in _keys(name):
+            i = bisect_left(self._entries, (key, product_id))
+            if i < len(self._entries) and self._entries[i] == (key, product_id):
+                del self._entries[i]
+        self._generation += 1
+
+    def add(self, product_id: int, name: str) -> None:
+        """Alta o cambio de nombre de un producto"""
+        with self._lock:
+            self._remove(product_id)
+            self._names[product_id] = name
+            for key in _keys(name):
+                insort(self._entries, (key, product_id))
+            self._generation += 1
+
+    def add_many(self, products: Iterable[Tuple[int, str]]) -> None:
+        """Altas o cambios de nombre en bloque (importaciones): una ordenación en vez de un insort por clave"""
+        names = dict(products)
+        if not names:
+            return
+        added = [(key, product_id) for product_id, name in names.items() for key in _keys(name)]
+        while True:
+            # La fusión se hace fuera del lock para no frenar a suggest(); si entretanto
+            # otra escritura cambió el índice, se repite sobre el estado nuevo
+            with self._lock:
+                entries, generation = self._entries, self._generation
+            merged = [entry for entry in entries if entry[1] not in names]
+            merged.extend(added)
+            merged.sort()
+            with self._lock:
+                if self._generation == generation:
+                    self._entries = merged
+                    self._names.update(names)
+                    self._generation += 1
+                    return
+
+    def remove(self, product_id: int) -> None:
+        with self._lock:
+            self._remove(product_id)
+
+    def advance(self, version: int) -> None:
+        """Marca el índice al día tras una escritura local, si no se ha saltado ninguna versión"""
+        with self._lock:
+            if self.version is not None and version == self.version + 1:
+                self.version = version
+
+    def suggest(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        """Hasta `limit` productos (id, nombre) cuyo nombre o alguna palabra empieza por `prefix`"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results: List[Tuple[int, str]] = []
+        seen = set()
+        with self._lock:
+            i = bisect_left(self._entries, (prefix,))
+            while i < len(self._entries) and len(results) < limit:
+                key, product_id = self._entries[i]
+                if not key.startswith(prefix):
+                    break
+                if product_id not in seen:
+                    seen.add(product_id)
+                    results.append((product_id, self._names[product_id]))
+                i += 1
+        return results
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+product_names = PrefixIndex()
@@ -1,8 +1,7 @@
 from fastapi import WebSocket, WebSocketDisconnect, Depends
 from typing import List
 import json
-from app.database import SessionLocal
-from app.utils.auth import verify_token
+from app.utils.auth import decode_access_token, user_from_token_payload
 from app.models.user import User
 
 class ConnectionManager:
@@ -31,16 +30,8 @@ manager = ConnectionManager()
 
 async def get_user_from_token(token: str) -> User:
     """Get user from JWT token"""
-    email = verify_token(token)
-    if not email:
-        return None
-    
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.email == email).first()
-        return user
-    finally:
-        db.close()
+    # Mismas comprobaciones que las rutas HTTP (revocación y versión de contraseña)
+    return await user_from_token_payload(decode_access_token(token))
 
 async def websocket_endpoint(websocket: WebSocket, token: str = None):
     await manager.connect(websocket)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bcrypt: hashes por segundo por núcleo y total para cada coste.
+
+    python -m benchmarks.bcrypt_throughput [--min-rounds 10] [--max-rounds 14] [--seconds 2]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import BCRYPT_TARGET_MS
+from app.utils.auth import pwd_context
+from app.utils.password_pool import calibrate_bcrypt_rounds
+
+
+def hashes_in(rounds: int, seconds: float) -> int:
+    """Hashes completados por un proceso durante `seconds`"""
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        handler.hash("benchmark-password")
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de bcrypt")
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"🔍 bcrypt en {args.cores} núcleos, {args.seconds}s por medida")
+    print(f"{'rondas':>6} | {'ms/hash':>8} | {'hash/s/núcleo':>13} | {'hash/s total':>12}")
+
+    with ProcessPoolExecutor(max_workers=args.cores) as pool:
+        for rounds in range(args.min_rounds, args.max_rounds + 1):
+            single = hashes_in(rounds, args.seconds) / args.seconds
+            totals = pool.map(hashes_in, [rounds] * args.cores, [args.seconds] * args.cores)
+            total = sum(totals) / args.seconds
+            print(f"{rounds:>6} | {1000 / single:>8.1f} | {single:>13.2f} | {total:>12.2f}")
+
+    rounds = calibrate_bcrypt_rounds()
+    print(f"✅ Coste calibrado para {BCRYPT_TARGET_MS} ms: {rounds} rondas")
+
+
+if __name__ == "__main__":
+    main()
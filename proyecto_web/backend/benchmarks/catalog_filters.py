@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Planes y latencia del catálogo filtrado y ordenado a escala (1M productos por defecto).
+
+Siembra la tabla products hasta --rows filas (en la BD de DATABASE_URL o, sin ella,
+en una SQLite temporal), aplica las migraciones y, para cada combinación de filtros
+y orden de GET /products/, muestra el plan y la mediana de la consulta que genera
+ProductRepository. Falla (código 1) si alguna recorre la tabla entera en lugar
+de leer un índice.
+
+    python -m benchmarks.catalog_filters [--rows 1000000] [--runs 5]
+    DATABASE_URL=postgresql://... python -m benchmarks.catalog_filters
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    _db_dir = tempfile.mkdtemp(prefix="catalog-filters-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.migrations.runner import run_migrations  # noqa: E402
+from app.repositories.product_repository import page_query  # noqa: E402
+from app.schemas.product import ProductFilters  # noqa: E402
+
+WORDS = ["mesa", "silla", "sofa", "lampara", "estanteria", "cama", "armario", "escritorio", "alfombra", "cojin"]
+
+# Nombre -> (filtros, orden, clave keyset de una página intermedia o None)
+SCENARIOS = {
+    "con stock < 200 por precio": (ProductFilters(in_stock=True, max_price=200), "price", None),
+    "con stock < 200, página 2": (ProductFilters(in_stock=True, max_price=200), "price", [100.0, 500000]),
+    "rango de precio 50-60": (ProductFilters(min_price=50, max_price=60), "price", None),
+    "precio descendente": (ProductFilters(), "-price", None),
+    "por nombre": (ProductFilters(), "name", None),
+    "prefijo de nombre por nombre": (ProductFilters(name_prefix="Lampara 12"), "name", None),
+    "prefijo de nombre por id": (ProductFilters(name_prefix="Sofa 9"), "id", None),
+    "por id, página profunda": (ProductFilters(), "id", [900000]),
+}
+
+
+def seed(conn, rows: int) -> None:
+    existing = conn.scalar(text("SELECT count(*) FROM products"))
+    if existing >= rows:
+        return
+    print(f"🌱 Sembrando {rows - existing} productos...")
+    words = ", ".join(f"'{w.capitalize()}'" for w in WORDS)
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"""
+            INSERT INTO products (name, description, price, stock)
+            SELECT (ARRAY[{words}])[1 + i % {len(WORDS)}] || ' ' || i, 'Benchmark',
+                   round((random() * 1000)::numeric, 2), (ARRAY[0, 0, 3, 25])[1 + i % 4]
+            FROM generate_series(1, :n) AS i
+        """), {"n": rows - existing})
+    else:
+        conn.execute(text(f"""
+            WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < :n)
+            INSERT INTO products (name, description, price, stock)
+            SELECT json_extract(json_array({words}), '$[' || (i % {len(WORDS)}) || ']') || ' ' || i,
+                   'Benchmark', round(abs(random() % 100000) / 100.0, 2),
+                   json_extract('[0, 0, 3, 25]', '$[' || (i % 4) || ']')
+            FROM seq
+        """), {"n": rows - existing})
+    conn.execute(text("ANALYZE products" if conn.dialect.name == "postgresql" else "ANALYZE"))
+
+
+def compile_sql(conn, query) -> str:
+    return str(query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def explain(conn, sql: str) -> str:
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")).scalars()
+        return "\n".join(rows)
+    return "\n".join(row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def uses_index(conn, plan: str) -> bool:
+    """Ningún recorrido completo de products. Ordenar las pocas filas que devuelve
+    un índice (p. ej. las de un prefijo de nombre) sí se admite"""
+    if conn.dialect.name == "postgresql":
+        return "Seq Scan" not in plan
+    return not any(
+        line.strip().startswith("SCAN products") and "USING" not in line for line in plan.splitlines()
+    )
+
+
+def median_ms(conn, sql: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(text(sql)).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planes del catálogo filtrado")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="productos en la tabla")
+    parser.add_argument("--limit", type=int, default=20, help="tamaño de página")
+    parser.add_argument("--runs", type=int, default=5, help="repeticiones por consulta")
+    args = parser.parse_args()
+
+    run_migrations()
+    with engine.begin() as conn:
+        seed(conn, args.rows)
+
+    failures = 0
+    with engine.connect() as conn:
+        print(f"🔍 Catálogo filtrado, {args.rows} productos ({conn.dialect.name}), páginas de {args.limit}")
+        for name, (filters, sort, after) in SCENARIOS.items():
+            # Misma consulta que ProductRepository.get_page (fila extra incluida)
+            sql = compile_sql(conn, page_query(conn.dialect.name, args.limit + 1, after, filters, sort))
+            plan = explain(conn, sql)
+            ok = uses_index(conn, plan)
+            failures += not ok
+            print(f"\n{'✅' if ok else '❌'} {name}: {median_ms(conn, sql, args.runs):.2f} ms")
+            print("   " + plan.replace("\n", "\n   "))
+
+    if failures:
+        print(f"\n❌ {failures} consultas sin índice")
+        sys.exit(1)
+    print("\n✅ Todas las consultas leen un índice")
+
+
+if __name__ == "__main__":
+    main()
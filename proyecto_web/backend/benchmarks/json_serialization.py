@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Carga y serialización de listados por cada 10k filas: ruta normal frente a FAST_JSON_RESPONSES.
+
+Siembra una base SQLite temporal y, para cada listado, mide con los mismos métodos
+de repositorio que usan las rutas:
+  - antes: objetos ORM -> validación con el esquema de respuesta -> json estándar
+    (lo que hace FastAPI con response_model)
+  - después: filas de columnas -> orjson
+y comprueba que ambas salidas son el mismo JSON.
+
+    python -m benchmarks.json_serialization [--rows 10000] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="json-serialization-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+
+from typing import List  # noqa: E402
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine, AsyncSessionLocal, async_engine  # noqa: E402
+from app.migrations.runner import run_migrations  # noqa: E402
+from app.repositories.product_repository import ProductRepository  # noqa: E402
+from app.repositories.user_repository import UserRepository  # noqa: E402
+from app.schemas.chat import ChatMessageList  # noqa: E402
+from app.schemas.invoice import InvoiceList  # noqa: E402
+from app.schemas.product import Product  # noqa: E402
+from app.schemas.user import UserResponse  # noqa: E402
+from app.services.chat_service import ChatService  # noqa: E402
+from app.services.invoice_service import InvoiceService  # noqa: E402
+from app.utils import fast_json  # noqa: E402
+
+ITEMS_PER_INVOICE = 5
+
+
+def seed(rows: int) -> None:
+    run_migrations()
+    invoices = rows // ITEMS_PER_INVOICE
+    with engine.begin() as conn:
+        conn.execute(text(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < :n) "
+            "INSERT INTO users (email, name, hashed_password, is_admin) "
+            "SELECT 'user' || i || '@example.com', 'Usuario ' || i, 'x', i % 50 = 0 FROM seq"
+        ), {"n": rows})
+        conn.execute(text(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < :n) "
+            "INSERT INTO products (name, description, price, stock) "
+            "SELECT 'Producto ' || i, 'Descripción del producto ' || i, i * 1.25, i % 40 FROM seq"
+        ), {"n": rows})
+        conn.execute(text(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < :n) "
+            "INSERT INTO chat_messages (user_id, message, created_at) "
+            "SELECT 1 + i % 100, 'Mensaje número ' || i, datetime('2024-01-01', '+' || i || ' seconds') FROM seq"
+        ), {"n": rows})
+        conn.execute(text(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < :n) "
+            "INSERT INTO invoices (user_id, invoice_number, total_amount, status, created_at) "
+            "SELECT 1 + i % 100, 'INV-' || i, i * 10.0, 'paid', datetime('2024-01-01', '+' || i || ' minutes') FROM seq"
+        ), {"n": invoices})
+        conn.execute(text(
+            "WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i < :n - 1) "
+            "INSERT INTO invoice_items (invoice_id, product_id, product_name, quantity, unit_price, total_price) "
+            "SELECT 1 + i / :per, 1 + i % 100, 'Producto ' || (1 + i % 100), 2, 1.25, 2.5 FROM seq"
+        ), {"n": invoices * ITEMS_PER_INVOICE, "per": ITEMS_PER_INVOICE})
+
+
+def response_model_json(adapter: TypeAdapter, content) -> bytes:
+    # Lo que hace FastAPI con response_model: validar, volcar a tipos JSON y json.dumps
+    value = adapter.validate_python(content, from_attributes=True)
+    return json.dumps(
+        adapter.dump_python(value, mode="json"), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+def scenarios(rows: int):
+    """Nombre -> (carga antes, serialización antes, carga después)"""
+    products = TypeAdapter(List[Product])
+    users = TypeAdapter(List[UserResponse])
+    invoices = TypeAdapter(InvoiceList)
+    messages = TypeAdapter(ChatMessageList)
+    return {
+        "GET /products/": (
+            lambda db: ProductRepository(db).get_page(rows),
+            lambda content: response_model_json(products, content),
+            lambda db: ProductRepository(db).get_page_rows(rows),
+        ),
+        "GET /users/": (
+            lambda db: UserRepository(db).get_all_users(),
+            lambda content: response_model_json(users, content),
+            lambda db: UserRepository(db).get_all_user_rows(),
+        ),
+        "GET /invoicing/admin/all": (
+            lambda db: InvoiceService(db).get_all_invoices(),
+            lambda content: response_model_json(invoices, content),
+            lambda db: InvoiceService(db).get_all_invoice_rows(),
+        ),
+        "GET /chat/messages": (
+            lambda db: ChatService(db).get_messages(rows),
+            lambda content: response_model_json(messages, content),
+            lambda db: ChatService(db).get_message_rows(rows),
+        ),
+    }
+
+
+async def measure(load, runs: int):
+    """Mediana de la carga en ms y el último resultado"""
+    samples, content = [], None
+    for _ in range(runs):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            content = await load(db)
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), content
+
+
+def measure_sync(fn, runs: int):
+    samples, result = [], None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+async def run(rows: int, runs: int) -> int:
+    scale = 10000 / rows
+    failures = 0
+    encoder = "orjson" if fast_json.orjson is not None else "json (orjson no instalado)"
+    print(f"🔍 ms por 10k filas ({rows} filas, mediana de {runs}); después = filas + {encoder}")
+    print(f"{'listado':<24} | {'carga':>15} | {'serialización':>15} | {'total':>15} | {'mejora':>6}")
+    for name, (load_before, serialize_before, load_after) in scenarios(rows).items():
+        load_ms, content = await measure(load_before, runs)
+        ser_ms, before = measure_sync(lambda: serialize_before(content), runs)
+        fast_load_ms, rows_content = await measure(load_after, runs)
+        fast_ser_ms, after = measure_sync(lambda: fast_json.dumps(rows_content), runs)
+
+        same = json.loads(before) == json.loads(after)
+        failures += not same
+        total, fast_total = (load_ms + ser_ms) * scale, (fast_load_ms + fast_ser_ms) * scale
+        print(f"{name:<24} | {load_ms * scale:>6.1f} → {fast_load_ms * scale:>6.1f} | "
+              f"{ser_ms * scale:>6.1f} → {fast_ser_ms * scale:>6.1f} | "
+              f"{total:>6.1f} → {fast_total:>6.1f} | {total / fast_total:>5.1f}x {'✅' if same else '❌ salida distinta'}")
+    await async_engine.dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialización de listados")
+    parser.add_argument("--rows", type=int, default=10000, help="filas por listado")
+    parser.add_argument("--runs", type=int, default=5, help="repeticiones por medida")
+    args = parser.parse_args()
+
+    seed(args.rows)
+    if asyncio.run(run(args.rows, args.runs)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
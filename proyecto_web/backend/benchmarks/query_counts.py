@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Sentencias SQL por ruta contra un presupuesto fijo (detecta N+1 y regresiones).
+
+Siembra una base SQLite temporal con varios productos, líneas de carrito,
+facturas y mensajes, y falla (código 1) si alguna ruta supera su presupuesto.
+
+    python -m benchmarks.query_counts [--rows 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="query-counts-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("EMAIL_OUTBOX_ENABLED", "false")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.init_db import init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.query_stats import query_budget, QueryBudgetExceeded  # noqa: E402
+
+# Ruta -> máximo de sentencias (con el usuario ya en la caché de autenticación)
+BUDGETS = {
+    "/products/": 1,
+    "/products/1": 1,
+    "/products/batch?ids=3,1,2,999": 1,
+    "/products/suggest?prefix=pro": 0,
+    "/cart/": 2,
+    "/chat/messages": 1,
+    "/invoicing/me": 2,
+    "/invoicing/admin/all": 2,
+    "/dashboard/stats": 4,
+    "/users/": 1,
+}
+
+
+def seed(client: TestClient, headers: dict, rows: int) -> None:
+    for i in range(rows):
+        client.post("/products/", json={
+            "name": f"Producto {i}", "description": "Benchmark", "price": 10 + i, "stock": 1000
+        }, headers=headers)
+    for invoice in range(3):
+        for product_id in range(1, rows + 1):
+            client.post("/cart/add", json={"product_id": product_id, "quantity": 1}, headers=headers)
+        if invoice < 2:
+            client.post("/invoicing/create", headers=headers)
+    for i in range(rows):
+        client.post("/chat/messages", json={"message": f"mensaje {i}"}, headers=headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentencias SQL por ruta")
+    parser.add_argument("--rows", type=int, default=20, help="filas sembradas por tabla")
+    args = parser.parse_args()
+
+    asyncio.run(init_db())
+    failures = 0
+    with TestClient(app) as client:
+        response = client.post("/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        seed(client, headers, args.rows)
+
+        print(f"🔍 Sentencias SQL por petición ({args.rows} filas por tabla)")
+        print(f"{'ruta':<30} | {'sentencias':>10} | {'presupuesto':>11}")
+        for path, budget in BUDGETS.items():
+            try:
+                with query_budget(budget) as observed:
+                    client.get(path, headers=headers)
+                ok = "✅"
+            except QueryBudgetExceeded:
+                ok = "❌"
+                failures += 1
+            print(f"{path:<30} | {observed[0][1].statements:>10} | {budget:>11} {ok}")
+
+    if failures:
+        print(f"❌ {failures} rutas superan su presupuesto")
+        sys.exit(1)
+    print("✅ Todas las rutas dentro de presupuesto")
+
+
+if __name__ == "__main__":
+    main()
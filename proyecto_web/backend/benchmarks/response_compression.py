@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tamaño y coste de CPU de comprimir las respuestas grandes de la API.
+
+Siembra una base SQLite temporal, pide cada respuesta sin compresión a la
+aplicación real y mide, para cada codificación y nivel, los bytes resultantes y
+la mediana del tiempo de compresión. Después comprueba que la respuesta pedida
+con Accept-Encoding llega comprimida y con Vary/Cache-Control.
+
+    python -m benchmarks.response_compression [--rows 10000] [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+_db_dir = tempfile.mkdtemp(prefix="response-compression-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.migrations.runner import run_migrations  # noqa: E402
+from app.utils.auth import create_access_token  # noqa: E402
+from app.utils.compression import brotli  # noqa: E402
+
+ADMIN_EMAIL = "bench-admin@example.com"
+
+
+def seed(rows: int) -> None:
+    run_migrations()
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (email, name, hashed_password, is_admin) "
+            "VALUES (:email, 'Admin', 'x', 1)"
+        ), {"email": ADMIN_EMAIL})
+        conn.execute(text(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < :n) "
+            "INSERT INTO products (name, description, price, stock) "
+            "SELECT 'Producto ' || i, 'Descripción del producto ' || i, i * 1.25, i % 40 FROM seq"
+        ), {"n": rows})
+        conn.execute(text(
+            "WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < :n) "
+            "INSERT INTO invoices (user_id, invoice_number, total_amount, status, created_at) "
+            "SELECT 1, 'INV-' || i, i * 10.0, 'paid', datetime('2024-01-01', '+' || i || ' minutes') FROM seq"
+        ), {"n": rows // 5})
+
+
+def encoders():
+    """Nombre -> función de compresión de un cuerpo completo"""
+    result = {f"gzip -{level}": (lambda body, level=level: _gzip(body, level)) for level in (1, 6, 9)}
+    if brotli is not None:
+        for quality in (4, 5, 11):
+            result[f"br q{quality}"] = lambda body, quality=quality: brotli.compress(body, quality=quality)
+    return result
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    return compressor.compress(body) + compressor.flush()
+
+
+def median_ms(fn, runs: int):
+    samples, result = [], None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compresión de respuestas")
+    parser.add_argument("--rows", type=int, default=10000, help="productos sembrados")
+    parser.add_argument("--runs", type=int, default=5, help="repeticiones por medida")
+    args = parser.parse_args()
+
+    seed(args.rows)
+    auth = {"Authorization": f"Bearer {create_access_token({'sub': ADMIN_EMAIL})}"}
+    paths = {
+        "GET /products/?limit=20": ("/products/?limit=20", {}),
+        "GET /products/?limit=100": ("/products/?limit=100", {}),
+        "GET /invoicing/admin/all": ("/invoicing/admin/all", auth),
+        "GET /products/export": ("/products/export", auth),
+    }
+
+    failures = 0
+    if brotli is None:
+        print("ℹ️  brotli no está instalado: solo se mide gzip")
+    with TestClient(app) as client:
+        for name, (path, headers) in paths.items():
+            body = client.get(path, headers={**headers, "Accept-Encoding": "identity"}).content
+            print(f"\n🔍 {name}: {len(body)} bytes sin comprimir")
+            for label, compress in encoders().items():
+                ms, out = median_ms(lambda: compress(body), args.runs)
+                print(f"   {label:<8} | {len(out):>9} bytes ({len(out) / len(body):>6.1%}) | {ms:>7.2f} ms")
+
+            response = client.get(path, headers={**headers, "Accept-Encoding": "br, gzip"})
+            encoding = response.headers.get("content-encoding")
+            vary = response.headers.get("vary", "")
+            ok = response.content == body and "Accept-Encoding" in vary and "cache-control" in response.headers
+            ok = ok and (encoding is not None or len(body) < 1024)
+            failures += not ok
+            print(f"   {'✅' if ok else '❌'} respuesta: Content-Encoding={encoding}, Vary={vary}, "
+                  f"Cache-Control={response.headers.get('cache-control')}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import tempfile
+
+# La configuración se lee al importar app.config: la BD temporal va antes que cualquier import de la app
+_db_dir = tempfile.mkdtemp(prefix="market-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ["EMAIL_OUTBOX_ENABLED"] = "false"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.init_db import init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.tasks import maintenance  # noqa: E402
+from app.utils import auth, rate_limit  # noqa: E402
+from app.utils.catalog_cache import catalog_cache  # noqa: E402
+from app.utils.suggest_index import product_names  # noqa: E402
+
+ADMIN_EMAIL = "admin@example.com"
+ADMIN_PASSWORD = "admin123"
+
+# Tablas que cada test empieza vacías (hijas antes que padres)
+_TABLES = (
+    "stock_reservations", "cart", "invoice_items", "invoices", "chat_messages",
+    "password_reset_tokens", "email_outbox", "token_revocations", "product_changes", "products",
+)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    asyncio.run(init_db())
+
+
+@pytest.fixture(autouse=True)
+def clean_state(database):
+    with engine.begin() as conn:
+        for table in _TABLES:
+            conn.execute(text(f"DELETE FROM {table}"))
+        conn.execute(text("DELETE FROM users WHERE email != :email"), {"email": ADMIN_EMAIL})
+    catalog_cache.version = None
+    product_names.rebuild([])
+    auth.user_cache.clear()
+    auth.token_cache.clear()
+    auth._token_versions.clear()
+    maintenance._revocations_polled_at = None
+    maintenance._product_changes_polled_at = None
+    rate_limit.login_limiter.backend = rate_limit.InMemoryRateLimitBackend()
+    yield
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def admin_headers(client):
+    response = client.post("/auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def register(client):
+    """Registra un usuario y devuelve sus cabeceras de autorización"""
+    def _register(email: str, password: str = "secret123"):
+        response = client.post("/auth/register", json={"email": email, "name": "Usuario", "password": password})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return _register
+
+
+@pytest.fixture
+def create_product(client, admin_headers):
+    def _create(name: str = "Producto", stock: int = 5, price: float = 10.0) -> int:
+        response = client.post("/products/", json={"name": name, "description": "", "price": price, "stock": stock},
+                               headers=admin_headers)
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+    return _create
@@ -0,0 +1,128 @@
+import hashlib
+import time
+from datetime import timedelta
+
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal, engine
+from app.repositories.token_revocation_repository import TokenRevocationRepository
+from app.repositories.user_repository import UserRepository
+from app.tasks import maintenance
+from app.utils import auth, cache
+from app.utils.auth import create_user_access_token, decode_access_token, token_version
+from app.websocket.chat import get_user_from_token
+
+
+def test_password_change_revokes_previous_tokens(client, register):
+    headers = register("change@example.com", "old-secret")
+    response = client.post("/auth/change-password", headers=headers,
+                           json={"current_password": "old-secret", "new_password": "new-secret"})
+    assert response.status_code == 200
+
+    assert client.get("/users/me", headers=headers).status_code == 401
+    login = client.post("/auth/login", json={"email": "change@example.com", "password": "new-secret"})
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {login.json()['access_token']}"}).status_code == 200
+
+
+def test_revocation_from_another_worker_is_applied_on_poll(client, register):
+    headers = register("remote@example.com")
+    payload = decode_access_token(headers["Authorization"].split()[1])
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    # Otro worker revoca los tokens: solo queda la fila en token_revocations
+    async def revoke_elsewhere():
+        async with AsyncSessionLocal() as db:
+            await TokenRevocationRepository(db).revoke(payload["uid"], payload["sub"], None, int(time.time()) + 1)
+            await db.commit()
+    client.portal.call(revoke_elsewhere)
+    assert not auth.is_token_revoked(payload)
+
+    client.portal.call(maintenance.refresh_token_revocations)
+    assert client.get("/users/me", headers=headers).status_code == 401
+
+
+def test_stateless_principal_does_not_trust_admin_claim(client, register, monkeypatch):
+    register("demoted@example.com")
+    monkeypatch.setattr(auth, "JWT_STATELESS_PRINCIPAL", True)
+    user = client.portal.call(_get_user, "demoted@example.com")
+    # Token emitido cuando el usuario aún era administrador
+    user.is_admin = True
+    headers = {"Authorization": f"Bearer {create_user_access_token(user)}"}
+
+    assert client.get("/users/", headers=headers).status_code == 403
+
+
+def test_websocket_rejects_tokens_from_previous_password(client, register):
+    headers = register("socket@example.com", "old-secret")
+    token = headers["Authorization"].split()[1]
+    assert client.portal.call(get_user_from_token, token) is not None
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE users SET hashed_password = 'otro-hash' WHERE email = 'socket@example.com'"))
+    auth.user_cache.clear()
+    assert token_version("otro-hash") != decode_access_token(token)["ver"]
+    assert client.portal.call(get_user_from_token, token) is None
+
+
+async def _get_user(email: str):
+    async with AsyncSessionLocal() as db:
+        user = await UserRepository(db).get_by_email(email)
+        db.expunge(user)
+        return user
+
+
+def _cached(token: str):
+    return auth.token_cache.get(hashlib.sha256(token.encode()).digest())
+
+
+def _token_cache_lookups(result: str) -> float:
+    return REGISTRY.get_sample_value("auth_token_cache_lookups_total", {"result": result}) or 0.0
+
+
+def test_token_cache_entry_expires_with_the_token(client, register, monkeypatch):
+    register("short@example.com")
+    user = client.portal.call(_get_user, "short@example.com")
+    token = create_user_access_token(user, expires_delta=timedelta(seconds=60))
+    payload = decode_access_token(token)
+    assert _cached(token)[0] == payload
+
+    hits = _token_cache_lookups("hit")
+    assert decode_access_token(token) == payload
+    assert _token_cache_lookups("hit") == hits + 1
+
+    # La entrada vive hasta el "exp" del token, no el TTL por defecto de la caché
+    now = time.monotonic()
+    remaining = payload["exp"] - time.time()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + remaining - 2)
+    assert _cached(token) is not None
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + remaining + 1)
+    assert _cached(token) is None
+
+
+def test_cached_token_is_not_accepted_after_revocation(client, register):
+    headers = register("revoked@example.com", "old-secret")
+    token = headers["Authorization"].split()[1]
+    assert client.get("/users/me", headers=headers).status_code == 200
+    assert _cached(token) is not None
+
+    response = client.post("/auth/change-password", headers=headers,
+                           json={"current_password": "old-secret", "new_password": "new-secret"})
+    assert response.status_code == 200
+    # La firma sigue en la caché, pero la revocación se comprueba en cada petición
+    assert _cached(token) is not None
+    assert client.get("/users/me", headers=headers).status_code == 401
+
+
+def test_cached_token_is_not_accepted_after_a_version_change(client, register):
+    headers = register("reversioned@example.com")
+    token = headers["Authorization"].split()[1]
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    # Otro worker cambió la versión de los tokens del usuario
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE users SET token_version = 'otra' WHERE email = 'reversioned@example.com'"))
+    auth.user_cache.clear()
+    assert _cached(token) is not None
+    assert client.get("/users/me", headers=headers).status_code == 401
+    assert client.portal.call(get_user_from_token, token) is None
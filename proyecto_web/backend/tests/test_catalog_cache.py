@@ -0,0 +1,66 @@
+import shutil
+
+import pytest
+
+from app.database import Replica, engine, replicas
+
+IDENTITY = {"Accept-Encoding": "identity"}
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def test_product_etag_revalidates_with_304(client, create_product):
+    product_id = create_product("Lámpara")
+    response = client.get(f"/products/{product_id}", headers=IDENTITY)
+    etag = response.headers["etag"]
+    assert response.status_code == 200 and not etag.startswith("W/")
+
+    revalidated = client.get(f"/products/{product_id}", headers={**IDENTITY, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag and revalidated.content == b""
+
+
+def test_update_changes_etag(client, create_product, admin_headers):
+    product_id = create_product("Silla", price=10)
+    etag = client.get(f"/products/{product_id}", headers=IDENTITY).headers["etag"]
+
+    client.put(f"/products/{product_id}", json={"price": 12.5}, headers=admin_headers)
+    response = client.get(f"/products/{product_id}", headers={**IDENTITY, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["price"] == 12.5
+    assert response.headers["etag"] != etag
+
+
+def test_compressed_variant_has_its_own_strong_etag(client, create_product):
+    for i in range(60):
+        create_product(f"Producto {i}")
+    plain = client.get("/products/?limit=60", headers=IDENTITY).headers["etag"]
+    response = client.get("/products/?limit=60", headers=GZIP)
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f'{plain[:-1]}-gzip"'
+
+    revalidated = client.get("/products/?limit=60", headers={**GZIP, "If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == response.headers["etag"]
+    # La variante comprimida no valida la respuesta sin comprimir, ni al revés
+    assert client.get("/products/?limit=60", headers={**IDENTITY, "If-None-Match": response.headers["etag"]}).status_code == 200
+    assert client.get("/products/?limit=60", headers={**GZIP, "If-None-Match": plain}).status_code == 200
+
+
+@pytest.fixture
+def stale_replica(tmp_path, monkeypatch):
+    """Réplica SQLite congelada en el estado actual de la BD, marcada como sana"""
+    path = tmp_path / "replica.db"
+    shutil.copy(engine.url.database, path)
+    replica = Replica("stale", f"sqlite:///{path}")
+    replica.healthy = True
+    monkeypatch.setattr(replicas, "replicas", [replica])
+    return replica
+
+
+def test_cache_is_not_filled_from_a_lagging_replica(client, create_product, admin_headers, stale_replica):
+    product_id = create_product("Mesa", price=10)
+    shutil.copy(engine.url.database, stale_replica.engine.url.database)
+
+    client.put(f"/products/{product_id}", json={"price": 20}, headers=admin_headers)
+    assert client.get(f"/products/{product_id}").json()["price"] == 20
+    assert client.get("/products/").json()[0]["price"] == 20
@@ -0,0 +1,66 @@
+import time
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.tasks import maintenance
+from app.utils.catalog_cache import catalog_cache
+
+
+def _add(client, headers, product_id, quantity):
+    return client.post("/cart/add", json={"product_id": product_id, "quantity": quantity}, headers=headers)
+
+
+def test_checkout_updates_cached_stock(client, register, create_product):
+    product_id = create_product("Teclado", stock=5)
+    assert client.get(f"/products/{product_id}").json()["stock"] == 5
+    buyer = register("buyer@example.com")
+
+    assert _add(client, buyer, product_id, 2).status_code == 200
+    assert client.post("/invoicing/create", headers=buyer).status_code == 200
+    assert client.get(f"/products/{product_id}").json()["stock"] == 3
+    assert client.get("/products/").json()[0]["stock"] == 3
+
+
+def test_checkout_without_stock_for_every_line_sells_nothing(client, register, create_product, admin_headers):
+    mouse = create_product("Ratón", stock=5)
+    screen = create_product("Pantalla", stock=5)
+    buyer = register("buyer@example.com")
+    assert _add(client, buyer, mouse, 2).status_code == 200
+    assert _add(client, buyer, screen, 3).status_code == 200
+
+    # El admin deja la pantalla sin unidades suficientes después de reservar
+    client.put(f"/products/{screen}", json={"stock": 1}, headers=admin_headers)
+    response = client.post("/invoicing/create", headers=buyer)
+    assert response.status_code == 409
+    assert "Pantalla" in response.json()["detail"]
+
+    assert client.get(f"/products/{mouse}/availability").json()["stock"] == 5
+    assert len(client.get("/cart/", headers=buyer).json()["items"]) == 2
+
+
+def test_checkout_keeps_cached_responses_of_other_products(client, register, create_product):
+    sold = create_product("Teclado", stock=5)
+    other = create_product("Monitor", stock=5)
+    client.get(f"/products/{other}")
+    version = catalog_cache.version
+    buyer = register("buyer@example.com")
+
+    assert _add(client, buyer, sold, 1).status_code == 200
+    assert client.post("/invoicing/create", headers=buyer).status_code == 200
+    assert catalog_cache.version == version
+    assert catalog_cache.get(("product", other)) is not None
+    assert catalog_cache.get(("product", sold)) is None
+
+
+def test_checkout_in_another_worker_evicts_its_products(client, create_product):
+    product_id = create_product("Teclado", stock=5)
+    assert client.get(f"/products/{product_id}").json()["stock"] == 5
+
+    # Compra confirmada por otro worker: solo queda su registro en product_changes
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE products SET stock = 4 WHERE id = :id"), {"id": product_id})
+        conn.execute(text("INSERT INTO product_changes (product_id, changed_at) VALUES (:id, :now)"),
+                     {"id": product_id, "now": int(time.time())})
+    client.portal.call(maintenance.refresh_catalog_version)
+    assert client.get(f"/products/{product_id}").json()["stock"] == 4
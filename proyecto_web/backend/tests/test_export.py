@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from app.services.export_service import INVOICE_COLUMNS, ITEM_COLUMNS, PRODUCT_COLUMNS
+from app.utils import export_stream
+
+TRICKY = 'Dice "hola", adiós\nsegunda línea, con coma'
+
+
+def _create(client, headers, name: str, description: str, price: float = 10.0, stock: int = 5) -> int:
+    response = client.post("/products/", json={"name": name, "description": description, "price": price, "stock": stock},
+                           headers=headers)
+    return response.json()["id"]
+
+
+def test_product_csv_export_escapes_commas_quotes_and_newlines(client, admin_headers):
+    tricky = _create(client, admin_headers, "Taza, grande", TRICKY)
+    _create(client, admin_headers, "Plato", "")
+
+    response = client.get("/products/export", params={"format": "csv"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="products.csv"'
+
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == PRODUCT_COLUMNS
+    assert len(rows) == 2
+    assert rows[0] == [str(tricky), "Taza, grande", TRICKY, "10.0", "5"]
+
+
+def test_product_ndjson_export_has_one_object_per_line(client, admin_headers, monkeypatch):
+    # Bloques diminutos: cada objeto cae en un envío distinto y el framing no debe romperse
+    monkeypatch.setattr(export_stream, "BUFFER_BYTES", 16)
+    ids = [_create(client, admin_headers, f"Ñandú {i}", TRICKY) for i in range(3)]
+
+    response = client.get("/products/export", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="products.ndjson"'
+
+    assert response.text.endswith("\n")
+    lines = response.text.splitlines()
+    assert len(lines) == 3
+    records = [json.loads(line) for line in lines]
+    assert [record["id"] for record in records] == ids
+    assert records[0]["description"] == TRICKY
+    assert "Ñandú" in lines[0]
+
+
+def test_export_requires_an_admin(client, register):
+    headers = register("buyer@example.com")
+    assert client.get("/products/export", headers=headers).status_code == 403
+    today = date.today().isoformat()
+    response = client.get("/invoicing/admin/export", params={"date_from": today, "date_to": today}, headers=headers)
+    assert response.status_code == 403
+
+
+def test_invoice_export_nests_items_in_ndjson_and_flattens_them_in_csv(client, admin_headers, register):
+    buyer = register("buyer@example.com")
+    first = _create(client, admin_headers, "Taza", "", price=5)
+    second = _create(client, admin_headers, "Plato", "", price=8)
+    for product_id, quantity in ((first, 2), (second, 1)):
+        client.post("/cart/add", json={"product_id": product_id, "quantity": quantity}, headers=buyer)
+    assert client.post("/invoicing/create", headers=buyer).status_code == 200
+
+    today = datetime.utcnow().date().isoformat()
+    params = {"date_from": today, "date_to": today}
+    response = client.get("/invoicing/admin/export", params=params, headers=admin_headers)
+    assert response.headers["content-disposition"] == f'attachment; filename="invoices_{today}_{today}.ndjson"'
+    [invoice] = [json.loads(line) for line in response.text.splitlines()]
+    assert [(item["product_id"], item["quantity"]) for item in invoice["items"]] == [(first, 2), (second, 1)]
+    assert invoice["total_amount"] == 18
+    datetime.fromisoformat(invoice["created_at"])
+
+    response = client.get("/invoicing/admin/export", params={**params, "format": "csv"}, headers=admin_headers)
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == INVOICE_COLUMNS + ITEM_COLUMNS
+    assert [row[header.index("product_name")] for row in rows] == ["Taza", "Plato"]
+    assert {row[header.index("invoice_id")] for row in rows} == {str(invoice["invoice_id"])}
+
+
+def test_invoice_export_rejects_reversed_ranges(client, admin_headers):
+    response = client.get("/invoicing/admin/export", params={"date_from": "2024-02-01", "date_to": "2024-01-01"},
+                          headers=admin_headers)
+    assert response.status_code == 400
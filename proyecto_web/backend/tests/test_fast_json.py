@@ -0,0 +1,94 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel, TypeAdapter
+
+from app.routes import chat_routes, invoice_routes, user_routes
+from app.services import product_service
+from app.utils import fast_json
+from app.utils.catalog_cache import catalog_cache
+
+LIST_ENDPOINTS = ["/products/", "/products/?limit=2&sort=-price", "/users/", "/chat/messages", "/invoicing/admin/all"]
+
+
+class _Row(BaseModel):
+    id: int
+    name: str
+    price: float
+    amount: Decimal
+    created_at: datetime
+    day: date
+    note: Optional[str]
+    tags: List[str]
+
+
+_rows = TypeAdapter(List[_Row])
+_VALUES = [
+    dict(id=1, name="Ñandú \"grande\"", price=10.0, amount=Decimal("10.50"), created_at=datetime(2024, 5, 1, 12, 30),
+         day=date(2024, 5, 1), note=None, tags=[]),
+    dict(id=2, name="UTC", price=0.1, amount=Decimal("3"), created_at=datetime(2024, 5, 1, 12, 30, 0, 123456, timezone.utc),
+         day=date(2024, 1, 31), note="línea\nnueva", tags=["a", "b"]),
+    dict(id=3, name="Madrid", price=1234567.891, amount=Decimal("-0.001"),
+         created_at=datetime(2024, 5, 1, 14, 30, tzinfo=timezone(timedelta(hours=2))), day=date(2024, 2, 29),
+         note="", tags=["ü"]),
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def serializer(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    elif fast_json.orjson is None:
+        pytest.skip("orjson no está instalado")
+
+
+def test_rows_serialize_like_the_pydantic_schema(serializer):
+    expected = _rows.dump_json(_rows.validate_python(_VALUES))
+    assert fast_json.dumps(_VALUES) == expected
+
+
+def test_floats_in_exponent_notation_keep_their_value(serializer):
+    # El exponente puede escribirse distinto ("1e-07", "1e16"), pero el número JSON es el mismo
+    values = [dict(_VALUES[0], price=price) for price in (1e-7, 1e16, 2.5e-300)]
+    expected = _rows.dump_json(_rows.validate_python(values))
+    assert json.loads(fast_json.dumps(values)) == json.loads(expected)
+
+
+@pytest.fixture
+def populated(client, admin_headers, register):
+    buyer = register("buyer@example.com")
+    ids = []
+    for name, price in (("Taza", 5.5), ("Plato \"hondo\"", 8), ("Ñandú", 12.25)):
+        response = client.post("/products/", json={"name": name, "description": "línea\nnueva", "price": price,
+                                                    "stock": 10}, headers=admin_headers)
+        ids.append(response.json()["id"])
+    for product_id in ids[:2]:
+        client.post("/cart/add", json={"product_id": product_id, "quantity": 2}, headers=buyer)
+    assert client.post("/invoicing/create", headers=buyer).status_code == 200
+    client.post("/chat/messages", json={"message": "¿Hay stock?"}, headers=buyer)
+    client.post("/chat/messages", json={"message": "Sí"}, headers=admin_headers)
+    return ids
+
+
+def _set_fast_json(monkeypatch, enabled: bool) -> None:
+    for module in (product_service, user_routes, chat_routes, invoice_routes):
+        monkeypatch.setattr(module, "FAST_JSON_RESPONSES", enabled)
+
+
+@pytest.mark.parametrize("endpoint", LIST_ENDPOINTS)
+def test_fast_json_responses_match_the_standard_serializer(client, admin_headers, populated, monkeypatch,
+                                                           serializer, endpoint):
+    responses = []
+    for enabled in (False, True):
+        _set_fast_json(monkeypatch, enabled)
+        # Las páginas del catálogo se sirven desde la caché: cada modo debe serializar la suya
+        catalog_cache.evict_products(populated)
+        response = client.get(endpoint, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        responses.append(response.content)
+
+    standard, fast = responses
+    assert fast == standard
@@ -0,0 +1,115 @@
+import ipaddress
+
+import pytest
+
+from app.config import LOGIN_BACKOFF_AFTER_FAILURES, LOGIN_FAILURE_WINDOW_SECONDS
+from app.utils import rate_limit
+from app.utils.rate_limit import (
+    InMemoryRateLimitBackend, LoginRateLimiter, LoginThrottled, RateLimitBackend, resolve_client_ip
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Reloj monotónico controlado por el test"""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_repeated_wrong_passwords_lock_out_the_client(client, register):
+    register("victim@example.com", "right-secret")
+    for _ in range(LOGIN_BACKOFF_AFTER_FAILURES):
+        response = client.post("/auth/login", json={"email": "victim@example.com", "password": "wrong-secret"})
+        assert response.status_code == 401
+
+    response = client.post("/auth/login", json={"email": "victim@example.com", "password": "right-secret"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+
+async def test_lockout_is_scoped_to_email_and_ip(clock):
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(), per_email=100, per_ip=100)
+    for _ in range(LOGIN_BACKOFF_AFTER_FAILURES):
+        await limiter.check("victim@example.com", "10.0.0.1")
+        await limiter.record_failure("victim@example.com", "10.0.0.1")
+
+    with pytest.raises(LoginThrottled):
+        await limiter.check("victim@example.com", "10.0.0.1")
+    # El dueño de la cuenta entra desde su propia IP
+    await limiter.check("victim@example.com", "10.0.0.2")
+
+
+async def test_rejected_attempts_do_not_extend_the_window(clock):
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(), per_email=3, per_ip=100, window=60)
+    for _ in range(3):
+        await limiter.check("user@example.com", "10.0.0.1")
+
+    # Reintentos constantes mientras la ventana está llena
+    for _ in range(29):
+        clock[0] += 2
+        with pytest.raises(LoginThrottled) as throttled:
+            await limiter.check("user@example.com", "10.0.0.1")
+        assert throttled.value.scope == "email"
+
+    # Pasado un minuto desde los intentos admitidos vuelve a entrar
+    clock[0] += 2
+    await limiter.check("user@example.com", "10.0.0.1")
+
+
+async def test_ip_failures_expire_with_their_window_despite_new_failures(clock):
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(), per_email=100, per_ip=100)
+    below_lockout = LOGIN_BACKOFF_AFTER_FAILURES - 1
+    # Fallos repartidos por la ventana con cuentas distintas: solo se acumulan en la clave de la IP
+    for i in range(below_lockout):
+        await limiter.record_failure(f"user{i}@example.com", "10.0.0.1")
+        clock[0] += LOGIN_FAILURE_WINDOW_SECONDS / below_lockout
+
+    # La ventana se cerró aunque el último fallo fue reciente: se empieza a contar de nuevo
+    for i in range(below_lockout):
+        await limiter.record_failure(f"other{i}@example.com", "10.0.0.1")
+    await limiter.check("someone@example.com", "10.0.0.1")
+
+    await limiter.record_failure("last@example.com", "10.0.0.1")
+    with pytest.raises(LoginThrottled) as throttled:
+        await limiter.check("someone@example.com", "10.0.0.1")
+    assert throttled.value.scope == "ip"
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+
+
+@pytest.fixture
+def trusted_proxies(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_trusted_proxies", [ipaddress.ip_network("10.0.0.0/8")])
+
+
+def test_client_ip_comes_from_forwarded_header_of_trusted_proxies(trusted_proxies):
+    assert resolve_client_ip("10.1.2.3", "203.0.113.7") == "203.0.113.7"
+    # Puerto añadido por el balanceador y cadena de proxies propios
+    assert resolve_client_ip("10.1.2.3", "203.0.113.7:51234, 10.4.5.6") == "203.0.113.7"
+    assert resolve_client_ip("10.1.2.3", "[2001:db8::1]:443") == "2001:db8::1"
+    # Lo que el cliente escribe a la izquierda de su IP no cuenta
+    assert resolve_client_ip("10.1.2.3", "1.1.1.1, 203.0.113.7") == "203.0.113.7"
+
+
+def test_forwarded_header_is_ignored_from_untrusted_peers(trusted_proxies):
+    assert resolve_client_ip("198.51.100.9", "203.0.113.7") == "198.51.100.9"
+    assert resolve_client_ip("10.1.2.3", None) == "10.1.2.3"
+
+
+def test_login_limit_applies_per_forwarded_client(client, register, monkeypatch):
+    # TestClient se conecta como "testclient": hace de balanceador
+    monkeypatch.setattr(rate_limit, "_is_trusted_proxy", lambda host: host == "testclient")
+    register("victim@example.com", "right-secret")
+    attacker = {"X-Forwarded-For": "203.0.113.7"}
+    for _ in range(LOGIN_BACKOFF_AFTER_FAILURES):
+        client.post("/auth/login", json={"email": "victim@example.com", "password": "wrong"}, headers=attacker)
+    response = client.post("/auth/login", json={"email": "victim@example.com", "password": "right-secret"}, headers=attacker)
+    assert response.status_code == 429
+
+    owner = {"X-Forwarded-For": "198.51.100.20"}
+    response = client.post("/auth/login", json={"email": "victim@example.com", "password": "right-secret"}, headers=owner)
+    assert response.status_code == 200
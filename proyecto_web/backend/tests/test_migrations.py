@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+
+from app.database import Base
+from app.migrations import runner
+from app.migrations.runner import Migration, load_migrations, migration_status, run_migrations
+
+
+@pytest.fixture
+def fresh_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _statements(engine):
+    executed = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: executed.append(statement))
+    return executed
+
+
+def _index_sql(engine) -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"))
+        return {name: " ".join(sql.split()) for name, sql in rows}
+
+
+def test_migrations_apply_in_order_and_only_once(fresh_engine):
+    versions = [m.version for m in load_migrations()]
+    assert versions == sorted(versions)
+
+    assert run_migrations(fresh_engine) == versions
+    assert run_migrations(fresh_engine) == []
+    assert all(applied_at is not None for _, applied_at in migration_status(fresh_engine))
+
+
+def test_migrated_schema_matches_the_models(fresh_engine, tmp_path):
+    run_migrations(fresh_engine)
+    models = create_engine(f"sqlite:///{tmp_path / 'models.db'}")
+    Base.metadata.create_all(models)
+
+    migrated_tables = set(inspect(fresh_engine).get_table_names())
+    for table in inspect(models).get_table_names():
+        assert table in migrated_tables
+        migrated = {c["name"] for c in inspect(fresh_engine).get_columns(table)}
+        assert migrated == {c["name"] for c in inspect(models).get_columns(table)}, table
+    # Mismos índices con la misma definición (incluida la condición de los parciales)
+    migrated_indexes = _index_sql(fresh_engine)
+    for name, sql in _index_sql(models).items():
+        assert migrated_indexes.get(name) == sql.replace(" IF NOT EXISTS", ""), name
+    models.dispose()
+
+
+def test_failed_transactional_migration_is_rolled_back(fresh_engine, monkeypatch):
+    # pysqlite confirma el DDL por su cuenta: la transacción se comprueba con un cambio de datos
+    with fresh_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE settings (name VARCHAR PRIMARY KEY)"))
+
+    def upgrade(conn):
+        conn.execute(text("INSERT INTO settings (name) VALUES ('half_done')"))
+        raise RuntimeError("fallo a mitad")
+
+    monkeypatch.setattr(runner, "load_migrations", lambda: [Migration(1, "v0001_broken", "", True, upgrade)])
+    with pytest.raises(RuntimeError):
+        run_migrations(fresh_engine)
+
+    with fresh_engine.connect() as conn:
+        assert conn.scalar(text("SELECT count(*) FROM settings")) == 0
+    assert migration_status(fresh_engine)[0][1] is None
+
+
+def test_non_transactional_migration_runs_in_autocommit(fresh_engine, monkeypatch):
+    isolation_levels = []
+
+    def upgrade(conn):
+        isolation_levels.append(conn.get_execution_options().get("isolation_level"))
+
+    monkeypatch.setattr(runner, "load_migrations", lambda: [Migration(1, "v0001_concurrently", "", False, upgrade)])
+    assert run_migrations(fresh_engine) == [1]
+    assert isolation_levels == ["AUTOCOMMIT"]
+
+
+def test_advisory_lock_is_only_taken_on_postgres(fresh_engine):
+    executed = _statements(fresh_engine)
+    run_migrations(fresh_engine)
+    assert executed and not any("pg_advisory" in statement for statement in executed)
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app.database import engine
+from app.utils import password_pool
+from app.utils.auth import configure_bcrypt_rounds
+
+
+def _bcrypt_cost(email: str) -> int:
+    with engine.connect() as conn:
+        hashed = conn.scalar(text("SELECT hashed_password FROM users WHERE email = :email"), {"email": email})
+    return int(hashed.split("$")[2])
+
+
+@pytest.fixture
+def bcrypt_rounds(monkeypatch):
+    """Cambia el coste configurado de bcrypt (también en los procesos del pool de hashing)"""
+    original = password_pool._bcrypt_rounds
+
+    def _set(rounds: int) -> None:
+        monkeypatch.setattr(password_pool, "_bcrypt_rounds", rounds)
+        configure_bcrypt_rounds(rounds)
+        password_pool.shutdown_hash_pool()
+
+    yield _set
+    configure_bcrypt_rounds(original)
+    password_pool.shutdown_hash_pool()
+
+
+def test_calibration_picks_the_highest_cost_within_target(monkeypatch):
+    # Cada ronda extra duplica el coste: 10 ms con 10 rondas -> 80 ms con 13
+    monkeypatch.setattr(password_pool, "measure_bcrypt_seconds", lambda rounds: 0.010)
+    assert password_pool.calibrate_bcrypt_rounds(target_ms=100, min_rounds=10, max_rounds=16) == 13
+    assert password_pool.calibrate_bcrypt_rounds(target_ms=100, min_rounds=10, max_rounds=12) == 12
+    # Ni siquiera el mínimo cabe en el objetivo: se usa el mínimo
+    assert password_pool.calibrate_bcrypt_rounds(target_ms=5, min_rounds=10, max_rounds=16) == 10
+
+
+def test_login_rehashes_with_the_new_cost_and_keeps_sessions(client, register, bcrypt_rounds):
+    headers = register("rehash@example.com", "secret123")
+    assert _bcrypt_cost("rehash@example.com") == 4
+
+    bcrypt_rounds(5)
+    login = client.post("/auth/login", json={"email": "rehash@example.com", "password": "secret123"})
+    assert login.status_code == 200
+    assert _bcrypt_cost("rehash@example.com") == 5
+
+    # La sesión anterior y la nueva siguen valiendo: no hay revocación
+    assert client.get("/users/me", headers=headers).status_code == 200
+    new_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert client.get("/users/me", headers=new_headers).status_code == 200
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT count(*) FROM token_revocations")) == 0
+
+    # Con el hash ya al día, el siguiente login no lo recalcula
+    with engine.connect() as conn:
+        hashed = conn.scalar(text("SELECT hashed_password FROM users WHERE email = 'rehash@example.com'"))
+    client.post("/auth/login", json={"email": "rehash@example.com", "password": "secret123"})
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT hashed_password FROM users WHERE email = 'rehash@example.com'")) == hashed
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_hash_pool_round_trip(client, monkeypatch, workers):
+    # 0 -> threadpool de Starlette, 1 -> pool de procesos propio
+    monkeypatch.setattr(password_pool, "HASH_POOL_WORKERS", workers)
+
+    async def round_trip():
+        hashed = await password_pool.hash_password_async("secret123")
+        return (await password_pool.verify_password_async("secret123", hashed),
+                await password_pool.verify_password_async("wrong", hashed))
+
+    try:
+        assert client.portal.call(round_trip) == (True, False)
+    finally:
+        password_pool.shutdown_hash_pool()
+    assert password_pool._pending == 0
+
+
+def test_hash_pool_rejects_when_queue_is_full(client, monkeypatch):
+    monkeypatch.setattr(password_pool, "HASH_POOL_MAX_PENDING", 1)
+    rejected = REGISTRY.get_sample_value("password_hash_rejected_total")
+
+    async def concurrent_hashes():
+        return await asyncio.gather(
+            password_pool.hash_password_async("secret123"),
+            password_pool.hash_password_async("secret123"),
+            return_exceptions=True
+        )
+
+    first, second = client.portal.call(concurrent_hashes)
+    assert first.startswith("$2b$")
+    assert isinstance(second, password_pool.HashPoolBusy)
+    assert password_pool._pending == 0
+    assert REGISTRY.get_sample_value("password_hash_rejected_total") == rejected + 1
+
+
+def test_login_returns_503_when_hash_pool_is_full(client, register, monkeypatch):
+    register("busy@example.com", "secret123")
+    monkeypatch.setattr(password_pool, "HASH_POOL_MAX_PENDING", 0)
+
+    response = client.post("/auth/login", json={"email": "busy@example.com", "password": "secret123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,185 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text, update
+
+from app.database import AsyncSessionLocal, engine
+from app.models.email_outbox import EmailOutbox
+from app.repositories.email_outbox_repository import EmailOutboxRepository
+from app.tasks import email_sender
+from app.tasks.email_sender import OutboxSender
+from app.utils.smtp_stub import StubSMTPServer
+
+
+async def _outbox_rows():
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(EmailOutbox).order_by(EmailOutbox.id))).scalars().all()
+
+
+def _reset_token(client, email: str) -> str:
+    assert client.post("/auth/reset-password/request", json={"email": email}).status_code == 200
+    with engine.connect() as conn:
+        body = conn.scalar(text("SELECT text_body FROM email_outbox ORDER BY id DESC LIMIT 1"))
+    return re.search(r"token=([\w-]+)", body).group(1)
+
+
+def test_reset_token_is_single_use(client, register):
+    register("reset@example.com", "old-secret")
+    token = _reset_token(client, "reset@example.com")
+
+    response = client.post("/auth/reset-password", json={"token": token, "new_password": "new-secret"})
+    assert response.status_code == 200
+    assert client.post("/auth/login", json={"email": "reset@example.com", "password": "new-secret"}).status_code == 200
+
+    reused = client.post("/auth/reset-password", json={"token": token, "new_password": "other-secret"})
+    assert reused.status_code == 400
+    assert client.post("/auth/login", json={"email": "reset@example.com", "password": "other-secret"}).status_code == 401
+
+
+def test_new_reset_request_invalidates_previous_token(client, register):
+    register("twice@example.com")
+    first = _reset_token(client, "twice@example.com")
+    second = _reset_token(client, "twice@example.com")
+
+    assert client.post("/auth/reset-password", json={"token": first, "new_password": "new-secret"}).status_code == 400
+    assert client.post("/auth/reset-password", json={"token": second, "new_password": "new-secret"}).status_code == 200
+
+
+async def test_outbox_bodies_are_cleared_once_finished():
+    async with AsyncSessionLocal() as db:
+        repo = EmailOutboxRepository(db)
+        sent = await repo.enqueue("a@example.com", "Asunto", "token=secreto", "<a>token=secreto</a>")
+        failed = await repo.enqueue("b@example.com", "Asunto", "token=secreto", "<a>token=secreto</a>")
+        await repo.claim_batch(10, timedelta(minutes=5), max_attempts=5)
+        await repo.mark_sent([sent.id])
+        await repo.mark_failed(failed.id, "SMTP caído", retry_in=None)
+
+    for message in await _outbox_rows():
+        assert message.status in ("sent", "failed")
+        assert message.text_body == "" and message.html_body is None
+
+
+async def test_expired_lease_counts_as_attempt():
+    lease = timedelta(minutes=5)
+    async with AsyncSessionLocal() as db:
+        repo = EmailOutboxRepository(db)
+        message_id = (await repo.enqueue("c@example.com", "Asunto", "token=secreto")).id
+        for _ in range(3):
+            assert [m.id for m in await repo.claim_batch(10, lease, max_attempts=3)] == [message_id]
+            # El worker muere sin confirmar el envío: el lease vence
+            await db.execute(update(EmailOutbox).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+            await db.commit()
+        assert await repo.claim_batch(10, lease, max_attempts=3) == []
+
+    [message] = await _outbox_rows()
+    assert (message.status, message.attempts) == ("failed", 3)
+    assert message.text_body == "" and message.html_body is None
+
+
+async def test_finished_messages_are_purged_after_retention():
+    async with AsyncSessionLocal() as db:
+        repo = EmailOutboxRepository(db)
+        old = await repo.enqueue("d@example.com", "Asunto", "cuerpo")
+        recent = await repo.enqueue("e@example.com", "Asunto", "cuerpo")
+        pending = await repo.enqueue("f@example.com", "Asunto", "cuerpo")
+        await repo.mark_sent([old.id, recent.id])
+        await db.execute(update(EmailOutbox).where(EmailOutbox.id == old.id)
+                         .values(sent_at=datetime.utcnow() - timedelta(days=10)))
+        await db.commit()
+
+        assert await repo.delete_finished(timedelta(hours=72)) == 1
+
+    assert [m.id for m in await _outbox_rows()] == [recent.id, pending.id]
+
+
+def test_reset_token_is_not_stored_without_its_email(client, register, monkeypatch):
+    register("atomic@example.com")
+
+    async def failing_enqueue(self, *args, **kwargs):
+        raise RuntimeError("outbox no disponible")
+
+    monkeypatch.setattr(EmailOutboxRepository, "enqueue", failing_enqueue)
+    with pytest.raises(RuntimeError):
+        client.post("/auth/reset-password/request", json={"email": "atomic@example.com"})
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT count(*) FROM password_reset_tokens")) == 0
+
+
+async def _enqueue(*recipients: str) -> None:
+    async with AsyncSessionLocal() as db:
+        repo = EmailOutboxRepository(db)
+        for recipient in recipients:
+            await repo.enqueue(recipient, f"Asunto para {recipient}", "cuerpo", "<p>cuerpo</p>")
+        await db.commit()
+
+
+@pytest.fixture
+def smtp_settings(monkeypatch):
+    def _point_to(port: int) -> None:
+        monkeypatch.setattr(email_sender, "SMTP_SERVER", "127.0.0.1")
+        monkeypatch.setattr(email_sender, "SMTP_PORT", port)
+        monkeypatch.setattr(email_sender, "SMTP_USERNAME", None)
+        monkeypatch.setattr(email_sender, "SMTP_PASSWORD", None)
+        monkeypatch.setattr(email_sender, "SMTP_USE_TLS", False)
+        monkeypatch.setattr(email_sender, "SMTP_USE_SSL", False)
+    return _point_to
+
+
+async def test_outbox_batch_is_delivered_over_one_connection(smtp_settings, monkeypatch):
+    await _enqueue("a@example.com", "b@example.com", "c@example.com")
+    connects = []
+    original_connect = email_sender.aiosmtplib.SMTP.connect
+
+    async def counting_connect(self, *args, **kwargs):
+        connects.append(self)
+        return await original_connect(self, *args, **kwargs)
+
+    monkeypatch.setattr(email_sender.aiosmtplib.SMTP, "connect", counting_connect)
+    async with StubSMTPServer() as server:
+        smtp_settings(server.port)
+        sender = OutboxSender()
+        assert await sender.send_batch() == 3
+        assert await sender.send_batch() == 0
+        await sender.close()
+
+    assert [message["To"] for message in server.messages] == ["a@example.com", "b@example.com", "c@example.com"]
+    assert server.messages[0]["Subject"] == "Asunto para a@example.com"
+    assert len(connects) == 1
+    for row in await _outbox_rows():
+        assert (row.status, row.attempts, row.text_body) == ("sent", 0, "")
+
+
+async def test_unreachable_smtp_server_releases_the_rest_of_the_batch(smtp_settings, monkeypatch):
+    await _enqueue("a@example.com", "b@example.com", "c@example.com")
+    # Un puerto que acaba de quedar libre: la conexión se rechaza
+    async with StubSMTPServer() as server:
+        closed_port = server.port
+    smtp_settings(closed_port)
+    connections = []
+    original_connection = OutboxSender._connection
+
+    async def counting_connection(self):
+        connections.append(self)
+        return await original_connection(self)
+
+    monkeypatch.setattr(OutboxSender, "_connection", counting_connection)
+    assert await OutboxSender().send_batch() == 1
+    assert len(connections) == 1
+
+    first, *rest = await _outbox_rows()
+    assert (first.status, first.attempts) == ("pending", 1)
+    assert first.last_error
+    for row in rest:
+        # Devueltos a la cola sin gastar un intento, y sin esperar al lease de 5 minutos
+        assert (row.status, row.attempts, row.last_error) == ("pending", 0, None)
+        assert row.next_attempt_at < datetime.utcnow() + email_sender.CLAIM_LEASE
+
+
+async def test_batch_stops_before_its_lease_runs_out(smtp_settings, monkeypatch):
+    await _enqueue("a@example.com", "b@example.com")
+    monkeypatch.setattr(email_sender, "CLAIM_LEASE", timedelta(0))
+    smtp_settings(1)
+    assert await OutboxSender().send_batch() == 0
+    for row in await _outbox_rows():
+        assert (row.status, row.attempts) == ("pending", 0)
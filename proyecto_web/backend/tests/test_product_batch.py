@@ -0,0 +1,43 @@
+from app.config import PRODUCT_BATCH_MAX_IDS
+from app.utils.query_stats import query_budget
+
+
+def test_batch_keeps_the_requested_order_and_reports_missing_ids(client, create_product):
+    first, second, third = (create_product(name) for name in ("Uno", "Dos", "Tres"))
+
+    response = client.get("/products/batch", params={"ids": f"{third},999,{first},{second}"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [p["id"] for p in body["products"]] == [third, first, second]
+    assert body["products"][0]["name"] == "Tres"
+    assert body["missing"] == [999]
+
+
+def test_batch_collapses_duplicates(client, create_product):
+    product_id = create_product("Uno")
+    body = client.post("/products/batch", json={"ids": [product_id, 5000, product_id, 5000]}).json()
+    assert [p["id"] for p in body["products"]] == [product_id]
+    assert body["missing"] == [5000]
+
+
+def test_batch_resolves_uncached_ids_in_one_query(client, create_product):
+    ids = [create_product(f"P{i}") for i in range(4)]
+    # Uno ya cacheado por GET /products/{id}
+    client.get(f"/products/{ids[0]}")
+    with query_budget(1):
+        body = client.get("/products/batch", params={"ids": ",".join(map(str, ids + [2 ** 40]))}).json()
+    assert [p["id"] for p in body["products"]] == ids
+    # Un id fuera de rango de INTEGER no llega a la BD y cuenta como inexistente
+    assert body["missing"] == [2 ** 40]
+    with query_budget(0):
+        client.get("/products/batch", params={"ids": ",".join(map(str, ids))})
+
+
+def test_batch_enforces_the_id_limit(client):
+    too_many = list(range(1, PRODUCT_BATCH_MAX_IDS + 2))
+    response = client.post("/products/batch", json={"ids": too_many})
+    assert response.status_code == 422
+    # Los repetidos no cuentan para el límite
+    assert client.post("/products/batch", json={"ids": [1] * (PRODUCT_BATCH_MAX_IDS + 1)}).status_code == 200
+    assert client.get("/products/batch", params={"ids": "1,,2"}).status_code == 422
+    assert client.post("/products/batch", json={"ids": []}).status_code == 422
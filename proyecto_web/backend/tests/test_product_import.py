@@ -0,0 +1,84 @@
+import json
+
+from sqlalchemy import text
+
+from app.database import engine
+
+
+def _import(client, headers, body: str, content_type: str = "text/csv"):
+    response = client.post("/products/import", content=body, headers={**headers, "Content-Type": content_type})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _product(client, product_id: int) -> dict:
+    return client.get(f"/products/{product_id}").json()
+
+
+def test_rows_with_id_only_update_the_columns_they_bring(client, admin_headers):
+    client.post("/products/", json={"name": "Taza", "description": "Cerámica", "price": 5, "stock": 7},
+                headers=admin_headers)
+    product_id = client.get("/products/").json()[0]["id"]
+
+    result = _import(client, admin_headers, f"id,name,description,price,stock\n{product_id},Taza grande,,6,\n")
+    assert (result["inserted"], result["updated"]) == (0, 1)
+    product = _product(client, product_id)
+    assert (product["name"], product["price"]) == ("Taza grande", 6)
+    # Las celdas vacías no borran lo que ya había
+    assert (product["description"], product["stock"]) == ("Cerámica", 7)
+
+    ndjson = json.dumps({"id": product_id, "name": "Taza", "price": 6, "stock": 2}) + "\n"
+    _import(client, admin_headers, ndjson, "application/x-ndjson")
+    assert (_product(client, product_id)["description"], _product(client, product_id)["stock"]) == ("Cerámica", 2)
+
+
+def test_new_ids_and_rows_without_id_are_inserted_with_defaults(client, admin_headers):
+    result = _import(client, admin_headers, "id,name,price,stock\n500,Lámpara,20,\n,Mesa,80,3\n")
+    assert (result["rows"], result["inserted"], result["updated"], result["rejected"]) == (2, 2, 0, 0)
+    lamp = _product(client, 500)
+    assert (lamp["name"], lamp["stock"], lamp["description"]) == ("Lámpara", 0, None)
+    assert [p["name"] for p in client.get("/products/").json()] == ["Lámpara", "Mesa"]
+
+
+def test_repeated_id_in_a_chunk_accumulates_its_columns(client, admin_headers):
+    body = "\n".join([
+        json.dumps({"id": 7, "name": "Silla", "price": 30, "description": "Roble"}),
+        json.dumps({"id": 7, "name": "Silla", "price": 25, "stock": 4}),
+    ]) + "\n"
+    result = _import(client, admin_headers, body, "application/x-ndjson")
+    assert (result["inserted"], result["rejected"]) == (1, 0)
+    chair = _product(client, 7)
+    assert (chair["price"], chair["stock"], chair["description"]) == (25, 4, "Roble")
+
+
+def test_invalid_rows_are_reported_by_line(client, admin_headers):
+    body = f"id,name,price,stock\n{2 ** 31},Fuera de rango,1,1\n,Sin precio,,1\n,Válido,3,1\n"
+    result = _import(client, admin_headers, body)
+    assert (result["rows"], result["inserted"], result["rejected"]) == (3, 1, 2)
+    assert [error["line"] for error in result["errors"]] == [2, 3]
+    assert "id" in result["errors"][0]["error"]
+
+
+def test_database_errors_only_reject_the_failing_rows(client, admin_headers):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TRIGGER reject_forbidden_name BEFORE INSERT ON products WHEN new.name = 'Prohibido' "
+            "BEGIN SELECT RAISE(ABORT, 'nombre no permitido'); END"
+        ))
+    try:
+        result = _import(client, admin_headers, "name,price\nUno,1\nProhibido,2\nTres,3\n")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TRIGGER reject_forbidden_name"))
+
+    assert (result["inserted"], result["rejected"], result["chunks"]) == (2, 1, 1)
+    assert result["errors"][0]["line"] == 3
+    assert "nombre no permitido" in result["errors"][0]["error"]
+    assert [p["name"] for p in client.get("/products/").json()] == ["Uno", "Tres"]
+
+
+def test_import_requires_an_admin(client, register):
+    headers = register("buyer@example.com")
+    response = client.post("/products/import", content="name,price\nUno,1\n",
+                           headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == 403
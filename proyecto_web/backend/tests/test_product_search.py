@@ -0,0 +1,55 @@
+from app.database import AsyncSessionLocal
+from app.repositories.product_repository import ProductRepository
+
+
+def _create(client, headers, name: str, description: str = "") -> int:
+    response = client.post("/products/", json={"name": name, "description": description, "price": 10, "stock": 1},
+                           headers=headers)
+    return response.json()["id"]
+
+
+def test_name_matches_rank_above_description_matches(client, admin_headers):
+    in_description = _create(client, admin_headers, "Alfombrilla", "Ideal para tu ratón gaming")
+    in_name = _create(client, admin_headers, "Ratón gaming", "Sensor óptico")
+    _create(client, admin_headers, "Teclado", "Mecánico")
+
+    hits = client.get("/products/search", params={"q": "raton"}).json()
+    assert [hit["id"] for hit in hits] == [in_name, in_description]
+    assert hits[0]["rank"] > hits[1]["rank"]
+
+
+def test_matches_are_highlighted_and_html_is_escaped(client, admin_headers):
+    _create(client, admin_headers, "Cable <USB> trenzado", "Cable resistente & flexible de 2 metros")
+
+    [hit] = client.get("/products/search", params={"q": "cable"}).json()
+    assert hit["name_highlight"] == "<mark>Cable</mark> &lt;USB&gt; trenzado"
+    assert "<mark>Cable</mark> resistente &amp; flexible" in hit["snippet"]
+
+
+def test_queries_without_words_return_nothing(client, admin_headers):
+    _create(client, admin_headers, "Lámpara")
+    response = client.get("/products/search", params={"q": "\"*( )"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_search_pages_follow_the_cursor(client, admin_headers):
+    ids = [_create(client, admin_headers, f"Vaso {i}") for i in range(5)]
+    first = client.get("/products/search", params={"q": "vaso", "limit": 3})
+    rest = client.get("/products/search", params={"q": "vaso", "limit": 3, "cursor": first.headers["x-next-cursor"]})
+    assert sorted(hit["id"] for hit in first.json() + rest.json()) == ids
+    assert "x-next-cursor" not in rest.headers
+
+
+async def test_fallback_without_text_index_matches_every_word(client, admin_headers):
+    lamp = _create(client, admin_headers, "Lámpara de mesa", "Luz cálida")
+    _create(client, admin_headers, "Mesa de roble", "Sin luz")
+    snake = _create(client, admin_headers, "snake_case", "")
+    async with AsyncSessionLocal() as db:
+        repo = ProductRepository(db)
+        assert [row["id"] for row in await repo.search_like("MESA cálida", 10)] == [lamp]
+        assert [row["name"] for row in await repo.search_like("mesa", 1, after=(0.0, lamp))] == ["Mesa de roble"]
+        # "_" es literal, no el comodín de LIKE ("de roble" no cuenta como "e_r")
+        assert [row["id"] for row in await repo.search_like("e_c", 10)] == [snake]
+        assert await repo.search_like("e_r", 10) == []
+        assert await repo.search_like("***", 10) == []
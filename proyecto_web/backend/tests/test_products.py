@@ -0,0 +1,98 @@
+from app.config import DEFAULT_PAGE_SIZE
+
+
+def test_list_without_limit_or_cursor_returns_whole_catalog(client, create_product):
+    for i in range(DEFAULT_PAGE_SIZE + 5):
+        create_product(f"Producto {i}")
+
+    response = client.get("/products/")
+    assert len(response.json()) == DEFAULT_PAGE_SIZE + 5
+    assert "x-next-cursor" not in response.headers
+
+
+def test_list_with_limit_is_paginated(client, create_product):
+    for i in range(DEFAULT_PAGE_SIZE + 5):
+        create_product(f"Producto {i}")
+
+    first = client.get("/products/?limit=10")
+    assert len(first.json()) == 10
+    cursor = first.headers["x-next-cursor"]
+    # Con cursor y sin limit se usa DEFAULT_PAGE_SIZE
+    rest = client.get("/products/", params={"cursor": cursor})
+    assert [p["id"] for p in rest.json()] == [p["id"] for p in client.get("/products/").json()][10:10 + DEFAULT_PAGE_SIZE]
+
+
+def _names(response):
+    assert response.status_code == 200, response.text
+    return [p["name"] for p in response.json()]
+
+
+def _walk(client, params, limit):
+    """Recorre todas las páginas siguiendo X-Next-Cursor"""
+    names, cursor = [], None
+    while True:
+        response = client.get("/products/", params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        names += _names(response)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return names
+
+
+def test_price_bounds_are_inclusive(client, create_product):
+    for name, price in (("Barato", 5), ("Medio", 10), ("Caro", 20), ("Lujo", 50)):
+        create_product(name, price=price)
+
+    assert _names(client.get("/products/", params={"min_price": 10})) == ["Medio", "Caro", "Lujo"]
+    assert _names(client.get("/products/", params={"max_price": 20})) == ["Barato", "Medio", "Caro"]
+    assert _names(client.get("/products/", params={"min_price": 10, "max_price": 20})) == ["Medio", "Caro"]
+    assert _names(client.get("/products/", params={"min_price": 21, "max_price": 49})) == []
+    assert client.get("/products/", params={"min_price": -1}).status_code == 422
+
+
+def test_in_stock_and_name_prefix_filters(client, create_product):
+    create_product("Ratón USB", stock=3)
+    create_product("ratonera", stock=0)
+    create_product("Teclado", stock=1)
+    create_product("Rat_a", stock=2)
+
+    assert _names(client.get("/products/", params={"in_stock": True})) == ["Ratón USB", "Teclado", "Rat_a"]
+    # Prefijo sin distinguir mayúsculas; "_" no es comodín
+    assert _names(client.get("/products/", params={"name_prefix": "RAT"})) == ["Ratón USB", "ratonera", "Rat_a"]
+    assert _names(client.get("/products/", params={"name_prefix": "Raton"})) == ["ratonera"]
+    assert _names(client.get("/products/", params={"name_prefix": "rat_"})) == ["Rat_a"]
+    response = client.get("/products/", params={"name_prefix": "rat", "in_stock": True, "include_total": True, "limit": 1})
+    assert _names(response) == ["Ratón USB"]
+    assert response.headers["x-total-count"] == "2"
+
+
+def test_sorting_by_price_and_name(client, create_product):
+    for name, price in (("b", 20), ("c", 10), ("a", 30)):
+        create_product(name, price=price)
+
+    assert _names(client.get("/products/", params={"sort": "price"})) == ["c", "b", "a"]
+    assert _names(client.get("/products/", params={"sort": "-price"})) == ["a", "b", "c"]
+    assert _names(client.get("/products/", params={"sort": "name"})) == ["a", "b", "c"]
+    assert _names(client.get("/products/", params={"sort": "-id"})) == ["a", "c", "b"]
+    assert client.get("/products/", params={"sort": "stock"}).status_code == 422
+
+
+def test_descending_cursor_is_stable_with_ties_and_concurrent_inserts(client, create_product):
+    # Precios repetidos: el desempate por id mantiene un orden total
+    for i, price in enumerate((10, 20, 20, 20, 30, 10, 20)):
+        create_product(f"P{i}", price=price)
+    expected = _names(client.get("/products/", params={"sort": "-price"}))
+    assert _walk(client, {"sort": "-price"}, limit=2) == expected
+
+    first = client.get("/products/", params={"sort": "-price", "limit": 3})
+    # Un alta que ordena antes del cursor no desplaza las páginas siguientes
+    create_product("Nuevo caro", price=100)
+    rest = client.get("/products/", params={"sort": "-price", "limit": 10, "cursor": first.headers["x-next-cursor"]})
+    assert _names(first) + _names(rest) == expected
+
+
+def test_cursor_of_another_sort_is_rejected(client, create_product):
+    for i in range(3):
+        create_product(f"P{i}", price=i)
+    cursor = client.get("/products/", params={"sort": "price", "limit": 1}).headers["x-next-cursor"]
+    assert client.get("/products/", params={"sort": "-price", "cursor": cursor}).status_code == 400
+    assert client.get("/products/", params={"cursor": "no-es-un-cursor"}).status_code == 400
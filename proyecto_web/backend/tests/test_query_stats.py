@@ -0,0 +1,59 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app.config import QUERY_REPEAT_THRESHOLD
+from app.database import engine
+from app.utils.query_stats import QueryBudgetExceeded, query_budget
+
+
+def _repeated_requests(handler: str) -> float:
+    return REGISTRY.get_sample_value("db_repeated_statements_total", {"handler": handler}) or 0.0
+
+
+def test_product_detail_takes_one_statement_per_request(client, create_product):
+    product_id = create_product("Taza")
+
+    with query_budget(1) as observed:
+        assert client.get(f"/products/{product_id}").status_code == 200
+    [(handler, stats)] = observed
+    assert handler == "/products/{product_id}"
+    assert stats.statements == 1
+    assert stats.repeated() == []
+
+    # La segunda petición sale de la caché del catálogo
+    with query_budget(0) as observed:
+        client.get(f"/products/{product_id}")
+    assert observed[0][1].statements == 0
+
+
+def test_budget_fails_when_a_request_runs_more_statements(client, create_product):
+    product_id = create_product("Taza")
+    with pytest.raises(QueryBudgetExceeded, match="/products/{product_id}: 1"):
+        with query_budget(0):
+            client.get(f"/products/{product_id}")
+
+
+def test_repeated_statements_are_flagged(client, admin_headers, caplog):
+    # Un lote rechazado se repite fila a fila: el mismo INSERT una vez por fila
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TRIGGER reject_forbidden_name BEFORE INSERT ON products WHEN new.name = 'Prohibido' "
+            "BEGIN SELECT RAISE(ABORT, 'nombre no permitido'); END"
+        ))
+    rows = QUERY_REPEAT_THRESHOLD + 1
+    body = "name,price\nProhibido,1\n" + "".join(f"Producto {i},1\n" for i in range(rows))
+    flagged_before = _repeated_requests("/products/import")
+    try:
+        with query_budget(100) as observed:
+            client.post("/products/import", content=body, headers={**admin_headers, "Content-Type": "text/csv"})
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TRIGGER reject_forbidden_name"))
+
+    # Las sentencias que fallan no llegan a contarse: quedan las filas confirmadas
+    [(handler, stats)] = observed
+    [(sql, count)] = [(sql, n) for sql, n in stats.repeated() if sql.startswith("INSERT INTO products")]
+    assert count == rows
+    assert _repeated_requests("/products/import") == flagged_before + 1
+    assert "Posible N+1 en /products/import" in caplog.text
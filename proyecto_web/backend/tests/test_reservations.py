@@ -0,0 +1,114 @@
+import asyncio
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal, engine
+from app.repositories.product_repository import ProductRepository
+from app.repositories.reservation_repository import ReservationRepository
+from app.services.invoice_service import InvoiceService
+from app.utils.query_stats import track_queries
+
+TTL = timedelta(minutes=15)
+
+
+def _seed(stock: int, users: int):
+    with engine.begin() as conn:
+        product_id = conn.execute(text(
+            "INSERT INTO products (name, description, price, stock) VALUES ('Consola', '', 300, :stock) RETURNING id"
+        ), {"stock": stock}).scalar()
+        user_ids = [conn.execute(text(
+            "INSERT INTO users (email, name, hashed_password, is_admin) VALUES (:email, 'Usuario', 'x', 0) RETURNING id"
+        ), {"email": f"concurrent{i}@example.com"}).scalar() for i in range(users)]
+    return product_id, user_ids
+
+
+async def _reserve(user_id: int, product_id: int, quantity: int, hold_open: float = 0.0) -> int:
+    async with AsyncSessionLocal() as db:
+        available = await ReservationRepository(db).reserve(user_id, product_id, quantity, TTL)
+        # La transacción sigue abierta (y el producto bloqueado) mientras tanto
+        await asyncio.sleep(hold_open)
+        await db.commit()
+        return available
+
+
+async def test_concurrent_holds_do_not_share_units():
+    product_id, (first, second) = _seed(stock=5, users=2)
+    holding = asyncio.create_task(_reserve(first, product_id, 3, hold_open=0.3))
+    await asyncio.sleep(0.05)
+    assert await _reserve(second, product_id, 3) == 2
+    assert await holding == 5
+
+    async with AsyncSessionLocal() as db:
+        availability = await ReservationRepository(db).get_availability([product_id])
+    assert availability[product_id]["reserved"] == 3
+
+
+async def test_checkout_sees_hold_committed_while_it_waited():
+    product_id, (holder, buyer) = _seed(stock=5, users=2)
+    holding = asyncio.create_task(_reserve(holder, product_id, 3, hold_open=0.3))
+    await asyncio.sleep(0.05)
+
+    async with AsyncSessionLocal() as db:
+        sold = await ProductRepository(db).decrement_stock({product_id: 3})
+        await db.commit()
+    assert await holding == 5
+    assert sold == []
+
+    async with AsyncSessionLocal() as db:
+        assert (await ReservationRepository(db).get_availability([product_id]))[product_id]["stock"] == 5
+
+
+async def _checkout(user_id: int):
+    async with AsyncSessionLocal() as db:
+        with track_queries() as stats:
+            await InvoiceService(db).create_invoice_from_cart(user_id)
+        return stats
+
+
+async def test_checkouts_of_the_same_product_do_not_lock_it_beforehand():
+    product_id, buyers = _seed(stock=5, users=2)
+    for user_id in buyers:
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO cart (user_id, product_id, quantity) VALUES (:user_id, :product_id, 2)"),
+                         {"user_id": user_id, "product_id": product_id})
+        assert await _reserve(user_id, product_id, 2) >= 2
+
+    results = await asyncio.wait_for(asyncio.gather(*(_checkout(user_id) for user_id in buyers)), timeout=5)
+
+    for stats in results:
+        statements = [" ".join(sql.split()) for sql in stats.by_statement]
+        assert not any("FOR UPDATE" in sql for sql in statements)
+        # Reservas liberadas (DELETE + reserved) y un único UPDATE condicional del stock
+        assert sum(sql.startswith("UPDATE products SET stock=") for sql in statements) == 1
+    async with AsyncSessionLocal() as db:
+        availability = (await ReservationRepository(db).get_availability([product_id]))[product_id]
+    assert availability == {"product_id": product_id, "stock": 1, "reserved": 0, "available": 1}
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT reserved FROM products WHERE id = :id"), {"id": product_id}) == 0
+
+
+async def test_expired_hold_stops_counting_at_checkout():
+    product_id, (holder, buyer) = _seed(stock=5, users=2)
+    await _reserve(holder, product_id, 4)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE stock_reservations SET expires_at = '2000-01-01 00:00:00'"))
+        conn.execute(text("INSERT INTO cart (user_id, product_id, quantity) VALUES (:user_id, :product_id, 3)"),
+                     {"user_id": buyer, "product_id": product_id})
+
+    await _checkout(buyer)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT stock, reserved FROM products WHERE id = :id"), {"id": product_id}).one() == (2, 0)
+
+
+def test_stock_updates_do_not_reindex_search(client, create_product):
+    product_id = create_product("Guitarra eléctrica", stock=5)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE products SET stock = 4 WHERE id = :id"), {"id": product_id})
+        conn.execute(text("UPDATE products SET name = 'Bajo eléctrico' WHERE id = :id"), {"id": product_id})
+        matches = conn.execute(text(
+            "SELECT rowid FROM products_fts WHERE products_fts MATCH :q"
+        ), {"q": "bajo"}).scalars().all()
+        trigger = conn.scalar(text("SELECT sql FROM sqlite_master WHERE name = 'products_fts_au'"))
+    assert matches == [product_id]
+    assert "UPDATE OF name, description" in trigger
@@ -0,0 +1,54 @@
+from app.utils.suggest_index import PrefixIndex
+
+
+def _index(*names: str) -> PrefixIndex:
+    index = PrefixIndex()
+    index.rebuild(enumerate(names, start=1))
+    return index
+
+
+def test_suggest_matches_the_name_or_any_word_by_prefix():
+    index = _index("Ratón inalámbrico", "Teclado mecánico", "Rueda de ratón")
+    assert index.suggest("rat", 10) == [(3, "Rueda de ratón"), (1, "Ratón inalámbrico")]
+    assert index.suggest("inal", 10) == [(1, "Ratón inalámbrico")]
+    assert index.suggest("teclado mec", 10) == [(2, "Teclado mecánico")]
+    assert index.suggest("mouse", 10) == []
+    assert index.suggest("   ", 10) == []
+
+
+def test_suggest_ignores_case_and_accents():
+    index = _index("Árbol de Navidad", "ÑANDÚ de peluche")
+    assert index.suggest("ar", 10) == [(1, "Árbol de Navidad")]
+    assert index.suggest("ÁRBOL  DE", 10) == [(1, "Árbol de Navidad")]
+    assert index.suggest("nandu", 10) == [(2, "ÑANDÚ de peluche")]
+
+
+def test_suggest_respects_the_limit_without_repeating_products():
+    # "cable usb cable" tiene dos claves que empiezan por "cable": sale una vez
+    index = _index("Cable USB cable", "Cable HDMI", "Cable de red", "Cargador")
+    assert len(index.suggest("cable", 2)) == 2
+    # Orden alfabético de la clave: "cable", "cable de red", "cable hdmi"
+    assert [product_id for product_id, _ in index.suggest("cable", 10)] == [1, 3, 2]
+
+
+def test_incremental_changes_update_the_index():
+    index = _index("Ratón", "Teclado")
+    index.add(2, "Trackpad")
+    index.add_many([(3, "Árbol"), (1, "Alfombrilla")])
+    assert index.suggest("te", 10) == []
+    assert index.suggest("a", 10) == [(1, "Alfombrilla"), (3, "Árbol")]
+    index.remove(3)
+    assert index.suggest("ar", 10) == []
+    assert len(index) == 2
+
+
+def test_imported_products_are_suggested_right_away(client, admin_headers, create_product):
+    create_product("Arnés de escalada")
+    body = "id,name,price,stock\n,Árbol de Navidad,30,2\n,Taza,5,10\n"
+    response = client.post("/products/import", content=body, headers={**admin_headers, "Content-Type": "text/csv"})
+    assert response.status_code == 200, response.text
+
+    # Sin esperar a que el sondeo reconstruya el índice
+    suggestions = client.get("/products/suggest", params={"prefix": "ar"}).json()
+    assert [s["name"] for s in suggestions] == ["Árbol de Navidad", "Arnés de escalada"]
+    assert client.get("/products/suggest", params={"prefix": "ar", "limit": 1}).json()[0]["name"] == "Árbol de Navidad"
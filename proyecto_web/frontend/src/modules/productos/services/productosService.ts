@@ -45,6 +45,29 @@ export const productService = {
     return await response.json();
   },
 
+  /**
+   * Obtiene varios productos por ID en una sola petición, en el mismo orden.
+   * Los IDs que ya no existen se omiten (el backend los devuelve en `missing`).
+   */
+  async getProductsByIds(productIds: number[]): Promise<Product[]> {
+    if (productIds.length === 0) {
+      return [];
+    }
+    // GET es cacheable; las listas largas van en el cuerpo para no exceder la URL
+    const response: Response = productIds.length <= 50
+      ? await fetch(buildApiUrl(`${API_CONFIG.PRODUCTS.BASE}/batch?ids=${productIds.join(',')}`))
+      : await fetch(buildApiUrl(`${API_CONFIG.PRODUCTS.BASE}/batch`), {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ ids: productIds }),
+        });
+    if (!response.ok) {
+      await handleApiError(response);
+    }
+    const batch: { products: Product[]; missing: number[] } = await response.json();
+    return batch.products;
+  },
+
   /**
    * Actualiza un producto existente.
    */